@@ -3,7 +3,17 @@ from aiohttp import web
 from api.config import Config
 from api.db import init_db
 from api.routes import setup_routes
+from api.utils.admission import setup_admission
 from api.utils.api_specs import setup_api_specs
+from api.utils.auth import setup_auth
+from api.utils.graph import setup_follower_graph
+from api.utils.hashing import setup_hashing
+from api.utils.ingestion import setup_comment_queue
+from api.utils.loop_monitor import setup_loop_monitor
+from api.utils.metrics import setup_metrics
+from api.utils.profiler import setup_profiler
+from api.utils.request_metrics import setup_request_metrics
+from api.utils.suggestions import setup_suggestions
 
 
 def main() -> None:
@@ -32,7 +42,29 @@ async def init_app(config: dict) -> web.Application:
 
     app["config"] = config
 
-    app["db"] = await init_db(config)
+    setup_metrics(app)
+
+    setup_request_metrics(app)
+
+    setup_loop_monitor(app)
+
+    setup_profiler(app)
+
+    app["db"] = await init_db(
+        config, app["metrics"] if config["QUERY_METRICS"] else None
+    )
+
+    setup_hashing(app)
+
+    setup_auth(app)
+
+    setup_admission(app)
+
+    setup_follower_graph(app)
+
+    setup_suggestions(app)
+
+    setup_comment_queue(app)
 
     setup_api_specs(app)
 
@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import sys
+
+from api.bench import dataset, load, logic, serialization, validation
+from api.utils.json_serializers import to_json
+
+
+BENCHMARKS = {
+    "dataset": dataset,
+    "load": load,
+    "logic": logic,
+    "serialization": serialization,
+    "validation": validation,
+}
+
+
+def main() -> None:
+    """Parse arguments and run requested benchmark."""
+
+    parser = argparse.ArgumentParser(prog="python -m api.bench")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    for name, module in BENCHMARKS.items():
+        module.add_arguments(
+            subparsers.add_parser(name, help=module.__doc__.strip())
+        )
+
+    options = parser.parse_args()
+    module = BENCHMARKS[options.benchmark]
+
+    result = asyncio.run(module.run(options))
+
+    print(to_json(result))
+
+    # Comparisons with baseline fail the run, e.g. in CI
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
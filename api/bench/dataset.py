@@ -0,0 +1,636 @@
+"""Generate large reproducible dataset in database of DB_URL."""
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+import math
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+import asyncpg
+from sqlalchemy import ForeignKeyConstraint, Table, UniqueConstraint
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from api.config import Config
+from api.db.schema import (
+    comments,
+    followers,
+    likes,
+    posts,
+    tombstones,
+    user_suggestions,
+    users,
+)
+from api.logic.users import hash_password
+
+
+USERS_COUNT: int = 100000
+FOLLOWEES_PER_USER: float = 20
+POSTS_PER_USER: float = 5
+LIKES_PER_POST: float = 10
+COMMENTS_PER_POST: float = 1
+CHUNK_SIZE: int = 5000
+WORKERS: int = 4
+SEED: int = 0
+START: str = "2020-01-01"
+DAYS: int = 365
+
+# Exponent of popularity of users by rank, bigger is more skewed
+POPULARITY_ALPHA: float = 1.2
+# Shape of per-item counts of followees, likes and comments, smaller
+# is more skewed, must be greater than 1 to have the mean
+ACTIVITY_ALPHA: float = 1.5
+# Followees of one user are sampled without repetition, so heavy
+# followers are capped to keep sampling fast
+MAX_FOLLOWEES_SHARE: float = 0.5
+
+# Password of all generated users
+PASSWORD: str = "Dataset password"
+
+WORDS = (
+    "photo trip sunset coffee friends city morning beach mountain night "
+    "music book cat dog food weekend happy new old summer winter home"
+).split()
+
+# Tables filled by generator, they're loaded without secondary indexes
+# and constraints which are restored after the load
+LOADED_TABLES: Tuple[Table, ...] = (users, followers, posts, likes, comments)
+
+DIALECT = postgresql.dialect()
+
+
+class Chunk(NamedTuple):
+    """Range of generated entities loaded by one COPY."""
+
+    table: Table
+    columns: Tuple[str, ...]
+    generate: Callable[..., List[tuple]]
+    args: tuple
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add arguments of the benchmark.
+
+    :param parser: Parser of benchmark arguments
+    :type parser: argparse.ArgumentParser
+    """
+
+    parser.add_argument("--users", type=int, default=USERS_COUNT)
+    parser.add_argument(
+        "--followees-per-user", type=float, default=FOLLOWEES_PER_USER
+    )
+    parser.add_argument(
+        "--posts-per-user", type=float, default=POSTS_PER_USER
+    )
+    parser.add_argument(
+        "--likes-per-post", type=float, default=LIKES_PER_POST
+    )
+    parser.add_argument(
+        "--comments-per-post", type=float, default=COMMENTS_PER_POST
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_SIZE,
+        help="users or posts generated per chunk",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help="processes generating chunks and connections loading them",
+    )
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=START,
+        help="date of the first post",
+    )
+    parser.add_argument(
+        "--days", type=int, default=DAYS, help="days covered by posts"
+    )
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="clear tables before the load instead of requiring them empty",
+    )
+
+
+async def run(options: argparse.Namespace) -> dict:
+    """
+    Generate dataset and load it by parallel COPY.
+
+    Chunks are generated by processes from seed and their position,
+    so the data doesn't depend on count of workers or order of loads,
+    except for serial ids of follows, likes and comments.
+
+    :param options: Benchmark arguments
+    :type options: argparse.Namespace
+    :return: Counts of rows and durations of stages
+    :rtype: dict
+    """
+
+    started = time.perf_counter()
+    chunks = make_chunks(options)
+    rows = {table.name: 0 for table in LOADED_TABLES}
+    pool = await asyncpg.create_pool(
+        Config.load_config()["db_url"],
+        min_size=options.workers,
+        max_size=options.workers,
+    )
+
+    async with pool:
+        async with pool.acquire() as conn:
+            await prepare_tables(conn, options.truncate)
+
+        loaded = time.perf_counter()
+
+        with ProcessPoolExecutor(options.workers) as executor:
+            await load_chunks(pool, executor, chunks, options.workers, rows)
+
+        restored = time.perf_counter()
+
+        await restore_tables(pool)
+
+    finished = time.perf_counter()
+
+    return {
+        "seed": options.seed,
+        "rows": rows,
+        "total_rows": sum(rows.values()),
+        "seconds": {
+            "load": round(restored - loaded, 3),
+            "indexes": round(finished - restored, 3),
+            "total": round(finished - started, 3),
+        },
+    }
+
+
+def make_chunks(options: argparse.Namespace) -> List[Chunk]:
+    """
+    Split generation of all tables into chunks.
+
+    :param options: Benchmark arguments
+    :type options: argparse.Namespace
+    :return: Chunks of all tables
+    :rtype: List[Chunk]
+    """
+
+    users_count = options.users
+    posts_count = round(users_count * options.posts_per_user)
+    start = options.start.replace(tzinfo=timezone.utc).timestamp()
+    span = timedelta(days=options.days).total_seconds()
+    # Password is hashed once, it's the slowest part of user's row
+    password_hash = hash_password(PASSWORD)
+
+    specs = (
+        (
+            users,
+            (
+                "id",
+                "username",
+                "name",
+                "description",
+                "email",
+                "password_hash",
+            ),
+            generate_users,
+            users_count,
+            (password_hash,),
+        ),
+        (
+            followers,
+            ("from_user", "to_user"),
+            generate_follows,
+            users_count,
+            (users_count, options.followees_per_user),
+        ),
+        (
+            posts,
+            ("id", "user_id", "text", "image", "timestamp"),
+            generate_posts,
+            posts_count,
+            (users_count, posts_count, start, span),
+        ),
+        (
+            likes,
+            ("post_id", "user_id"),
+            generate_likes,
+            posts_count,
+            (users_count, options.likes_per_post),
+        ),
+        (
+            comments,
+            ("post_id", "user_id", "text", "timestamp"),
+            generate_comments,
+            posts_count,
+            (
+                users_count,
+                posts_count,
+                start,
+                span,
+                options.comments_per_post,
+            ),
+        ),
+    )
+    chunks = []
+
+    for table, columns, generate, count, args in specs:
+        for first in range(1, count + 1, options.chunk_size):
+            last = min(count, first + options.chunk_size - 1)
+            chunks.append(
+                Chunk(
+                    table,
+                    columns,
+                    generate,
+                    (options.seed, first, last, *args),
+                )
+            )
+
+    return chunks
+
+
+async def prepare_tables(conn: asyncpg.Connection, truncate: bool) -> None:
+    """
+    Drop secondary indexes and constraints of empty tables.
+
+    Primary keys are kept, ids of users and posts are generated, the
+    rest get ids from sequences.
+
+    :param conn: Connection to database
+    :type conn: asyncpg.Connection
+    :param truncate: Clear tables instead of requiring them empty
+    :type truncate: bool
+    :raise RuntimeError: Tables aren't empty
+    """
+
+    if truncate:
+        await conn.execute(
+            "TRUNCATE %s RESTART IDENTITY CASCADE"
+            % ", ".join(
+                map(
+                    format_table,
+                    (*LOADED_TABLES, tombstones, user_suggestions),
+                )
+            )
+        )
+    else:
+        for table in LOADED_TABLES:
+            if await conn.fetchval(
+                f"SELECT EXISTS (SELECT 1 FROM {format_table(table)})"
+            ):
+                raise RuntimeError(
+                    f"Table {table.name} isn't empty, use --truncate"
+                )
+
+    indexes, constraints = get_deferred()
+
+    for constraint in sorted(
+        constraints, key=lambda item: isinstance(item, UniqueConstraint)
+    ):
+        await conn.execute(
+            f"ALTER TABLE {format_table(constraint.table)} "
+            f"DROP CONSTRAINT IF EXISTS {constraint.name}"
+        )
+
+    for index in indexes:
+        await conn.execute(f"DROP INDEX IF EXISTS {index.name}")
+
+
+async def load_chunks(
+    pool: asyncpg.pool.Pool,
+    executor: ProcessPoolExecutor,
+    chunks: List[Chunk],
+    workers: int,
+    rows: Dict[str, int],
+) -> None:
+    """
+    Generate chunks in processes and copy them into tables.
+
+    :param pool: Pool of connections to database
+    :type pool: asyncpg.pool.Pool
+    :param executor: Executor generating chunks
+    :type executor: ProcessPoolExecutor
+    :param chunks: Chunks to load
+    :type chunks: List[Chunk]
+    :param workers: Count of chunks processed concurrently
+    :type workers: int
+    :param rows: Counts of loaded rows by table, updated in place
+    :type rows: Dict[str, int]
+    """
+
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(workers)
+
+    async def load(chunk: Chunk) -> None:
+        async with semaphore:
+            records = await loop.run_in_executor(
+                executor, chunk.generate, *chunk.args
+            )
+
+            async with pool.acquire() as conn:
+                await conn.copy_records_to_table(
+                    chunk.table.name, records=records, columns=chunk.columns
+                )
+
+        rows[chunk.table.name] += len(records)
+
+    await asyncio.gather(*map(load, chunks))
+
+
+async def restore_tables(pool: asyncpg.pool.Pool) -> None:
+    """
+    Restore indexes and constraints, update sequences and statistics.
+
+    Indexes and unique constraints are built concurrently, foreign keys
+    are validated one by one as each of them locks two tables.
+
+    :param pool: Pool of connections to database
+    :type pool: asyncpg.pool.Pool
+    """
+
+    indexes, constraints = get_deferred()
+    foreign_keys = [
+        constraint
+        for constraint in constraints
+        if isinstance(constraint, ForeignKeyConstraint)
+    ]
+
+    await asyncio.gather(
+        *(
+            pool.execute(str(ddl.compile(dialect=DIALECT)))
+            for ddl in (
+                *map(CreateIndex, indexes),
+                *(
+                    AddConstraint(constraint)
+                    for constraint in constraints
+                    if constraint not in foreign_keys
+                ),
+            )
+        )
+    )
+
+    for constraint in foreign_keys:
+        await pool.execute(
+            str(AddConstraint(constraint).compile(dialect=DIALECT))
+        )
+
+    for table in (users, posts):
+        await pool.execute(
+            "SELECT setval(pg_get_serial_sequence($1, 'id'), MAX(id)) "
+            f"FROM {format_table(table)}",
+            format_table(table),
+        )
+
+    await pool.execute(
+        "ANALYZE %s" % ", ".join(map(format_table, LOADED_TABLES))
+    )
+
+
+def get_deferred() -> Tuple[list, list]:
+    """
+    Get indexes and constraints restored after the load.
+
+    :return: Indexes and foreign key or unique constraints
+    :rtype: Tuple[list, list]
+    """
+
+    indexes = [index for table in LOADED_TABLES for index in table.indexes]
+    constraints = [
+        constraint
+        for table in LOADED_TABLES
+        for constraint in table.constraints
+        if isinstance(constraint, (ForeignKeyConstraint, UniqueConstraint))
+    ]
+
+    return indexes, constraints
+
+
+def format_table(table: Table) -> str:
+    """
+    Quote name of table, e.g. `"user"`.
+
+    :param table: Table
+    :type table: Table
+    :return: Quoted name
+    :rtype: str
+    """
+
+    return DIALECT.identifier_preparer.format_table(table)
+
+
+def make_random(seed: int, name: str, first: int) -> random.Random:
+    """
+    Make generator of the chunk independent of other chunks.
+
+    :param seed: Seed of dataset
+    :type seed: int
+    :param name: Name of generated table
+    :type name: str
+    :param first: The first entity of the chunk
+    :type first: int
+    :return: Random generator
+    :rtype: random.Random
+    """
+
+    return random.Random(f"{seed}:{name}:{first}")
+
+
+def power_law(rng: random.Random, count: int) -> int:
+    """
+    Draw id from 1 to count, small ids are much more likely.
+
+    Inverse of continuous power-law distribution is sampled, so it
+    needs no tables of weights.
+
+    :param rng: Random generator
+    :type rng: random.Random
+    :param count: Count of ids
+    :type count: int
+    :return: Id
+    :rtype: int
+    """
+
+    exponent = 1 - POPULARITY_ALPHA
+    value = (1 + rng.random() * ((count + 1) ** exponent - 1)) ** (
+        1 / exponent
+    )
+
+    return min(count, int(value))
+
+
+def skewed_count(rng: random.Random, mean: float, limit: int) -> int:
+    """
+    Draw count of items with Pareto distribution of the mean.
+
+    :param rng: Random generator
+    :type rng: random.Random
+    :param mean: Mean count
+    :type mean: float
+    :param limit: Max count
+    :type limit: int
+    :return: Count
+    :rtype: int
+    """
+
+    scale = mean * (ACTIVITY_ALPHA - 1) / ACTIVITY_ALPHA
+    # Random rounding keeps the mean of integer counts
+    count = int(scale * rng.paretovariate(ACTIVITY_ALPHA) + rng.random())
+
+    return min(limit, count)
+
+
+def post_time(
+    start: float, span: float, posts_count: int, post_id: int
+) -> float:
+    """
+    Get start of time slot of the post, posts are ordered by ids.
+
+    :param start: Timestamp of the first post
+    :type start: float
+    :param span: Seconds covered by posts
+    :type span: float
+    :param posts_count: Count of posts
+    :type posts_count: int
+    :param post_id: Post's identifier
+    :type post_id: int
+    :return: Timestamp
+    :rtype: float
+    """
+
+    return start + span * (post_id - 1) / posts_count
+
+
+def make_text(rng: random.Random) -> str:
+    """Make text of random words."""
+
+    return " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+
+
+def generate_users(
+    seed: int, first: int, last: int, password_hash: str
+) -> List[tuple]:
+    """Generate users with ids from first to last."""
+
+    return [
+        (
+            user_id,
+            f"user{user_id}",
+            f"User {user_id}",
+            "",
+            f"user{user_id}@dataset.test",
+            password_hash,
+        )
+        for user_id in range(first, last + 1)
+    ]
+
+
+def generate_follows(
+    seed: int, first: int, last: int, users_count: int, mean: float
+) -> List[tuple]:
+    """Generate follows of users with ids from first to last."""
+
+    rng = make_random(seed, "followers", first)
+    limit = math.floor((users_count - 1) * MAX_FOLLOWEES_SHARE)
+    records = []
+
+    for user_id in range(first, last + 1):
+        count = skewed_count(rng, mean, limit)
+        followees = set()
+
+        # Popular users gather most followers
+        while len(followees) < count:
+            followee_id = power_law(rng, users_count)
+
+            if followee_id != user_id:
+                followees.add(followee_id)
+
+        records.extend((user_id, followee_id) for followee_id in followees)
+
+    return records
+
+
+def generate_posts(
+    seed: int,
+    first: int,
+    last: int,
+    users_count: int,
+    posts_count: int,
+    start: float,
+    span: float,
+) -> List[tuple]:
+    """Generate posts with ids from first to last."""
+
+    rng = make_random(seed, "post", first)
+    slot = span / posts_count
+
+    return [
+        (
+            post_id,
+            power_law(rng, users_count),
+            make_text(rng),
+            "",
+            datetime.utcfromtimestamp(
+                post_time(start, span, posts_count, post_id)
+                + rng.random() * slot
+            ),
+        )
+        for post_id in range(first, last + 1)
+    ]
+
+
+def generate_likes(
+    seed: int, first: int, last: int, users_count: int, mean: float
+) -> List[tuple]:
+    """Generate likes of posts with ids from first to last."""
+
+    rng = make_random(seed, "like", first)
+    records = []
+
+    for post_id in range(first, last + 1):
+        count = skewed_count(rng, mean, users_count)
+        records.extend(
+            (post_id, user_id)
+            for user_id in rng.sample(range(1, users_count + 1), count)
+        )
+
+    return records
+
+
+def generate_comments(
+    seed: int,
+    first: int,
+    last: int,
+    users_count: int,
+    posts_count: int,
+    start: float,
+    span: float,
+    mean: float,
+) -> List[tuple]:
+    """Generate comments of posts with ids from first to last."""
+
+    rng = make_random(seed, "comment", first)
+    slot = span / posts_count
+    records = []
+
+    for post_id in range(first, last + 1):
+        # Comments follow the post, mostly within hours
+        published = post_time(start, span, posts_count, post_id) + slot
+
+        for _ in range(skewed_count(rng, mean, users_count)):
+            records.append(
+                (
+                    post_id,
+                    rng.randint(1, users_count),
+                    make_text(rng),
+                    datetime.utcfromtimestamp(
+                        published + rng.expovariate(1 / 3600)
+                    ),
+                )
+            )
+
+    return records
@@ -0,0 +1,456 @@
+"""Replay mix of API requests at target rate and report latency."""
+import argparse
+import asyncio
+import math
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import uuid
+
+from aiohttp import ClientTimeout, TCPConnector
+from aiohttp.test_utils import TestClient, TestServer
+
+from api.__main__ import init_app
+from api.config import Config
+
+
+RATE: float = 100.0
+DURATION: float = 10.0
+USERS_COUNT: int = 20
+POSTS_PER_USER: int = 5
+TIMEOUT: float = 10.0
+CONNECTIONS: int = 100
+SEED: int = 0
+
+# Weights of operations in the mix
+DEFAULT_MIX = (
+    "feed=40,comments=10,post=15,likes=10,comment=10,follow=10,signup=5"
+)
+
+PASSWORD: str = "Bench password"
+
+PERCENTILES = (50, 95, 99)
+
+
+class Fixtures(NamedTuple):
+    """Users and posts created before the load."""
+
+    prefix: str
+    # User's id with authorization headers of the user
+    users: List[Tuple[int, Dict[str, str]]]
+    post_ids: List[int]
+
+
+class Result(NamedTuple):
+    """Outcome of one request."""
+
+    operation: str
+    # Seconds since scheduled start, so waits of late starts are counted
+    latency: float
+    status: Optional[int]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add arguments of the benchmark.
+
+    :param parser: Parser of benchmark arguments
+    :type parser: argparse.ArgumentParser
+    """
+
+    parser.add_argument(
+        "--rate", type=float, default=RATE, help="requests per second"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=DURATION, help="seconds of load"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="weights of operations: " + ", ".join(OPERATIONS),
+    )
+    parser.add_argument(
+        "--arrivals",
+        choices=("poisson", "uniform"),
+        default="poisson",
+        help="distribution of intervals between requests",
+    )
+    parser.add_argument("--users", type=int, default=USERS_COUNT)
+    parser.add_argument(
+        "--posts-per-user", type=int, default=POSTS_PER_USER
+    )
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument(
+        "--connections",
+        type=int,
+        default=CONNECTIONS,
+        help="max count of open connections, unlimited if 0",
+    )
+    parser.add_argument("--seed", type=int, default=SEED)
+
+
+async def run(options: argparse.Namespace) -> dict:
+    """
+    Boot the application and send requests by open-loop schedule.
+
+    Requests are started at their scheduled times regardless of
+    responses to previous ones, so a slow server faces growing
+    concurrency like in production instead of slowing the load down.
+    Application uses database of `DB_URL`.
+
+    :param options: Benchmark arguments
+    :type options: argparse.Namespace
+    :return: Results of benchmark
+    :rtype: dict
+    """
+
+    mix = options.mix
+    rng = random.Random(options.seed)
+    schedule = make_schedule(
+        rng, mix, options.rate, options.duration, options.arrivals
+    )
+    app = await init_app(Config.load_config())
+
+    async with TestClient(
+        TestServer(app),
+        connector=TCPConnector(limit=options.connections),
+        timeout=ClientTimeout(total=options.timeout),
+    ) as client:
+        fixtures = await create_fixtures(
+            client, rng, options.users, options.posts_per_user
+        )
+        # Arguments are drawn before the load, so they don't depend on
+        # order of responses
+        requests = [
+            (at, operation, OPERATIONS[operation](rng, fixtures))
+            for at, operation in schedule
+        ]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                send_request(client, operation, request, started + at)
+                for at, operation, request in requests
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "seed": options.seed,
+        "target_rate": options.rate,
+        "duration": options.duration,
+        "arrivals": options.arrivals,
+        "mix": mix,
+        "elapsed": round(elapsed, 3),
+        **summarize(results, elapsed),
+        "operations": {
+            name: summarize(
+                [result for result in results if result.operation == name],
+                elapsed,
+            )
+            for name in mix
+        },
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse weights of operations, e.g. `feed=3,signup=1`.
+
+    :param mix: Comma separated pairs of operation and weight
+    :type mix: str
+    :raise ValueError: Mix is invalid
+    :return: Weight of each operation
+    :rtype: Dict[str, float]
+    """
+
+    weights = {}
+
+    for pair in mix.split(","):
+        operation, _, weight = pair.partition("=")
+        operation = operation.strip()
+
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}")
+
+        weights[operation] = float(weight or 1)
+
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError("Mix has no operations")
+
+    return weights
+
+
+def make_schedule(
+    rng: random.Random,
+    mix: Dict[str, float],
+    rate: float,
+    duration: float,
+    arrivals: str,
+) -> List[Tuple[float, str]]:
+    """
+    Make times and operations of requests.
+
+    Schedule depends only on arguments and seed, so runs are comparable.
+
+    :param rng: Random generator
+    :type rng: random.Random
+    :param mix: Weight of each operation
+    :type mix: Dict[str, float]
+    :param rate: Requests per second
+    :type rate: float
+    :param duration: Seconds of load
+    :type duration: float
+    :param arrivals: Distribution of intervals: poisson or uniform
+    :type arrivals: str
+    :return: Seconds since start and operation of each request
+    :rtype: List[Tuple[float, str]]
+    """
+
+    operations, weights = list(mix), list(mix.values())
+    schedule = []
+    at = 0.0
+
+    while True:
+        at += rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+
+        if at >= duration:
+            return schedule
+
+        schedule.append((at, rng.choices(operations, weights)[0]))
+
+
+async def create_fixtures(
+    client: TestClient, rng: random.Random, users_count: int, posts: int
+) -> Fixtures:
+    """
+    Sign up users, log them in and create their posts.
+
+    :param client: Client of application
+    :type client: TestClient
+    :param rng: Random generator
+    :type rng: random.Random
+    :param users_count: Count of users
+    :type users_count: int
+    :param posts: Count of posts of each user
+    :type posts: int
+    :return: Created users and posts
+    :rtype: Fixtures
+    """
+
+    # Usernames are unique, so each run needs own ones
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    users, post_ids = [], []
+
+    for i in range(users_count):
+        username = f"{prefix}-{i}"
+        user = await post_json(client, "/users", make_user(username))
+        login = await post_json(
+            client, "/login", {"username": username, "password": PASSWORD}
+        )
+        users.append(
+            (user["id"], {"Authorization": f"Bearer {login['token']}"})
+        )
+
+        for _ in range(posts):
+            post = {
+                "user_id": user["id"],
+                "text": f"Bench post {rng.random()}",
+                "image": "",
+            }
+            post_ids.append((await post_json(client, "/posts", post))["id"])
+
+    return Fixtures(prefix, users, post_ids)
+
+
+async def post_json(client: TestClient, path: str, data: dict) -> dict:
+    """
+    Send POST request of fixtures.
+
+    :param client: Client of application
+    :type client: TestClient
+    :param path: Path of request
+    :type path: str
+    :param data: Body of request
+    :type data: dict
+    :raise RuntimeError: Request failed
+    :return: Decoded response
+    :rtype: dict
+    """
+
+    async with client.post(path, json=data) as resp:
+        if resp.status != 200:
+            raise RuntimeError(f"POST {path}: {await resp.text()}")
+
+        return await resp.json()
+
+
+def make_user(username: str) -> dict:
+    """
+    Make body of signup request.
+
+    :param username: Unique username
+    :type username: str
+    :return: Body of request
+    :rtype: dict
+    """
+
+    return {
+        "username": username,
+        "name": username,
+        "email": f"{username}@bench.test",
+        "password": PASSWORD,
+        "description": "",
+    }
+
+
+async def send_request(
+    client: TestClient, operation: str, request: tuple, start_at: float
+) -> Result:
+    """
+    Wait for the scheduled time and send request of the operation.
+
+    :param client: Client of application
+    :type client: TestClient
+    :param operation: Name of operation in `OPERATIONS`
+    :type operation: str
+    :param request: Method, path and client's arguments of request
+    :type request: tuple
+    :param start_at: Scheduled time by `time.perf_counter`
+    :type start_at: float
+    :return: Outcome of request
+    :rtype: Result
+    """
+
+    method, path, kwargs = request
+
+    await asyncio.sleep(max(0.0, start_at - time.perf_counter()))
+
+    try:
+        async with client.request(method, path, **kwargs) as resp:
+            await resp.read()
+            status = resp.status
+    except (asyncio.TimeoutError, OSError):
+        status = None
+
+    return Result(operation, time.perf_counter() - start_at, status)
+
+
+def feed_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    return "GET", "/posts", {}
+
+
+def comments_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    post_id = rng.choice(fixtures.post_ids)
+
+    return "GET", f"/posts/{post_id}/comments", {"params": {"limit": 20}}
+
+
+def post_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    return "GET", f"/posts/{rng.choice(fixtures.post_ids)}", {}
+
+
+def likes_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    return "GET", f"/posts/{rng.choice(fixtures.post_ids)}/likes_count", {}
+
+
+def comment_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    _, headers = rng.choice(fixtures.users)
+    comment = {
+        "text": "Bench comment",
+        "client_id": str(uuid.UUID(int=rng.getrandbits(128))),
+    }
+
+    return (
+        "POST",
+        f"/posts/{rng.choice(fixtures.post_ids)}/comments",
+        {"json": comment, "headers": headers},
+    )
+
+
+def follow_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    (user_id, headers), (followee_id, _) = rng.sample(fixtures.users, 2)
+
+    return (
+        "POST",
+        f"/users/{user_id}/followees",
+        {"json": {"ids": [followee_id]}, "headers": headers},
+    )
+
+
+def signup_request(rng: random.Random, fixtures: Fixtures) -> tuple:
+    username = f"{fixtures.prefix}-signup-{rng.getrandbits(64):x}"
+
+    return "POST", "/users", {"json": make_user(username)}
+
+
+# Makers of method, path and client's arguments of each operation
+OPERATIONS: Dict[str, Callable[[random.Random, Fixtures], tuple]] = {
+    "feed": feed_request,
+    "comments": comments_request,
+    "post": post_request,
+    "likes": likes_request,
+    "comment": comment_request,
+    "follow": follow_request,
+    "signup": signup_request,
+}
+
+
+def summarize(results: List[Result], elapsed: float) -> dict:
+    """
+    Summarize latency, throughput and statuses of requests.
+
+    :param results: Outcomes of requests
+    :type results: List[Result]
+    :param elapsed: Seconds of the load
+    :type elapsed: float
+    :return: Summary
+    :rtype: dict
+    """
+
+    latencies = sorted(result.latency for result in results)
+    statuses = {}
+
+    for result in results:
+        status = str(result.status or "error")
+        statuses[status] = statuses.get(status, 0) + 1
+
+    succeeded = sum(
+        1
+        for result in results
+        if result.status is not None and result.status < 500
+    )
+
+    return {
+        "requests": len(results),
+        "throughput": round(succeeded / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            **{
+                f"p{q}": round(percentile(latencies, q) * 1000, 2)
+                for q in PERCENTILES
+            },
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "statuses": statuses,
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Get percentile of sorted values by nearest rank.
+
+    :param values: Sorted values
+    :type values: List[float]
+    :param q: Percentile from 0 to 100
+    :type q: float
+    :return: Value of percentile, 0 for no values
+    :rtype: float
+    """
+
+    if not values:
+        return 0.0
+
+    rank = max(1, math.ceil(q / 100 * len(values)))
+
+    return values[rank - 1]
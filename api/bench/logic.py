@@ -0,0 +1,578 @@
+"""Measure logic functions on dataset and compare with baseline."""
+import argparse
+import inspect
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from asyncpg.pool import PoolConnectionProxy
+
+from api.bench.dataset import PASSWORD
+from api.bench.load import percentile
+from api.config import Config
+from api.db import init_db
+from api.db.instrumentation import QueryMetrics
+from api.logic import posts, users
+from api.utils.json_serializers import to_json
+from api.utils.metrics import Registry
+
+ITERATIONS: int = 50
+SLOW_ITERATIONS: int = 3
+WARMUP: int = 3
+THRESHOLD: float = 0.2
+
+# Modules whose every coroutine function should have a case
+MODULES = (posts, users)
+
+# Cases dominated by password hashing
+SLOW_CASES = {
+    "users.authenticate_user",
+    "users.check_password_async",
+    "users.create_user",
+    "users.hash_password_async",
+}
+
+# Metrics compared with baseline by relative change with least absolute
+# change to report, as tiny values are noisy, counts of queries are
+# compared exactly
+RELATIVE_METRICS = {"p50_ms": 0.05, "alloc_bytes": 1024}
+
+
+class Fixtures(NamedTuple):
+    """Existing records passed to logic functions."""
+
+    user_id: int
+    other_id: int
+    username: str
+    password_hash: str
+    post_id: int
+    comment_id: int
+    post_ids: List[int]
+
+
+Case = Callable[[PoolConnectionProxy, Fixtures], Awaitable]
+
+CASES: Dict[str, Case] = {
+    "posts.comment_post": lambda conn, f: posts.comment_post(
+        conn, post_id=f.post_id, user_id=f.other_id, text="Bench"
+    ),
+    "posts.count_posts_relations": lambda conn, f: (
+        posts.count_posts_relations(conn, "like", f.post_ids)
+    ),
+    "posts.create_post": lambda conn, f: posts.create_post(
+        conn, user_id=f.user_id, text="Bench", image=""
+    ),
+    "posts.delete_post": lambda conn, f: posts.delete_post(
+        conn, post_id=f.post_id
+    ),
+    "posts.delete_post_comment": lambda conn, f: posts.delete_post_comment(
+        conn, comment_id=f.comment_id
+    ),
+    "posts.get_comments_replies_page": lambda conn, f: (
+        posts.get_comments_replies_page(conn, comment_id=f.comment_id)
+    ),
+    "posts.get_many_posts_comments_count": lambda conn, f: (
+        posts.get_many_posts_comments_count(conn, post_ids=f.post_ids)
+    ),
+    "posts.get_many_posts_likes_count": lambda conn, f: (
+        posts.get_many_posts_likes_count(conn, post_ids=f.post_ids)
+    ),
+    "posts.get_post_or_exception": lambda conn, f: (
+        posts.get_post_or_exception(conn, post_id=f.post_id)
+    ),
+    "posts.get_posts": lambda conn, f: posts.get_posts(conn),
+    "posts.get_posts_comments": lambda conn, f: posts.get_posts_comments(
+        conn, post_id=f.post_id
+    ),
+    "posts.get_posts_comments_count": lambda conn, f: (
+        posts.get_posts_comments_count(conn, post_id=f.post_id)
+    ),
+    "posts.get_posts_comments_page": lambda conn, f: (
+        posts.get_posts_comments_page(conn, post_id=f.post_id)
+    ),
+    "posts.get_posts_likes_count": lambda conn, f: (
+        posts.get_posts_likes_count(conn, post_id=f.post_id)
+    ),
+    "posts.insert_comments": lambda conn, f: posts.insert_comments(
+        conn,
+        [
+            (f.post_id, f.other_id, None, "Bench", f"bench-{i}")
+            for i in range(10)
+        ],
+    ),
+    "posts.is_post_liked": lambda conn, f: posts.is_post_liked(
+        conn, post_id=f.post_id, user_id=f.other_id
+    ),
+    "posts.like_post": lambda conn, f: posts.like_post(
+        conn, post_id=f.post_id, user_id=f.other_id
+    ),
+    "posts.unlike_post": lambda conn, f: posts.unlike_post(
+        conn, post_id=f.post_id, user_id=f.other_id
+    ),
+    "users.authenticate_user": lambda conn, f: users.authenticate_user(
+        conn, username=f.username, password=PASSWORD
+    ),
+    "users.check_password_async": lambda conn, f: (
+        users.check_password_async(PASSWORD, f.password_hash)
+    ),
+    "users.check_user_exists": lambda conn, f: users.check_user_exists(
+        conn, user_id=f.user_id
+    ),
+    "users.check_users_exist": lambda conn, f: users.check_users_exist(
+        conn, [f.user_id, f.other_id]
+    ),
+    "users.create_user": lambda conn, f: users.create_user(
+        conn,
+        username="bench-user",
+        name="Bench user",
+        email="bench@user.email",
+        password=PASSWORD,
+    ),
+    "users.delete_user": lambda conn, f: users.delete_user(
+        conn, user_id=f.other_id
+    ),
+    "users.follow_user": lambda conn, f: users.follow_user(
+        conn, user_id=f.user_id, follower_id=f.other_id
+    ),
+    "users.follow_users": lambda conn, f: users.follow_users(
+        conn, user_id=f.other_id, followee_ids=[f.user_id]
+    ),
+    "users.get_user_or_exception": lambda conn, f: (
+        users.get_user_or_exception(conn, user_id=f.user_id)
+    ),
+    "users.get_users": lambda conn, f: users.get_users(conn),
+    "users.get_users_followees": lambda conn, f: users.get_users_followees(
+        conn, user_id=f.other_id
+    ),
+    "users.get_users_followees_count": lambda conn, f: (
+        users.get_users_followees_count(conn, user_id=f.other_id)
+    ),
+    "users.get_users_followees_page": lambda conn, f: (
+        users.get_users_followees_page(conn, user_id=f.other_id)
+    ),
+    "users.get_users_followers": lambda conn, f: users.get_users_followers(
+        conn, user_id=f.user_id
+    ),
+    "users.get_users_followers_count": lambda conn, f: (
+        users.get_users_followers_count(conn, user_id=f.user_id)
+    ),
+    "users.get_users_followers_page": lambda conn, f: (
+        users.get_users_followers_page(conn, user_id=f.user_id)
+    ),
+    "users.get_users_posts": lambda conn, f: users.get_users_posts(
+        conn, user_id=f.user_id
+    ),
+    "users.get_users_posts_count": lambda conn, f: (
+        users.get_users_posts_count(conn, user_id=f.user_id)
+    ),
+    "users.hash_password_async": lambda conn, f: users.hash_password_async(
+        PASSWORD
+    ),
+    "users.is_follow_user": lambda conn, f: users.is_follow_user(
+        conn, user_id=f.user_id, follower_id=f.other_id
+    ),
+    "users.unfollow_user": lambda conn, f: users.unfollow_user(
+        conn, user_id=f.user_id, follower_id=f.other_id
+    ),
+    "users.unfollow_users": lambda conn, f: users.unfollow_users(
+        conn, user_id=f.other_id, followee_ids=[f.user_id]
+    ),
+}
+
+
+async def insert_bare_post(
+    conn: PoolConnectionProxy, fixtures: Fixtures
+) -> Fixtures:
+    """
+    Insert post without likes and comments, which block its deletion.
+
+    :param conn: Connection to database
+    :type conn: PoolConnectionProxy
+    :param fixtures: Records used by cases
+    :type fixtures: Fixtures
+    :return: Fixtures with the inserted post
+    :rtype: Fixtures
+    """
+
+    post_id = await conn.fetchval(
+        "INSERT INTO post (user_id, text, image, timestamp) "
+        "VALUES ($1, 'Bench', '', now()) RETURNING id",
+        fixtures.user_id,
+    )
+
+    return fixtures._replace(post_id=post_id)
+
+
+async def insert_bare_user(
+    conn: PoolConnectionProxy, fixtures: Fixtures
+) -> Fixtures:
+    """
+    Insert user without followers, posts, likes and comments.
+
+    :param conn: Connection to database
+    :type conn: PoolConnectionProxy
+    :param fixtures: Records used by cases
+    :type fixtures: Fixtures
+    :return: Fixtures with the inserted user as the other one
+    :rtype: Fixtures
+    """
+
+    user_id = await conn.fetchval(
+        'INSERT INTO "user" (username, name, email, password_hash) '
+        "VALUES ('bench-user', 'Bench user', 'bench@user.email', $1) "
+        "RETURNING id",
+        fixtures.password_hash,
+    )
+
+    return fixtures._replace(other_id=user_id)
+
+
+Setup = Callable[[PoolConnectionProxy, Fixtures], Awaitable[Fixtures]]
+
+# Records made before the call in its transaction, as foreign keys don't
+# cascade deletes of referenced records of the dataset
+SETUPS: Dict[str, Setup] = {
+    "posts.delete_post": insert_bare_post,
+    "users.delete_user": insert_bare_user,
+}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add arguments of the benchmark.
+
+    :param parser: Parser of benchmark arguments
+    :type parser: argparse.ArgumentParser
+    """
+
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument(
+        "--slow-iterations",
+        type=int,
+        default=SLOW_ITERATIONS,
+        help="iterations of cases dominated by password hashing",
+    )
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument(
+        "--cases",
+        type=parse_cases,
+        default=list(CASES),
+        help="comma separated cases, all if not set",
+    )
+    parser.add_argument("--save", help="path to save results as baseline")
+    parser.add_argument("--compare", help="path of baseline to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="relative growth of latency or allocations to report",
+    )
+
+
+def parse_cases(cases: str) -> List[str]:
+    """
+    Parse names of cases, e.g. `posts.like_post,users.get_users`.
+
+    :param cases: Comma separated names of cases
+    :type cases: str
+    :raise ValueError: Case is unknown
+    :return: Names of cases
+    :rtype: List[str]
+    """
+
+    names = [name.strip() for name in cases.split(",")]
+
+    for name in names:
+        if name not in CASES:
+            raise ValueError(f"Unknown case {name!r}")
+
+    return names
+
+
+async def run(options: argparse.Namespace) -> dict:
+    """
+    Call each logic function on dataset of DB_URL.
+
+    Every call runs in a transaction which is rolled back, so writes
+    don't change data for the next calls. Latency is measured without
+    the transaction, queries and allocations are measured by one
+    separate call, as tracing of allocations slows calls down.
+    Allocations of cases making queries are counted above the peak of a
+    bare query, which is dominated by buffer of reading the socket.
+
+    :param options: Benchmark arguments
+    :type options: argparse.Namespace
+    :return: Results of benchmark
+    :rtype: dict
+    """
+
+    pool = await init_db(Config.load_config(), Registry())
+    results = {}
+
+    async with pool:
+        async with pool.acquire() as conn:
+            fixtures = await load_fixtures(conn)
+            _, floor = await trace_call(
+                conn,
+                pool.metrics,
+                lambda conn, f: conn.fetchval("SELECT 1"),
+                None,
+                fixtures,
+            )
+
+            for name in options.cases:
+                iterations = (
+                    options.slow_iterations
+                    if name in SLOW_CASES
+                    else options.iterations
+                )
+                results[name] = await measure(
+                    conn,
+                    pool.metrics,
+                    CASES[name],
+                    SETUPS.get(name),
+                    fixtures,
+                    iterations,
+                    options.warmup,
+                    floor,
+                )
+
+    report = {"cases": results, "uncovered": get_uncovered()}
+
+    if options.save:
+        with open(options.save, "w") as file:
+            file.write(to_json(report))
+
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+
+        report["regressions"] = compare(
+            baseline["cases"], results, options.threshold
+        )
+
+    return report
+
+
+async def load_fixtures(conn: PoolConnectionProxy) -> Fixtures:
+    """
+    Pick records of dataset used by cases.
+
+    The first user is the most followed one in generated dataset.
+
+    :param conn: Connection to database
+    :type conn: PoolConnectionProxy
+    :raise RuntimeError: Dataset isn't loaded
+    :return: Records used by cases
+    :rtype: Fixtures
+    """
+
+    user_ids = await conn.fetch('SELECT id FROM "user" ORDER BY id LIMIT 2')
+    comment = await conn.fetchrow(
+        "SELECT id, post_id FROM comment WHERE parent_id IS NULL "
+        "ORDER BY id LIMIT 1"
+    )
+
+    if len(user_ids) < 2 or comment is None:
+        raise RuntimeError(
+            "Dataset isn't loaded, run python -m api.bench dataset"
+        )
+
+    user = await conn.fetchrow(
+        'SELECT username, password_hash FROM "user" WHERE id = $1',
+        user_ids[0]["id"],
+    )
+    post_ids = await conn.fetch("SELECT id FROM post ORDER BY id LIMIT 20")
+
+    return Fixtures(
+        user_id=user_ids[0]["id"],
+        other_id=user_ids[1]["id"],
+        username=user["username"],
+        password_hash=user["password_hash"],
+        post_id=comment["post_id"],
+        comment_id=comment["id"],
+        post_ids=[record["id"] for record in post_ids],
+    )
+
+
+async def measure(
+    conn: PoolConnectionProxy,
+    metrics: QueryMetrics,
+    case: Case,
+    setup: Optional[Setup],
+    fixtures: Fixtures,
+    iterations: int,
+    warmup: int,
+    floor: int,
+) -> dict:
+    """
+    Measure latency, queries and allocations of the case.
+
+    :param conn: Connection to database
+    :type conn: PoolConnectionProxy
+    :param metrics: Metrics of queries of the connection
+    :type metrics: QueryMetrics
+    :param case: Call of logic function
+    :type case: Case
+    :param setup: Maker of records used by the case only
+    :type setup: Optional[Setup]
+    :param fixtures: Records used by cases
+    :type fixtures: Fixtures
+    :param iterations: Count of measured calls
+    :type iterations: int
+    :param warmup: Count of calls before measured ones
+    :type warmup: int
+    :param floor: Peak of allocations of a bare query
+    :type floor: int
+    :return: Metrics of the case or its error
+    :rtype: dict
+    """
+
+    latencies = []
+
+    try:
+        for i in range(warmup + iterations):
+            transaction = conn.transaction()
+            await transaction.start()
+
+            try:
+                case_fixtures = (
+                    await setup(conn, fixtures) if setup else fixtures
+                )
+                started = time.perf_counter()
+                await case(conn, case_fixtures)
+                elapsed = time.perf_counter() - started
+            finally:
+                await transaction.rollback()
+
+            if i >= warmup:
+                latencies.append(elapsed)
+
+        queries, peak = await trace_call(conn, metrics, case, setup, fixtures)
+    except Exception as exc:
+        return {"error": repr(exc)}
+
+    latencies.sort()
+
+    return {
+        "calls": len(latencies),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "queries": queries,
+        # Buffers of reading responses are allocated by each query
+        "alloc_bytes": max(0, peak - floor) if queries else peak,
+    }
+
+
+async def trace_call(
+    conn: PoolConnectionProxy,
+    metrics: QueryMetrics,
+    case: Case,
+    setup: Optional[Setup],
+    fixtures: Fixtures,
+) -> Tuple[int, int]:
+    """
+    Call the case once counting its queries and peak of allocations.
+
+    :param conn: Connection to database
+    :type conn: PoolConnectionProxy
+    :param metrics: Metrics of queries of the connection
+    :type metrics: QueryMetrics
+    :param case: Call of logic function
+    :type case: Case
+    :param setup: Maker of records used by the case only
+    :type setup: Optional[Setup]
+    :param fixtures: Records used by cases
+    :type fixtures: Fixtures
+    :return: Count of queries and peak of allocated bytes
+    :rtype: Tuple[int, int]
+    """
+
+    transaction = conn.transaction()
+    await transaction.start()
+
+    try:
+        if setup:
+            fixtures = await setup(conn, fixtures)
+
+        queries = metrics.count_queries()
+        tracemalloc.start()
+        await case(conn, fixtures)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        await transaction.rollback()
+
+    return metrics.count_queries() - queries, peak
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> List[dict]:
+    """
+    Find cases which got slower, allocate or query more than baseline.
+
+    :param baseline: Metrics of cases of baseline
+    :type baseline: dict
+    :param results: Metrics of cases of current run
+    :type results: dict
+    :param threshold: Allowed relative growth of latency and allocations
+    :type threshold: float
+    :return: Regressions with metric, baseline and current values
+    :rtype: List[dict]
+    """
+
+    regressions = []
+
+    for name, current in results.items():
+        base = baseline.get(name)
+
+        if base is None:
+            continue
+
+        if "error" in current or "error" in base:
+            if "error" in current and "error" not in base:
+                regressions.append({"case": name, "error": current["error"]})
+
+            continue
+
+        for metric in (*RELATIVE_METRICS, "queries"):
+            allowed = base[metric]
+
+            if metric in RELATIVE_METRICS:
+                allowed = max(
+                    allowed * (1 + threshold),
+                    allowed + RELATIVE_METRICS[metric],
+                )
+
+            if current[metric] > allowed:
+                regressions.append(
+                    {
+                        "case": name,
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": current[metric],
+                    }
+                )
+
+    return regressions
+
+
+def get_uncovered() -> List[str]:
+    """
+    Get logic functions which have no case.
+
+    :return: Names of functions
+    :rtype: List[str]
+    """
+
+    return [
+        f"{module.__name__.rsplit('.', 1)[-1]}.{name}"
+        for module in MODULES
+        for name, func in inspect.getmembers(
+            module, inspect.iscoroutinefunction
+        )
+        if func.__module__ == module.__name__
+        and f"{module.__name__.rsplit('.', 1)[-1]}.{name}" not in CASES
+    ]
@@ -0,0 +1,90 @@
+"""Compare payload size and encode time of JSON and MessagePack."""
+import argparse
+import base64
+import datetime
+import random
+import timeit
+from typing import List
+
+from api.utils.json_serializers import to_json
+from api.utils.msgpack_serializers import to_msgpack
+
+
+POSTS_COUNT: int = 10
+IMAGE_SIZE: int = 1024
+REPEAT: int = 200
+
+ENCODERS = {
+    "json": lambda data: to_json(data).encode("utf-8"),
+    "msgpack": to_msgpack,
+}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add arguments of the benchmark.
+
+    :param parser: Parser of benchmark arguments
+    :type parser: argparse.ArgumentParser
+    """
+
+    parser.add_argument("--posts", type=int, default=POSTS_COUNT)
+    parser.add_argument("--image-size", type=int, default=IMAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+
+
+async def run(options: argparse.Namespace) -> dict:
+    """
+    Encode feed payload by each encoder.
+
+    :param options: Benchmark arguments
+    :type options: argparse.Namespace
+    :return: Results of benchmark
+    :rtype: dict
+    """
+
+    feed = make_feed(options.posts, options.image_size)
+    results = {}
+
+    for name, encode in ENCODERS.items():
+        timings = timeit.repeat(
+            lambda: encode(feed), number=1, repeat=options.repeat
+        )
+        seconds = min(timings)
+
+        results[name] = {
+            "payload_bytes": len(encode(feed)),
+            "encode_microseconds": round(seconds * 1e6, 1),
+        }
+
+    return results
+
+
+def make_feed(count: int, image_size: int) -> List[dict]:
+    """
+    Make feed of posts like the one returned by `get_posts`.
+
+    :param count: Count of posts
+    :type count: int
+    :param image_size: Size of post's image in bytes
+    :type image_size: int
+    :return: List of posts
+    :rtype: List[dict]
+    """
+
+    rnd = random.Random(count)
+    now = datetime.datetime.utcnow()
+
+    return [
+        {
+            "id": i,
+            "user_id": rnd.randint(1, 10 ** 6),
+            "text": f"Post text {i}",
+            "image": base64.b64encode(
+                bytes(rnd.getrandbits(8) for _ in range(image_size))
+            ).decode("ascii"),
+            "timestamp": now - datetime.timedelta(minutes=i),
+            "username": f"user{i}",
+        }
+        for i in range(1, count + 1)
+    ]
@@ -0,0 +1,166 @@
+"""Compare request validation middlewares on UserList.post."""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Optional
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from aiohttp_apispec import setup_aiohttp_apispec
+from aiohttp_apispec import validation_middleware as apispec_middleware
+
+from api.utils.validation import setup_validation
+from api.views.users import UserList
+
+
+REQUESTS_COUNT: int = 5000
+CONCURRENCY: int = 50
+
+USER_DATA = {
+    "username": "Bench user",
+    "name": "Bench user",
+    "email": "bench@user.email",
+    "password": "Bench password",
+    "description": "",
+}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add arguments of the benchmark.
+
+    :param parser: Parser of benchmark arguments
+    :type parser: argparse.ArgumentParser
+    """
+
+    parser.add_argument("--requests", type=int, default=REQUESTS_COUNT)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+
+
+async def run(options: argparse.Namespace) -> dict:
+    """
+    Measure requests/sec of UserList.post with each middleware.
+
+    :param options: Benchmark arguments
+    :type options: argparse.Namespace
+    :return: Results of benchmark
+    :rtype: dict
+    """
+
+    results = {}
+
+    for name, setup_middleware in (
+        ("aiohttp_apispec", setup_apispec_validation),
+        ("compiled", setup_validation),
+    ):
+        app = make_app(setup_middleware)
+
+        async with TestClient(TestServer(app)) as client:
+            elapsed = await send_requests(
+                client, options.requests, options.concurrency
+            )
+
+        results[name] = {
+            "requests": options.requests,
+            "seconds": round(elapsed, 3),
+            "requests_per_second": round(options.requests / elapsed, 1),
+        }
+
+    results["speedup"] = round(
+        results["compiled"]["requests_per_second"]
+        / results["aiohttp_apispec"]["requests_per_second"],
+        2,
+    )
+
+    return results
+
+
+def setup_apispec_validation(app: web.Application) -> None:
+    """
+    Setup validation middleware of aiohttp_apispec.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app.middlewares.append(apispec_middleware)
+
+
+def make_app(setup_middleware: Callable) -> web.Application:
+    """
+    Make application with UserList view which doesn't touch database.
+
+    :param setup_middleware: Function to setup validation middleware
+    :type setup_middleware: Callable
+    :return: Application instance
+    :rtype: web.Application
+    """
+
+    app = web.Application()
+    app.router.add_view("/users", BenchUserList)
+    app["db"] = NullPool()
+
+    setup_aiohttp_apispec(app=app, url="/api/docs/swagger.json")
+    setup_middleware(app)
+
+    return app
+
+
+async def send_requests(
+    client: TestClient, count: int, concurrency: int
+) -> float:
+    """
+    Send requests to UserList.post concurrently.
+
+    :param client: Client of application
+    :type client: TestClient
+    :param count: Count of requests
+    :type count: int
+    :param concurrency: Count of requests in flight
+    :type concurrency: int
+    :return: Elapsed time in seconds
+    :rtype: float
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send() -> None:
+        async with semaphore:
+            async with client.post("/users", json=USER_DATA) as resp:
+                assert resp.status == 200, await resp.text()
+                await resp.read()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(count)))
+
+    return time.perf_counter() - started
+
+
+class NullPool:
+    """Pool stub which gives no connection."""
+
+    def acquire(self) -> "NullPool":
+        return self
+
+    async def __aenter__(self) -> None:
+        return None
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+async def create_user_stub(conn: Optional[Any], **kwargs) -> int:
+    return 1
+
+
+async def get_user_stub(conn: Optional[Any], *, user_id: int) -> dict:
+    return {"id": user_id, "name": USER_DATA["name"]}
+
+
+class BenchUserList(UserList):
+    """UserList view with stubbed logic to measure request processing."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.create_func = create_user_stub
+        self.get_func = get_user_stub
@@ -1,5 +1,6 @@
 from os import getenv
 from pathlib import Path
+from typing import Optional
 
 
 BASE_PATH = Path(__file__).parent.parent.resolve()
@@ -10,6 +11,92 @@ class Config:
 
     APP_NAME = "aioinsta"
 
+    # Max count of sub-requests in one batch request
+    BATCH_MAX_REQUESTS = 20
+    # Max count of sub-requests executed concurrently
+    BATCH_CONCURRENCY = 5
+
+    # Record latency, rows and errors of queries for /metrics
+    QUERY_METRICS = True
+    # Record latency, statuses, sizes and phases of requests for /metrics
+    REQUEST_METRICS = True
+
+    # Log queries slower than this many seconds, disabled if None,
+    # requires QUERY_METRICS
+    SLOW_QUERY_THRESHOLD = 0.2
+    # Share of slow queries whose plans are captured by EXPLAIN ANALYZE
+    SLOW_QUERY_EXPLAIN_RATE = 0.1
+    # Max seconds of capturing one plan
+    SLOW_QUERY_EXPLAIN_TIMEOUT = 10.0
+
+    # Seconds between measurements of event loop lag, disabled if None
+    LOOP_MONITOR_INTERVAL = 0.1
+    # Log stack of code blocking event loop longer than this many seconds
+    LOOP_BLOCK_THRESHOLD = 0.25
+
+    # Seconds between samples of stacks of /debug/profile
+    PROFILE_INTERVAL = 0.01
+    # Max seconds of one profiling session
+    PROFILE_MAX_SECONDS = 60
+
+    # Executor of password hashing: "thread" or "process"
+    HASHING_EXECUTOR = "thread"
+    # Count of hashing workers, default of executor if None
+    HASHING_WORKERS = None
+    # Max count of hashing jobs in executor, the rest wait in queue
+    HASHING_CONCURRENCY = 4
+
+    # Algorithm of new password hashes: "pbkdf2-sha512" or "scrypt",
+    # weaker hashes are rehashed on login
+    PASSWORD_HASH_ALGORITHM = "pbkdf2-sha512"
+    PASSWORD_HASH_ITERATIONS = 100000
+    PASSWORD_HASH_SCRYPT_N = 2 ** 14
+
+    # Limiters of CPU-heavy routes: max count of concurrent requests,
+    # max count of waiting ones and seconds of waiting, the rest are
+    # answered by 503 with Retry-After
+    ADMISSION_LIMITS = {
+        "signup": {
+            "concurrency": 4,
+            "queue": 16,
+            "timeout": 5.0,
+            "retry_after": 1,
+        },
+    }
+
+    # Keep followers table in memory of each worker, it's kept current
+    # by notifications of writes of all workers
+    FOLLOWER_GRAPH = True
+    # Seconds between reloads of follower graph restoring notifications
+    # lost with connection, disabled if None
+    FOLLOWER_GRAPH_REFRESH = 60
+
+    # Write comments in background batches instead of one by one, post
+    # and replied comment are checked by one query before acknowledgement
+    COMMENT_QUEUE = False
+    # Max count of queued comments, the rest are answered by 503
+    COMMENT_QUEUE_SIZE = 10000
+    # Max count of comments written by one query
+    COMMENT_QUEUE_BATCH = 500
+    # Seconds of collecting comments for one write
+    COMMENT_QUEUE_INTERVAL = 0.005
+    # Acknowledge comments only after they're written
+    COMMENT_QUEUE_DURABLE = False
+    # Max count of writes of acknowledged comment if they fail
+    COMMENT_QUEUE_FLUSH_ATTEMPTS = 3
+    # Seconds of pause after failed write
+    COMMENT_QUEUE_RETRY_INTERVAL = 1.0
+
+    # Seconds between updates of suggested users, disabled if None
+    SUGGESTIONS_REFRESH = 15 * 60
+    # Count of suggested users kept per user
+    SUGGESTIONS_LIMIT = 20
+
+    # Lifetime of session token in seconds
+    TOKEN_TTL = 24 * 60 * 60
+    # Seconds between reloads of revoked tokens, disabled if None
+    TOKEN_REVOCATION_REFRESH = 30
+
     def __init__(self, **kwargs):
         for attribute, value in kwargs.items():
             if hasattr(self, attribute):
@@ -31,6 +118,29 @@ class Config:
 
         raise ValueError("You need to set DB_URL env variable")
 
+    @property
+    def secret_key(self) -> str:
+        """
+        Property to get key for signing of tokens
+
+        :raise ValueError: SECRET_KEY env variable not present
+        """
+
+        if (secret_key := getenv("SECRET_KEY")) is not None:
+            return secret_key
+
+        raise ValueError("You need to set SECRET_KEY env variable")
+
+    @property
+    def debug_token(self) -> Optional[str]:
+        """
+        Property to get token of debug endpoints
+
+        Debug endpoints are disabled if DEBUG_TOKEN env variable isn't set.
+        """
+
+        return getenv("DEBUG_TOKEN")
+
     def load_params(self) -> dict:
         """
         Load all configuration params.
@@ -67,6 +177,12 @@ class Config:
 
 
 class TestConfig(Config):
+    FOLLOWER_GRAPH = False
+    SLOW_QUERY_THRESHOLD = None
+    LOOP_MONITOR_INTERVAL = None
+    SUGGESTIONS_REFRESH = None
+    TOKEN_REVOCATION_REFRESH = None
+
     @property
     def get_db_params(self):
         """Get params of test db."""
@@ -86,3 +202,9 @@ class TestConfig(Config):
         params = self.get_db_params
 
         return "postgresql://{user}:{pass}@{host}:{post}".format(**params)
+
+    @property
+    def secret_key(self) -> str:
+        """Return key for signing of test tokens"""
+
+        return getenv("TEST_SECRET_KEY", "test_secret")
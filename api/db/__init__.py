@@ -1,11 +1,20 @@
-from typing import Union, Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Union
 
 import aiosqlite
 from aiosqlite import Connection
 import asyncpgsa
-from asyncpg.pool import Pool
+from asyncpg.pool import Pool, PoolConnectionProxy
 from sqlalchemy import create_engine
 
+from api.db.instrumentation import (
+    InstrumentedPool,
+    QueryMetrics,
+    make_connection_class,
+)
+from api.db.slow_log import SlowQueryLog
+from api.utils.metrics import Registry
+
 
 NAMING_CONVECTION = {
     "all_column_names": lambda constraint, table: "_".join(
@@ -19,12 +28,17 @@ NAMING_CONVECTION = {
 }
 
 
-async def init_db(config: dict) -> Union[Pool, Connection]:
+async def init_db(
+    config: dict, metrics: Optional[Registry] = None
+) -> Union[Pool, Connection]:
     """
     Initiate db connection.
 
     :param config: Application configuration
     :type config: dict
+    :param metrics: Registry to expose metrics of queries by, queries
+        aren't instrumented if None
+    :type metrics: Optional[Registry]
     :return: Pool of db connection
     :rtype: Union[Pool, Connection]
     """
@@ -32,7 +46,27 @@ async def init_db(config: dict) -> Union[Pool, Connection]:
     db_url = config["db_url"]
 
     if db_url.startswith("postgresql"):
-        return await asyncpgsa.create_pool(dsn=db_url)
+        if metrics is None:
+            return await asyncpgsa.create_pool(dsn=db_url)
+
+        query_metrics = QueryMetrics(metrics)
+        slow_log = SlowQueryLog(
+            metrics,
+            config["SLOW_QUERY_THRESHOLD"],
+            config["SLOW_QUERY_EXPLAIN_RATE"],
+            config["SLOW_QUERY_EXPLAIN_TIMEOUT"],
+        )
+        pool = await asyncpgsa.create_pool(
+            dsn=db_url,
+            connection_class=make_connection_class(query_metrics, slow_log),
+        )
+        # Plans are captured on connections of the wrapped pool, so their
+        # waits aren't recorded as waits of application's queries
+        slow_log.pool = pool
+        instrumented_pool = InstrumentedPool(pool, query_metrics, slow_log)
+        metrics.collectors.append(instrumented_pool.collect)
+
+        return instrumented_pool
 
     return aiosqlite.connect(db_url)
 
@@ -50,3 +84,23 @@ def get_engine(config: dict) -> Any:
     db_url = config["db_url"]
 
     return create_engine(db_url, isolation_level="AUTOCOMMIT")
+
+
+@asynccontextmanager
+async def acquire_connection(
+    conn: Union[Pool, PoolConnectionProxy]
+) -> AsyncIterator[PoolConnectionProxy]:
+    """
+    Get single connection, e.g. to run queries in one transaction.
+
+    :param conn: Pool of connections or connection to database
+    :type conn: Union[Pool, PoolConnectionProxy]
+    :return: Connection acquired from the pool or given one
+    :rtype: AsyncIterator[PoolConnectionProxy]
+    """
+
+    if hasattr(conn, "acquire"):
+        async with conn.acquire() as connection:
+            yield connection
+    else:
+        yield conn
@@ -0,0 +1,283 @@
+from contextlib import asynccontextmanager
+import sys
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Optional, Type
+
+from asyncpg.pool import Pool, PoolConnectionProxy
+from asyncpgsa.connection import SAConnection
+
+from api.db.slow_log import SlowQueryLog
+from api.utils.metrics import Counter, Gauge, Histogram, Registry
+from api.utils.request_metrics import add_phase_time
+
+
+# Queries outside of application's modules, e.g. made by migrations
+UNKNOWN_FUNCTION: str = "unknown"
+# Queries made by driver itself, e.g. resets of released connections
+# and commands of transactions
+DRIVER_FUNCTION: str = "asyncpg"
+
+
+class QueryMetrics:
+    """Metrics of queries labeled by function which made them."""
+
+    def __init__(self, registry: Registry):
+        """
+        :param registry: Registry to expose metrics by
+        :type registry: Registry
+        """
+
+        self.latency = registry.register(
+            Histogram(
+                "db_query_duration_seconds",
+                "Latency of queries",
+                ("function",),
+            )
+        )
+        self.rows = registry.register(
+            Counter("db_query_rows_total", "Rows returned", ("function",))
+        )
+        self.errors = registry.register(
+            Counter("db_query_errors_total", "Failed queries", ("function",))
+        )
+        self.acquire = registry.register(
+            Histogram(
+                "db_pool_acquire_seconds", "Wait of connection from pool"
+            )
+        )
+        self.pool_size = registry.register(
+            Gauge("db_pool_size", "Count of open connections")
+        )
+        self.pool_idle = registry.register(
+            Gauge("db_pool_idle", "Count of idle connections")
+        )
+        self.pool_max_size = registry.register(
+            Gauge("db_pool_max_size", "Max count of connections")
+        )
+
+    def observe(
+        self, function: str, seconds: float, rows: Optional[int]
+    ) -> None:
+        """
+        Record finished query and add its time to the current request.
+
+        :param function: Function which made the query
+        :type function: str
+        :param seconds: Duration of the query
+        :type seconds: float
+        :param rows: Count of returned rows, None if query failed
+        :type rows: Optional[int]
+        """
+
+        self.latency.observe(function, value=seconds)
+        add_phase_time("db", seconds)
+
+        if rows is None:
+            self.errors.inc(function)
+        else:
+            self.rows.inc(function, value=rows)
+
+    def count_queries(self) -> int:
+        """
+        Get count of queries made by application, not by driver.
+
+        :return: Count of queries
+        :rtype: int
+        """
+
+        return sum(
+            self.latency.count(*labels)
+            for labels in self.latency.values
+            if labels != (DRIVER_FUNCTION,)
+        )
+
+
+class InstrumentedPool:
+    """
+    Pool of instrumented connections which records waits of acquiring.
+
+    Everything else is delegated to the wrapped pool.
+    """
+
+    def __init__(
+        self,
+        pool: Pool,
+        metrics: QueryMetrics,
+        slow_log: Optional[SlowQueryLog] = None,
+    ):
+        """
+        :param pool: Pool of instrumented connections
+        :type pool: Pool
+        :param metrics: Metrics of queries
+        :type metrics: QueryMetrics
+        :param slow_log: Log of slow queries of the connections
+        :type slow_log: Optional[SlowQueryLog]
+        """
+
+        self._pool = pool
+        self.metrics = metrics
+        self.slow_log = slow_log
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    async def __aenter__(self) -> "InstrumentedPool":
+        await self._pool.__aenter__()
+
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._pool.__aexit__(*exc)
+
+    @asynccontextmanager
+    async def acquire(
+        self, *, timeout: Optional[float] = None
+    ) -> AsyncIterator[PoolConnectionProxy]:
+        """
+        Acquire connection from the pool.
+
+        :param timeout: Max seconds of waiting
+        :type timeout: Optional[float]
+        :return: Connection
+        :rtype: AsyncIterator[PoolConnectionProxy]
+        """
+
+        start = perf_counter()
+
+        async with self._pool.acquire(timeout=timeout) as conn:
+            self.metrics.acquire.observe(value=perf_counter() - start)
+
+            yield conn
+
+    async def execute(self, *args, **kwargs) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(*args, **kwargs)
+
+    async def fetch(self, *args, **kwargs) -> Any:
+        async with self.acquire() as conn:
+            return await conn.fetch(*args, **kwargs)
+
+    async def fetchrow(self, *args, **kwargs) -> Any:
+        async with self.acquire() as conn:
+            return await conn.fetchrow(*args, **kwargs)
+
+    async def fetchval(self, *args, **kwargs) -> Any:
+        async with self.acquire() as conn:
+            return await conn.fetchval(*args, **kwargs)
+
+    def collect(self) -> None:
+        """Update gauges of pool's connections."""
+
+        self.metrics.pool_size.set(value=self._pool.get_size())
+        self.metrics.pool_idle.set(value=self._pool.get_idle_size())
+        self.metrics.pool_max_size.set(value=self._pool.get_max_size())
+
+
+def make_connection_class(
+    metrics: QueryMetrics, slow_log: Optional[SlowQueryLog] = None
+) -> Type[SAConnection]:
+    """
+    Make class of connections which record their queries.
+
+    :param metrics: Metrics of queries
+    :type metrics: QueryMetrics
+    :param slow_log: Log of slow queries, not logged if None
+    :type slow_log: Optional[SlowQueryLog]
+    :return: Class of connections
+    :rtype: Type[SAConnection]
+    """
+
+    async def observe(
+        method: Callable, count: Callable[[Any], int], *args, **kwargs
+    ) -> Any:
+        function = get_caller()
+        start = perf_counter()
+
+        try:
+            result = await method(*args, **kwargs)
+        except Exception:
+            seconds = perf_counter() - start
+            metrics.observe(function, seconds, None)
+
+            raise
+
+        seconds = perf_counter() - start
+        metrics.observe(function, seconds, count(result))
+
+        if slow_log is not None:
+            slow_log.check(function, seconds, args[0], args[1:])
+
+        return result
+
+    class InstrumentedConnection(SAConnection):
+        async def execute(self, *args, **kwargs) -> str:
+            return await observe(
+                super().execute, count_status, *args, **kwargs
+            )
+
+        async def fetch(self, *args, **kwargs) -> Any:
+            return await observe(super().fetch, len, *args, **kwargs)
+
+        async def fetchrow(self, *args, **kwargs) -> Any:
+            return await observe(super().fetchrow, count_row, *args, **kwargs)
+
+        async def fetchval(self, *args, **kwargs) -> Any:
+            return await observe(super().fetchval, count_row, *args, **kwargs)
+
+    return InstrumentedConnection
+
+
+def get_caller() -> str:
+    """
+    Find application's function which made the query.
+
+    The nearest frame of `api` package outside of `api.db` is taken,
+    so queries are labeled by logic functions, e.g. `logic.posts.like_post`,
+    unless the query is made by the driver.
+
+    :return: Module and name of the function
+    :rtype: str
+    """
+
+    frame = sys._getframe(1)
+
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+
+        if module.partition(".")[0] == "asyncpg":
+            return DRIVER_FUNCTION
+
+        if module.startswith("api.") and not module.startswith("api.db"):
+            return f"{module[len('api.'):]}.{frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return UNKNOWN_FUNCTION
+
+
+def count_status(status: str) -> int:
+    """
+    Get count of rows affected by command from its status.
+
+    :param status: Status of command, e.g. `INSERT 0 5`
+    :type status: str
+    :return: Count of rows
+    :rtype: int
+    """
+
+    count = status.rsplit(" ", 1)[-1] if status else ""
+
+    return int(count) if count.isdigit() else 0
+
+
+def count_row(result: Any) -> int:
+    """
+    Get count of rows of single row query.
+
+    :param result: Row or value
+    :type result: Any
+    :return: Count of rows
+    :rtype: int
+    """
+
+    return 0 if result is None else 1
@@ -1,14 +1,21 @@
 from datetime import datetime
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     MetaData,
     String,
     Table,
     Text,
+    UniqueConstraint,
+    cast,
+    event,
+    func,
 )
 
 from api.db import NAMING_CONVECTION
@@ -16,6 +23,28 @@ from api.db import NAMING_CONVECTION
 
 metadata = MetaData(naming_convention=NAMING_CONVECTION)
 
+# Id of transaction writing the row, changes of transactions older than
+# snapshot's xmin are all visible unlike ones older than a timestamp
+CURRENT_XACT_ID = cast(cast(func.pg_current_xact_id(), Text), BigInteger)
+
+
+def make_xid_column() -> Column:
+    """
+    Make column of id of transaction which wrote the row last.
+
+    :return: Column
+    :rtype: Column
+    """
+
+    return Column(
+        "xid",
+        BigInteger,
+        nullable=False,
+        server_default=CURRENT_XACT_ID,
+        onupdate=CURRENT_XACT_ID,
+    )
+
+
 users = Table(
     "user",
     metadata,
@@ -31,12 +60,46 @@ followers = Table(
     "followers",
     metadata,
     Column("id", Integer, primary_key=True),
-    Column(
-        "from_user", Integer, ForeignKey("user.id"), nullable=False, index=True
-    ),
-    Column(
-        "to_user", Integer, ForeignKey("user.id"), nullable=False, index=True
-    ),
+    Column("from_user", Integer, ForeignKey("user.id"), nullable=False),
+    Column("to_user", Integer, ForeignKey("user.id"), nullable=False),
+    # Composite keys serve pages of followees and followers ordered by id
+    UniqueConstraint("from_user", "to_user"),
+    Index("ix__followers__to_user_from_user", "to_user", "from_user"),
+)
+
+# Channel of added and removed follows, they're sent on commit as
+# "INSERT from_user to_user" or "DELETE from_user to_user" to keep
+# follower graphs of all workers current
+FOLLOWERS_CHANNEL = "followers"
+
+NOTIFY_FOLLOWERS = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notify_followers() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM pg_notify(
+                'followers', concat_ws(' ', TG_OP, NEW.from_user, NEW.to_user)
+            );
+        ELSE
+            PERFORM pg_notify(
+                'followers', concat_ws(' ', TG_OP, OLD.from_user, OLD.to_user)
+            );
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER tr__followers__notify
+    AFTER INSERT OR DELETE ON followers
+    FOR EACH ROW EXECUTE FUNCTION notify_followers();
+    """
+)
+
+event.listen(
+    followers,
+    "after_create",
+    NOTIFY_FOLLOWERS.execute_if(dialect="postgresql"),
 )
 
 posts = Table(
@@ -49,6 +112,15 @@ posts = Table(
     Column("text", Text),
     Column("image", Text),
     Column("timestamp", DateTime, index=True, default=datetime.utcnow),
+    Column(
+        "updated_at",
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    ),
+    make_xid_column(),
+    Index("ix__post__xid_id", "xid", "id"),
 )
 
 likes = Table(
@@ -61,18 +133,86 @@ likes = Table(
     Column(
         "user_id", Integer, ForeignKey("user.id"), nullable=False, index=True
     ),
+    Column(
+        "updated_at",
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    ),
+    make_xid_column(),
+    Index("ix__like__xid_id", "xid", "id"),
 )
 
 comments = Table(
     "comment",
     metadata,
     Column("id", Integer, primary_key=True),
+    Column("post_id", Integer, ForeignKey("post.id"), nullable=False),
     Column(
-        "post_id", Integer, ForeignKey("post.id"), nullable=False, index=True
+        "user_id", Integer, ForeignKey("user.id"), nullable=False, index=True
     ),
+    # Top-level comment which is replied, replies aren't nested deeper
     Column(
-        "user_id", Integer, ForeignKey("user.id"), nullable=False, index=True
+        "parent_id", Integer, ForeignKey("comment.id", ondelete="CASCADE")
     ),
     Column("text", Text, nullable=False),
     Column("timestamp", DateTime, index=True, default=datetime.utcnow),
+    Column(
+        "updated_at",
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    ),
+    make_xid_column(),
+    # Id generated by client to acknowledge queued comment and skip retries
+    Column("client_id", String(36), unique=True),
+    # Keys of pages of post's comments and comment's replies
+    Index(
+        "ix__comment__post_id_timestamp_id", "post_id", "timestamp", "id"
+    ),
+    Index(
+        "ix__comment__parent_id_timestamp_id", "parent_id", "timestamp", "id"
+    ),
+    Index("ix__comment__xid_id", "xid", "id"),
+)
+
+# Deleted records of synchronized tables
+tombstones = Table(
+    "tombstone",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(32), nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column(
+        "deleted_at", DateTime, nullable=False, server_default=func.now()
+    ),
+    make_xid_column(),
+    Index("ix__tombstone__xid_id", "xid", "id"),
+)
+
+revoked_tokens = Table(
+    "revoked_token",
+    metadata,
+    Column("token_id", String(32), primary_key=True),
+    Column("expires_at", DateTime, nullable=False, index=True),
+)
+
+user_suggestions = Table(
+    "user_suggestion",
+    metadata,
+    Column(
+        "user_id",
+        Integer,
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "suggested_id",
+        Integer,
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("mutual_count", Integer, nullable=False),
 )
@@ -0,0 +1,190 @@
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+import json
+import logging
+import random
+from typing import Any, Deque, Optional, Sequence, Set
+
+from asyncpg.pool import Pool
+from asyncpgsa.connection import compile_query
+
+from api.utils.metrics import Counter, Registry
+
+
+logger = logging.getLogger(__name__)
+
+# Count of recent slow queries kept in memory
+RECENT_SIZE: int = 100
+
+# Statements which can be explained, the rest, e.g. COPY, are only logged
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+# Statements safe to execute again, writes are explained without running
+ANALYZABLE = ("SELECT",)
+
+# Set in tasks capturing plans, so their queries aren't captured again
+explaining: ContextVar[bool] = ContextVar("explaining", default=False)
+
+
+class SlowQueryLog:
+    """
+    Log of queries slower than threshold with plans of sampled ones.
+
+    Plans of reads are captured by `EXPLAIN (ANALYZE, BUFFERS)` on a
+    separate connection in a transaction which is rolled back. Writes
+    aren't executed again, they would wait for locks held by the caller's
+    transaction and advance sequences, so only their estimated plans are
+    captured. One plan is captured at a time, slow queries met meanwhile
+    are only logged. Failed queries aren't checked.
+    """
+
+    def __init__(
+        self,
+        registry: Registry,
+        threshold: Optional[float],
+        explain_rate: float = 0.0,
+        explain_timeout: float = 10.0,
+    ):
+        """
+        :param registry: Registry to expose count of slow queries by
+        :type registry: Registry
+        :param threshold: Seconds of slow query, disabled if None
+        :type threshold: Optional[float]
+        :param explain_rate: Share of slow queries to capture plans of
+        :type explain_rate: float
+        :param explain_timeout: Max seconds of capturing a plan
+        :type explain_timeout: float
+        """
+
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.explain_timeout = explain_timeout
+        self.pool: Optional[Pool] = None
+        self.recent: Deque[dict] = deque(maxlen=RECENT_SIZE)
+        self.counter = registry.register(
+            Counter("db_slow_queries_total", "Slow queries", ("function",))
+        )
+        self._explains: Set[asyncio.Task] = set()
+
+    def check(
+        self, function: str, seconds: float, query: Any, args: Sequence
+    ) -> None:
+        """
+        Log the query if it's slow and capture its plan if sampled.
+
+        :param function: Function which made the query
+        :type function: str
+        :param seconds: Duration of the query
+        :type seconds: float
+        :param query: SQLAlchemy query or SQL
+        :type query: Any
+        :param args: Arguments of SQL query
+        :type args: Sequence
+        """
+
+        if (
+            self.threshold is None
+            or seconds < self.threshold
+            or explaining.get()
+        ):
+            return
+
+        sql, params = compile_query(query)
+        params = params or args
+        entry = {
+            "function": function,
+            "seconds": round(seconds, 6),
+            "sql": sql,
+            "params": [redact(param) for param in params],
+        }
+
+        self.counter.inc(function)
+        self.recent.append(entry)
+        logger.warning("Slow query %s", json.dumps(entry, default=str))
+
+        statement = (sql.split(None, 1) or [""])[0].upper()
+
+        if (
+            self.pool is not None
+            and not self._explains
+            and statement in EXPLAINABLE
+            and random.random() < self.explain_rate
+        ):
+            options = (
+                "ANALYZE, BUFFERS, FORMAT JSON"
+                if statement in ANALYZABLE
+                else "FORMAT JSON"
+            )
+            task = asyncio.ensure_future(
+                self.explain(entry, f"EXPLAIN ({options}) {sql}", params)
+            )
+            self._explains.add(task)
+            task.add_done_callback(self._explains.discard)
+
+    async def explain(
+        self, entry: dict, explain: str, params: Sequence
+    ) -> None:
+        """
+        Capture plan of the query and add it to the entry.
+
+        :param entry: Logged entry of the query
+        :type entry: dict
+        :param explain: SQL of `EXPLAIN` of the query
+        :type explain: str
+        :param params: Unredacted arguments of the query
+        :type params: Sequence
+        """
+
+        explaining.set(True)
+
+        try:
+            async with self.pool.acquire(
+                timeout=self.explain_timeout
+            ) as conn:
+                transaction = conn.transaction()
+                await transaction.start()
+
+                try:
+                    plan = await conn.fetchval(
+                        explain,
+                        *params,
+                        timeout=self.explain_timeout,
+                    )
+                finally:
+                    await transaction.rollback()
+        except Exception:
+            logger.exception("Plan of slow query of %s", entry["function"])
+
+            return
+
+        entry["plan"] = json.loads(plan)
+        logger.warning(
+            "Plan of slow query %s", json.dumps(entry, default=str)
+        )
+
+    async def wait(self) -> None:
+        """Wait for plans being captured."""
+
+        await asyncio.gather(*self._explains)
+
+
+def redact(value: Any) -> Any:
+    """
+    Hide argument of query except for numbers, booleans and nulls.
+
+    Strings may be passwords' hashes, emails or texts of users, ids are
+    kept to reproduce the query.
+
+    :param value: Argument of query
+    :type value: Any
+    :return: Argument or name of its type
+    :rtype: Any
+    """
+
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+
+    return f"<{type(value).__name__}>"
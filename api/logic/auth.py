@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from typing import Dict
+
+from asyncpg.pool import PoolConnectionProxy
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func, select
+
+from api.db.schema import revoked_tokens
+
+
+async def revoke_token(
+    conn: PoolConnectionProxy, *, token_id: str, expires_at: int
+) -> None:
+    """
+    Revoke token until its expiration.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param token_id: Token's identifier
+    :type token_id: str
+    :param expires_at: Timestamp of token's expiration
+    :type expires_at: int
+    """
+
+    await conn.execute(
+        insert(revoked_tokens)
+        .values(
+            token_id=token_id,
+            expires_at=datetime.utcfromtimestamp(expires_at),
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+async def get_revoked_tokens(conn: PoolConnectionProxy) -> Dict[str, int]:
+    """
+    Get revoked tokens which aren't expired yet, expired ones are purged.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :return: Expiration timestamps of revoked tokens
+    :rtype: Dict[str, int]
+    """
+
+    await conn.execute(
+        revoked_tokens.delete().where(
+            revoked_tokens.c.expires_at <= func.timezone("utc", func.now())
+        )
+    )
+
+    records = await conn.fetch(select([revoked_tokens]))
+
+    return {
+        record["token_id"]: int(
+            record["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+        )
+        for record in records
+    }
@@ -1,19 +1,125 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from asyncpg import Record
 from asyncpg.pool import PoolConnectionProxy
-from sqlalchemy.sql import and_, desc, func, select
+from sqlalchemy.sql import Select, and_, desc, func, select, tuple_
 
+from api.db import acquire_connection
 from api.db.schema import comments, likes, posts, users
-from api.logic.users import get_user_or_exception
-from api.utils.exceptions import PostNotFoundException
+from api.logic.users import ID_FIELDS, get_user_or_exception
+from api.utils.exceptions import (
+    ClientIdConflictException,
+    CommentNotFoundException,
+    PostNotFoundException,
+)
+from api.utils.fieldsets import select_columns
 
 
 QUERY_POSTS_LIMIT: int = 10
+QUERY_COMMENTS_PAGE_LIMIT: int = 20
+QUERY_COMMENTS_REPLIES_LIMIT: int = 3
+
+# Page of top-level comments, each with count of replies and the first
+# replies, the comment is repeated in rows of its replies
+QUERY_COMMENTS_PAGE = """
+    SELECT
+        page.id,
+        page.user_id,
+        page.text,
+        page.timestamp,
+        counts.replies_count,
+        reply.id AS reply_id,
+        reply.user_id AS reply_user_id,
+        reply.text AS reply_text,
+        reply.timestamp AS reply_timestamp
+    FROM (
+        SELECT
+            id, user_id, text, timestamp
+        FROM
+            comment
+        WHERE
+            post_id = $1 AND
+            parent_id IS NULL AND
+            (timestamp, id) > ($2, $3)
+        ORDER BY
+            timestamp, id
+        LIMIT $4
+    ) AS page
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*) AS replies_count
+        FROM
+            comment
+        WHERE
+            parent_id = page.id
+    ) AS counts
+    LEFT JOIN LATERAL (
+        SELECT
+            id, user_id, text, timestamp
+        FROM
+            comment
+        WHERE
+            parent_id = page.id
+        ORDER BY
+            timestamp, id
+        LIMIT $5
+    ) AS reply ON TRUE
+    ORDER BY
+        page.timestamp, page.id, reply.timestamp, reply.id
+"""
+
+REPLY_FIELDS = ("id", "user_id", "text", "timestamp")
+
+COMMENT_STAGING_COLUMNS = (
+    "post_id",
+    "user_id",
+    "parent_id",
+    "text",
+    "client_id",
+)
+
+POST_FIELDS = {
+    "id": posts.c.id,
+    "user_id": posts.c.user_id,
+    "text": posts.c.text,
+    "image": posts.c.image,
+    "timestamp": posts.c.timestamp,
+    "updated_at": posts.c.updated_at,
+    "username": users.c.username,
+}
+
+
+def select_posts(fields: Optional[Iterable[str]] = None) -> Select:
+    """
+    Build select of post's objects with requested fields only.
+
+    :param fields: Fields to select, all fields if not set
+    :type fields: Optional[Iterable[str]]
+    :raise InvalidFieldsException: Requested field is not allowed
+    :return: Select query
+    :rtype: Select
+    """
+
+    columns = select_columns(POST_FIELDS, fields)
+    query = select(columns)
+
+    # Join users only if it's needed for requested fields
+    if users.c.username in columns:
+        query = query.select_from(
+            posts.join(users, posts.c.user_id == users.c.id)
+        )
+    else:
+        query = query.select_from(posts)
+
+    return query
 
 
 async def get_posts(
-    conn: PoolConnectionProxy, *, limit: int = QUERY_POSTS_LIMIT
+    conn: PoolConnectionProxy,
+    *,
+    limit: int = QUERY_POSTS_LIMIT,
+    fields: Optional[Iterable[str]] = None
 ) -> List[Optional[Record]]:
     """
     Get list of post's objects.
@@ -22,23 +128,25 @@ async def get_posts(
     :type conn: PoolConnectionProxy
     :param limit: Limit of the list
     :type limit: int
+    :param fields: Fields to select, all fields if not set
+    :type fields: Optional[Iterable[str]]
+    :raise InvalidFieldsException: Requested field is not allowed
     :return: List of post's objects
     :rtype: List[Optional[Record]]
     """
 
-    join = posts.join(users, posts.c.user_id == users.c.id)
     records = await conn.fetch(
-        select([posts, users.c.username])
-        .select_from(join)
-        .order_by(desc(posts.c.timestamp))
-        .limit(limit)
+        select_posts(fields).order_by(desc(posts.c.timestamp)).limit(limit)
     )
 
     return records
 
 
 async def get_post_or_exception(
-    conn: PoolConnectionProxy, *, post_id: int
+    conn: PoolConnectionProxy,
+    *,
+    post_id: int,
+    fields: Optional[Iterable[str]] = None
 ) -> Optional[Record]:
     """
     Find post's object by id.
@@ -47,16 +155,16 @@ async def get_post_or_exception(
     :type conn: PoolConnectionProxy
     :param post_id: Post ID
     :type post_id: int
+    :param fields: Fields to select, all fields if not set
+    :type fields: Optional[Iterable[str]]
+    :raise InvalidFieldsException: Requested field is not allowed
     :raise PostNotFoundException: Post not found
     :return: Post's object
     :rtype: Optional[Record]
     """
 
-    join = posts.join(users, posts.c.user_id == users.c.id)
     post = await conn.fetchrow(
-        select([posts, users.c.username])
-        .select_from(join)
-        .where(posts.c.id == post_id)
+        select_posts(fields).where(posts.c.id == post_id)
     )
 
     if post is None:
@@ -84,7 +192,7 @@ async def create_post(
     :rtype: int
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
 
     post_id = await conn.fetchval(
         """
@@ -115,15 +223,24 @@ async def delete_post(conn: PoolConnectionProxy, *, post_id: int) -> bool:
     :rtype: bool
     """
 
-    await get_post_or_exception(conn, post_id=post_id)
+    await get_post_or_exception(conn, post_id=post_id, fields=ID_FIELDS)
 
     result = await conn.fetchval(
         """
-        DELETE FROM 
-            post 
-        WHERE
-            id = $1
-        RETURNING id
+        WITH deleted AS (
+            DELETE FROM 
+                post 
+            WHERE
+                id = $1
+            RETURNING id
+        )
+        INSERT INTO 
+            tombstone (entity, entity_id) 
+        SELECT 
+            'post', id 
+        FROM 
+            deleted
+        RETURNING entity_id
         """,
         post_id,
     )
@@ -146,13 +263,12 @@ async def get_posts_likes_count(
     :rtype: int
     """
 
-    await get_post_or_exception(conn, post_id=post_id)
+    counts = await get_many_posts_likes_count(conn, post_ids=[post_id])
 
-    result = await conn.fetchval(
-        select([func.count()]).where(likes.c.post_id == post_id)
-    )
+    if post_id not in counts:
+        raise PostNotFoundException()
 
-    return result
+    return counts[post_id]
 
 
 async def get_posts_comments_count(
@@ -170,13 +286,81 @@ async def get_posts_comments_count(
     :rtype: int
     """
 
-    await get_post_or_exception(conn, post_id=post_id)
+    counts = await get_many_posts_comments_count(conn, post_ids=[post_id])
 
-    result = await conn.fetchval(
-        select([func.count()]).where(comments.c.post_id == post_id)
+    if post_id not in counts:
+        raise PostNotFoundException()
+
+    return counts[post_id]
+
+
+async def get_many_posts_likes_count(
+    conn: PoolConnectionProxy, *, post_ids: Iterable[int]
+) -> Dict[int, int]:
+    """
+    Get counts of likes of many posts by one query.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param post_ids: Posts's identifiers
+    :type post_ids: Iterable[int]
+    :return: Count of likes of each existing post
+    :rtype: Dict[int, int]
+    """
+
+    return await count_posts_relations(conn, "like", post_ids)
+
+
+async def get_many_posts_comments_count(
+    conn: PoolConnectionProxy, *, post_ids: Iterable[int]
+) -> Dict[int, int]:
+    """
+    Get counts of comments of many posts by one query.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param post_ids: Posts's identifiers
+    :type post_ids: Iterable[int]
+    :return: Count of comments of each existing post
+    :rtype: Dict[int, int]
+    """
+
+    return await count_posts_relations(conn, "comment", post_ids)
+
+
+async def count_posts_relations(
+    conn: PoolConnectionProxy, table: str, post_ids: Iterable[int]
+) -> Dict[int, int]:
+    """
+    Count rows referencing posts, missing posts are skipped.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param table: Name of table referencing posts by `post_id`
+    :type table: str
+    :param post_ids: Posts's identifiers
+    :type post_ids: Iterable[int]
+    :return: Count of rows of each existing post
+    :rtype: Dict[int, int]
+    """
+
+    # Join with posts checks existence of posts by the same query
+    records = await conn.fetch(
+        f"""
+        SELECT
+            post.id, COUNT(related.post_id) AS count
+        FROM
+            post
+            LEFT JOIN "{table}" AS related ON related.post_id = post.id
+        WHERE
+            post.id = ANY($1::integer[])
+        GROUP BY
+            post.id
+        """,
+        list(set(post_ids)),
     )
 
-    return result
+    return {record.get("id"): record.get("count") for record in records}
 
 
 async def get_posts_comments(
@@ -194,7 +378,7 @@ async def get_posts_comments(
     :rtype: List[Optional[Record]]
     """
 
-    await get_post_or_exception(conn, post_id=post_id)
+    await get_post_or_exception(conn, post_id=post_id, fields=ID_FIELDS)
 
     result = await conn.fetch(
         select([comments.c.user_id, comments.c.text, comments.c.timestamp])
@@ -205,6 +389,106 @@ async def get_posts_comments(
     return result
 
 
+async def get_posts_comments_page(
+    conn: PoolConnectionProxy,
+    *,
+    post_id: int,
+    limit: int = QUERY_COMMENTS_PAGE_LIMIT,
+    after: Optional[Tuple[datetime, int]] = None,
+    replies: int = QUERY_COMMENTS_REPLIES_LIMIT
+) -> List[dict]:
+    """
+    Get page of post's top-level comments ordered by time.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param post_id: Post's identifier
+    :type post_id: int
+    :param limit: Limit of the page
+    :type limit: int
+    :param after: Timestamp and id of the last comment of previous page
+    :type after: Optional[Tuple[datetime, int]]
+    :param replies: Count of the first replies embedded into comments
+    :type replies: int
+    :raise PostNotFoundException: Post not found
+    :return: Comments with counts and the first replies
+    :rtype: List[dict]
+    """
+
+    await get_post_or_exception(conn, post_id=post_id, fields=ID_FIELDS)
+
+    # The first page starts before any comment, so the same index range
+    # scan serves all pages
+    timestamp, comment_id = after or (datetime.min, 0)
+    records = await conn.fetch(
+        QUERY_COMMENTS_PAGE, post_id, timestamp, comment_id, limit, replies
+    )
+
+    page = []
+
+    for record in records:
+        if not page or page[-1]["id"] != record["id"]:
+            page.append(
+                {
+                    "id": record["id"],
+                    "user_id": record["user_id"],
+                    "text": record["text"],
+                    "timestamp": record["timestamp"],
+                    "replies_count": record["replies_count"],
+                    "replies": [],
+                }
+            )
+
+        if record["reply_id"] is not None:
+            page[-1]["replies"].append(
+                {field: record[f"reply_{field}"] for field in REPLY_FIELDS}
+            )
+
+    return page
+
+
+async def get_comments_replies_page(
+    conn: PoolConnectionProxy,
+    *,
+    comment_id: int,
+    limit: int = QUERY_COMMENTS_PAGE_LIMIT,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[Record]:
+    """
+    Get page of comment's replies ordered by time.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param comment_id: Comment's identifier
+    :type comment_id: int
+    :param limit: Limit of the page
+    :type limit: int
+    :param after: Timestamp and id of the last reply of previous page
+    :type after: Optional[Tuple[datetime, int]]
+    :raise CommentNotFoundException: Comment not found
+    :return: Replies
+    :rtype: List[Record]
+    """
+
+    if not await conn.fetchval(
+        select([comments.c.id]).where(comments.c.id == comment_id)
+    ):
+        raise CommentNotFoundException()
+
+    query = select([comments.c[field] for field in REPLY_FIELDS]).where(
+        comments.c.parent_id == comment_id
+    )
+
+    if after is not None:
+        query = query.where(
+            tuple_(comments.c.timestamp, comments.c.id) > tuple_(*after)
+        )
+
+    return await conn.fetch(
+        query.order_by(comments.c.timestamp, comments.c.id).limit(limit)
+    )
+
+
 async def is_post_liked(
     conn: PoolConnectionProxy, *, post_id: int, user_id: int
 ) -> bool:
@@ -223,8 +507,8 @@ async def is_post_liked(
     :rtype: bool
     """
 
-    await get_post_or_exception(conn, post_id=post_id)
-    await get_user_or_exception(conn, user_id=user_id)
+    await get_post_or_exception(conn, post_id=post_id, fields=ID_FIELDS)
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
 
     result = await conn.fetchval(
         select([func.count()]).where(
@@ -283,20 +567,105 @@ async def unlike_post(
         return False
 
     await conn.execute(
-        likes.delete().where(
-            and_(likes.c.post_id == post_id, likes.c.user_id == user_id)
+        """
+        WITH deleted AS (
+            DELETE FROM 
+                "like" 
+            WHERE
+                post_id = $1 AND user_id = $2
+            RETURNING id
         )
+        INSERT INTO 
+            tombstone (entity, entity_id) 
+        SELECT 
+            'like', id 
+        FROM 
+            deleted
+        """,
+        post_id,
+        user_id,
     )
 
     return True
 
 
+async def check_comment_target(
+    conn: PoolConnectionProxy,
+    *,
+    post_id: int,
+    user_id: Optional[int] = None,
+    parent_id: Optional[int] = None
+) -> Optional[int]:
+    """
+    Check that user can comment post or reply to the comment.
+
+    Post and replied comment are checked by one query.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param post_id: Post's identifier
+    :type post_id: int
+    :param user_id: User's identifier, user isn't checked if None
+    :type user_id: Optional[int]
+    :param parent_id: Identifier of replied comment
+    :type parent_id: Optional[int]
+    :raise UserNotFoundException: User not found
+    :raise PostNotFoundException: Post not found
+    :raise CommentNotFoundException: Replied comment not found
+    :return: Identifier of the top-level comment of replied thread
+    :rtype: Optional[int]
+    """
+
+    columns = [posts.c.id]
+    join = posts
+
+    if parent_id is not None:
+        columns += [
+            comments.c.id.label("parent_id"),
+            comments.c.parent_id.label("thread_id"),
+        ]
+        join = posts.outerjoin(
+            comments,
+            and_(comments.c.id == parent_id, comments.c.post_id == posts.c.id),
+        )
+
+    target = await conn.fetchrow(
+        select(columns).select_from(join).where(posts.c.id == post_id)
+    )
+
+    if target is None:
+        raise PostNotFoundException()
+
+    if user_id is not None:
+        await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
+
+    if parent_id is None:
+        return None
+
+    if target.get("parent_id") is None:
+        raise CommentNotFoundException()
+
+    if target.get("thread_id") is not None:
+        return target.get("thread_id")
+
+    return parent_id
+
+
 async def comment_post(
-    conn: PoolConnectionProxy, *, post_id: int, user_id: int, text: str
+    conn: PoolConnectionProxy,
+    *,
+    post_id: int,
+    user_id: int,
+    text: str,
+    parent_id: Optional[int] = None,
+    client_id: Optional[str] = None
 ) -> int:
     """
     Comment post by user.
 
+    Reply to a reply is attached to the top-level comment of the thread.
+    Retry with the same client's id returns already created comment.
+
     :param conn: Pool of connections to database
     :type conn: PoolConnectionProxy
     :param post_id: Post's identifier
@@ -305,31 +674,144 @@ async def comment_post(
     :type user_id: int
     :param text: Comment's text
     :type text: str
+    :param parent_id: Identifier of replied comment
+    :type parent_id: Optional[int]
+    :param client_id: Identifier of comment generated by client
+    :type client_id: Optional[str]
     :raise UserNotFoundException: User not found
     :raise PostNotFoundException: Post not found
+    :raise CommentNotFoundException: Replied comment not found
+    :raise ClientIdConflictException: Client's id belongs to comment of
+        another post or user
     :return: Comment's id
     :rtype: int
     """
 
-    await get_post_or_exception(conn, post_id=post_id)
-    await get_user_or_exception(conn, user_id=user_id)
+    parent_id = await check_comment_target(
+        conn, post_id=post_id, user_id=user_id, parent_id=parent_id
+    )
 
     comment_id = await conn.fetchval(
         """
         INSERT INTO 
-            comment (post_id, user_id, text, timestamp) 
+            comment (post_id, user_id, parent_id, text, timestamp, client_id) 
         VALUES 
-            ($1, $2, $3, NOW()) 
+            ($1, $2, $3, $4, NOW(), $5) 
+        ON CONFLICT (client_id) DO NOTHING
         RETURNING id
         """,
         post_id,
         user_id,
+        parent_id,
         text,
+        client_id,
     )
 
+    if comment_id is None:
+        # Existing comment is returned to its author only
+        comment_id = await conn.fetchval(
+            select([comments.c.id]).where(
+                and_(
+                    comments.c.client_id == client_id,
+                    comments.c.post_id == post_id,
+                    comments.c.user_id == user_id,
+                )
+            )
+        )
+
+        if comment_id is None:
+            raise ClientIdConflictException()
+
     return comment_id
 
 
+async def insert_comments(
+    conn: PoolConnectionProxy, records: List[Tuple[int, int, int, str, str]]
+) -> Dict[str, int]:
+    """
+    Insert many comments at once.
+
+    Comments are copied into staging table and inserted by one query,
+    which skips comments of missing posts, users or replied comments
+    and comments inserted before. Client's ids of comments of another
+    post or user are skipped too.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param records: Post's id, user's id, replied comment's id, text
+        and client's id of each comment
+    :type records: List[Tuple[int, int, int, str, str]]
+    :return: Comment's id by client's id of inserted or existing comments
+    :rtype: Dict[str, int]
+    """
+
+    async with acquire_connection(conn) as connection:
+        async with connection.transaction():
+            await connection.execute(
+                """
+                CREATE TEMPORARY TABLE comment_staging (
+                    post_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    parent_id INTEGER,
+                    text TEXT NOT NULL,
+                    client_id VARCHAR(36) NOT NULL
+                ) ON COMMIT DROP
+                """
+            )
+            await connection.copy_records_to_table(
+                "comment_staging",
+                records=records,
+                columns=COMMENT_STAGING_COLUMNS,
+            )
+            # Rows inserted by CTE aren't visible to the rest of query,
+            # so the second part finds only comments inserted before
+            results = await connection.fetch(
+                """
+                WITH inserted AS (
+                    INSERT INTO
+                        comment (
+                            post_id,
+                            user_id,
+                            parent_id,
+                            text,
+                            timestamp,
+                            client_id
+                        )
+                    SELECT
+                        staging.post_id,
+                        staging.user_id,
+                        COALESCE(parent.parent_id, parent.id),
+                        staging.text,
+                        NOW(),
+                        staging.client_id
+                    FROM
+                        comment_staging AS staging
+                        JOIN post ON post.id = staging.post_id
+                        JOIN "user" ON "user".id = staging.user_id
+                        LEFT JOIN comment AS parent ON
+                            parent.id = staging.parent_id AND
+                            parent.post_id = staging.post_id
+                    WHERE
+                        staging.parent_id IS NULL OR parent.id IS NOT NULL
+                    ON CONFLICT (client_id) DO NOTHING
+                    RETURNING id, client_id
+                )
+                SELECT id, client_id FROM inserted
+                UNION ALL
+                SELECT
+                    comment.id, comment.client_id
+                FROM
+                    comment
+                    JOIN comment_staging AS staging ON
+                        staging.client_id = comment.client_id AND
+                        staging.post_id = comment.post_id AND
+                        staging.user_id = comment.user_id
+                """
+            )
+
+    return {record.get("client_id"): record.get("id") for record in results}
+
+
 async def delete_post_comment(
     conn: PoolConnectionProxy, *, comment_id: int
 ) -> bool:
@@ -344,15 +826,25 @@ async def delete_post_comment(
     :rtype: bool
     """
 
-    result = await conn.fetchval(
+    # Replies are deleted explicitly to leave tombstones for them too
+    result = await conn.fetch(
         """
-        DELETE FROM 
-            comment 
-        WHERE
-            id = $1
-        RETURNING id
+        WITH deleted AS (
+            DELETE FROM 
+                comment 
+            WHERE
+                id = $1 OR parent_id = $1
+            RETURNING id
+        )
+        INSERT INTO 
+            tombstone (entity, entity_id) 
+        SELECT 
+            'comment', id 
+        FROM 
+            deleted
+        RETURNING entity_id
         """,
         comment_id,
     )
 
-    return True if result is not None else False
+    return True if result else False
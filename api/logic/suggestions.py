@@ -0,0 +1,127 @@
+from typing import List
+
+from asyncpg import Record
+from asyncpg.pool import PoolConnectionProxy
+from sqlalchemy.sql import desc, select
+
+from api.db import acquire_connection
+from api.db.schema import user_suggestions
+from api.logic.users import ID_FIELDS, get_user_or_exception
+
+
+QUERY_SUGGESTIONS_LIMIT: int = 20
+
+# Key of advisory lock which lets only one worker update suggestions
+SUGGESTIONS_LOCK: int = 37
+
+# Two-hop candidates are joined and counted by one set-based statement,
+# so the whole graph is processed inside database without round trips
+QUERY_UPDATE_SUGGESTIONS = """
+    WITH candidates AS (
+        SELECT
+            first.from_user AS user_id,
+            second.to_user AS suggested_id,
+            COUNT(*) AS mutual_count
+        FROM
+            followers AS first
+            JOIN followers AS second ON second.from_user = first.to_user
+        WHERE
+            second.to_user <> first.from_user AND
+            NOT EXISTS (
+                SELECT 1
+                FROM followers AS followed
+                WHERE
+                    followed.from_user = first.from_user AND
+                    followed.to_user = second.to_user
+            )
+        GROUP BY
+            first.from_user, second.to_user
+    ),
+    ranked AS (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (
+                PARTITION BY user_id
+                ORDER BY mutual_count DESC, suggested_id
+            ) AS rank
+        FROM
+            candidates
+    )
+    INSERT INTO
+        user_suggestion (user_id, suggested_id, mutual_count)
+    SELECT
+        user_id, suggested_id, mutual_count
+    FROM
+        ranked
+    WHERE
+        rank <= $1
+"""
+
+
+async def update_suggestions(
+    conn: PoolConnectionProxy, *, limit: int = QUERY_SUGGESTIONS_LIMIT
+) -> bool:
+    """
+    Recompute top suggested users for all users.
+
+    Users followed by user's followees are suggested, ranked by count
+    of mutual connections. Update is skipped if another worker is
+    doing it.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param limit: Count of suggestions kept per user
+    :type limit: int
+    :return: Were suggestions updated
+    :rtype: bool
+    """
+
+    async with acquire_connection(conn) as connection:
+        async with connection.transaction():
+            if not await connection.fetchval(
+                "SELECT pg_try_advisory_xact_lock($1)", SUGGESTIONS_LOCK
+            ):
+                return False
+
+            await connection.execute(user_suggestions.delete())
+            await connection.execute(QUERY_UPDATE_SUGGESTIONS, limit)
+
+    return True
+
+
+async def get_users_suggestions(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    limit: int = QUERY_SUGGESTIONS_LIMIT
+) -> List[Record]:
+    """
+    Get users suggested to follow.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_id: User's identifier
+    :type user_id: int
+    :param limit: Limit of the list
+    :type limit: int
+    :raise UserNotFoundException: User not found
+    :return: List of suggested users's id with counts of mutual followees
+    :rtype: List[Record]
+    """
+
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
+
+    return await conn.fetch(
+        select(
+            [
+                user_suggestions.c.suggested_id.label("id"),
+                user_suggestions.c.mutual_count,
+            ]
+        )
+        .where(user_suggestions.c.user_id == user_id)
+        .order_by(
+            desc(user_suggestions.c.mutual_count),
+            user_suggestions.c.suggested_id,
+        )
+        .limit(limit)
+    )
@@ -0,0 +1,149 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from asyncpg import Record
+from asyncpg.pool import PoolConnectionProxy
+from sqlalchemy import Table
+from sqlalchemy.sql import ClauseElement, select, tuple_
+
+from api.db import acquire_connection
+from api.db.schema import comments, likes, posts, tombstones
+
+
+QUERY_SYNC_LIMIT: int = 1000
+
+# Streams of changes in order of the page, deletions come last
+SYNC_TABLES = {
+    "posts": posts,
+    "comments": comments,
+    "likes": likes,
+    "deleted": tombstones,
+}
+
+# Transactions older than xmin of snapshot are finished and visible in
+# it, so rows they write later can't appear behind the watermark
+QUERY_WATERMARK = """
+    SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+"""
+
+
+async def get_changes(
+    conn: PoolConnectionProxy,
+    *,
+    since: Optional[int] = None,
+    watermark: Optional[int] = None,
+    after: Optional[Tuple[int, int, int]] = None,
+    limit: int = QUERY_SYNC_LIMIT
+) -> Dict[str, Any]:
+    """
+    Get page of posts, comments and likes changed since the watermark.
+
+    Changes are ordered by id of transaction, table and row's id. Rows
+    written since the watermark are returned again, so client must apply
+    changes idempotently. Pages of one synchronization keep watermark
+    of the first page, rows changed while they're read are returned by
+    the next synchronization.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param since: Watermark of previous synchronization
+    :type since: Optional[int]
+    :param watermark: Watermark of the first page of synchronization
+    :type watermark: Optional[int]
+    :param after: Transaction's id, index of table and row's id of the
+        last change of previous page
+    :type after: Optional[Tuple[int, int, int]]
+    :param limit: Limit of the page
+    :type limit: int
+    :return: Changed and deleted records with watermark and position of
+        the last change if there are more changes
+    :rtype: Dict[str, Any]
+    """
+
+    async with acquire_connection(conn) as connection:
+        async with connection.transaction(
+            isolation="repeatable_read", readonly=True
+        ):
+            if watermark is None:
+                watermark = await connection.fetchval(QUERY_WATERMARK)
+
+            page = []
+
+            for index, table in enumerate(SYNC_TABLES.values()):
+                query = (
+                    select([table])
+                    .order_by(table.c.xid, table.c.id)
+                    .limit(limit + 1)
+                )
+
+                if since is not None:
+                    query = query.where(table.c.xid >= since)
+
+                if after is not None:
+                    query = query.where(after_position(table, index, after))
+
+                page.extend(
+                    (record["xid"], index, record["id"], record)
+                    for record in await connection.fetch(query)
+                )
+
+    # The first changes of each table are enough to take the first ones
+    # of all tables
+    page.sort(key=lambda change: change[:3])
+
+    names = list(SYNC_TABLES)
+    changes = {name: [] for name in names}
+
+    for _, index, _, record in page[:limit]:
+        changes[names[index]].append(record)
+
+    return {
+        "watermark": watermark,
+        "after": page[limit - 1][:3] if len(page) > limit else None,
+        **changes,
+        "deleted": group_tombstones(changes["deleted"]),
+    }
+
+
+def after_position(
+    table: Table, index: int, after: Tuple[int, int, int]
+) -> ClauseElement:
+    """
+    Make condition of table's changes following the position.
+
+    :param table: Table of changes
+    :type table: Table
+    :param index: Index of the table in `SYNC_TABLES`
+    :type index: int
+    :param after: Transaction's id, index of table and row's id
+    :type after: Tuple[int, int, int]
+    :return: Condition
+    :rtype: ClauseElement
+    """
+
+    xid, after_index, row_id = after
+
+    if index < after_index:
+        return table.c.xid > xid
+
+    if index > after_index:
+        return table.c.xid >= xid
+
+    return tuple_(table.c.xid, table.c.id) > tuple_(xid, row_id)
+
+
+def group_tombstones(records: List[Record]) -> Dict[str, List[int]]:
+    """
+    Group ids of deleted records by entity.
+
+    :param records: Tombstones
+    :type records: List[Record]
+    :return: Ids of deleted records by entity
+    :rtype: Dict[str, List[int]]
+    """
+
+    deleted = {entity: [] for entity in ("post", "comment", "like")}
+
+    for record in records:
+        deleted[record["entity"]].append(record["entity_id"])
+
+    return deleted
@@ -1,21 +1,53 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 from asyncpg import Record
 from asyncpg.pool import PoolConnectionProxy
-from sqlalchemy.sql import and_, desc, func, select
+from sqlalchemy import Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import Select, and_, any_, bindparam, desc, func, select
+from sqlalchemy.sql.schema import Column
 
+from api.db import acquire_connection
 from api.db.schema import followers, posts, users
 from api.utils.exceptions import UserNotFoundException
-from api.utils.hashing import hash_string
+from api.utils.fieldsets import select_columns
+from api.utils.graph import FollowerGraph
+from api.utils.hashing import (
+    PasswordHashPolicy,
+    get_hashing_pool,
+    get_password_policy,
+    make_password_hash,
+    needs_rehash,
+    verify_password_hash,
+)
 
 
 QUERY_USERS_LIMIT: int = 10
 QUERY_USERS_POSTS_LIMIT = 10
 QUERY_FOLLOWERS_LIMIT = 1000
+QUERY_FOLLOWERS_PAGE_LIMIT = 20
+FOLLOW_BULK_LIMIT = 1000
+
+USER_FIELDS = {
+    "id": users.c.id,
+    "username": users.c.username,
+    "name": users.c.name,
+    "description": users.c.description,
+    "email": users.c.email,
+}
+
+# Fields enough to check existence of the record
+ID_FIELDS = ("id",)
+
+# Fields of users in lists of followers and followees
+SUMMARY_FIELDS = ("id", "username", "name")
 
 
 async def get_users(
-    conn: PoolConnectionProxy, *, limit: int = QUERY_USERS_LIMIT
+    conn: PoolConnectionProxy,
+    *,
+    limit: int = QUERY_USERS_LIMIT,
+    fields: Optional[Iterable[str]] = None
 ) -> List[Optional[Record]]:
     """
     Get list of user's objects.
@@ -24,18 +56,16 @@ async def get_users(
     :type conn: PoolConnectionProxy
     :param limit: Limit of the list
     :type limit: int
+    :param fields: Fields to select, all fields if not set
+    :type fields: Optional[Iterable[str]]
+    :raise InvalidFieldsException: Requested field is not allowed
     :return: List of user's objects
     :rtype: List[Optional[Record]]
     """
 
     records = await conn.fetch(
-        select([
-            users.c.id,
-            users.c.username,
-            users.c.name,
-            users.c.description,
-            users.c.email
-        ])
+        select(select_columns(USER_FIELDS, fields))
+        .select_from(users)
         .limit(limit)
     )
 
@@ -43,7 +73,10 @@ async def get_users(
 
 
 async def get_user_or_exception(
-    conn: PoolConnectionProxy, *, user_id: int
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    fields: Optional[Iterable[str]] = None
 ) -> Optional[Record]:
     """
     Find post's object by id.
@@ -52,21 +85,18 @@ async def get_user_or_exception(
     :type conn: PoolConnectionProxy
     :param user_id: User ID
     :type user_id: int
+    :param fields: Fields to select, all fields if not set
+    :type fields: Optional[Iterable[str]]
+    :raise InvalidFieldsException: Requested field is not allowed
     :raise UserNotFoundException: User not found
     :return: User's object
     :rtype: Optional[Record]
     """
 
     user = await conn.fetchrow(
-        select(
-            [
-                users.c.id,
-                users.c.username,
-                users.c.name,
-                users.c.description,
-                users.c.email,
-            ]
-        ).where(users.c.id == user_id)
+        select(select_columns(USER_FIELDS, fields))
+        .select_from(users)
+        .where(users.c.id == user_id)
     )
 
     if user is None:
@@ -103,7 +133,7 @@ async def create_user(
     :rtype: int
     """
 
-    password = hash_password(password=password)
+    password = await hash_password_async(password=password)
 
     user_id = await conn.fetchval(
         """
@@ -123,7 +153,12 @@ async def create_user(
     return user_id
 
 
-async def delete_user(conn: PoolConnectionProxy, *, user_id: int):
+async def delete_user(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    graph: Optional[FollowerGraph] = None
+):
     """
     Delete the user.
 
@@ -131,12 +166,14 @@ async def delete_user(conn: PoolConnectionProxy, *, user_id: int):
     :type conn: PoolConnectionProxy
     :param user_id: User's identifier
     :type user_id: int
+    :param graph: Follower graph to keep current
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: Result of operation
     :rtype: bool
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
 
     result = await conn.fetchval(
         """
@@ -149,6 +186,10 @@ async def delete_user(conn: PoolConnectionProxy, *, user_id: int):
         user_id,
     )
 
+    # Graph which missed unfollows mustn't pass deleted user as existing
+    if graph is not None:
+        graph.remove_user(user_id)
+
     return True if result is not None else False
 
 
@@ -172,11 +213,13 @@ async def get_users_posts(
     :rtype: List[Optional[Record]]
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
 
     join = posts.join(users, posts.c.user_id == users.c.id)
+    # Transaction's id is used by synchronization only
+    columns = [column for column in posts.c if column.name != "xid"]
     records = await conn.fetch(
-        select([posts, users.c.username])
+        select([*columns, users.c.username])
         .select_from(join)
         .where(posts.c.user_id == user_id)
         .order_by(desc(posts.c.timestamp))
@@ -201,7 +244,7 @@ async def get_users_posts_count(
     :rtype: int
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
 
     count = await conn.fetchval(
         select([func.count()]).where(posts.c.user_id == user_id)
@@ -214,10 +257,12 @@ async def get_users_followers(
     conn: PoolConnectionProxy,
     *,
     user_id: int,
-    limit: int = QUERY_FOLLOWERS_LIMIT
+    limit: int = QUERY_FOLLOWERS_LIMIT,
+    after: Optional[int] = None,
+    graph: Optional[FollowerGraph] = None
 ) -> List[Optional[int]]:
     """
-    Get list of user's followers.
+    Get list of user's followers ordered by id.
 
     :param conn: Pool of connections to database
     :type conn: PoolConnectionProxy
@@ -225,24 +270,149 @@ async def get_users_followers(
     :type user_id: int
     :param limit: Limit of the list
     :type limit: int
+    :param after: Id preceding the list
+    :type after: Optional[int]
+    :param graph: Follower graph to use instead of database
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: List of followers's id
     :rtype: List[Optional[int]]
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+
+    if graph is not None:
+        return graph.followers(user_id, limit=limit, after=after)
 
     records = await conn.fetch(
-        select([followers.c.from_user])
-        .where(followers.c.to_user == user_id)
-        .limit(limit)
+        select_follow_page(
+            followers.c.to_user,
+            followers.c.from_user,
+            [followers.c.from_user],
+            user_id=user_id,
+            limit=limit,
+            after=after,
+        )
     )
 
     return list(map(lambda record: record.get("from_user"), records))
 
 
+async def get_users_followers_page(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    limit: int = QUERY_FOLLOWERS_PAGE_LIMIT,
+    after: Optional[int] = None,
+    graph: Optional[FollowerGraph] = None
+) -> List[Record]:
+    """
+    Get page of user's followers ordered by id.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_id: User's identifier
+    :type user_id: int
+    :param limit: Limit of the page
+    :type limit: int
+    :param after: Id of the last user of previous page
+    :type after: Optional[int]
+    :param graph: Follower graph to take ids of the page from
+    :type graph: Optional[FollowerGraph]
+    :raise UserNotFoundException: User not found
+    :return: List of followers
+    :rtype: List[Record]
+    """
+
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+
+    if graph is not None:
+        return await get_users_summaries(
+            conn, graph.followers(user_id, limit=limit, after=after)
+        )
+
+    return await conn.fetch(
+        select_follow_page(
+            followers.c.to_user,
+            followers.c.from_user,
+            select_columns(USER_FIELDS, SUMMARY_FIELDS),
+            user_id=user_id,
+            limit=limit,
+            after=after,
+        ).select_from(
+            followers.join(users, users.c.id == followers.c.from_user)
+        )
+    )
+
+
+async def get_users_summaries(
+    conn: PoolConnectionProxy, user_ids: List[int]
+) -> List[Record]:
+    """
+    Get summaries of users ordered by id by one query.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_ids: Users's identifiers
+    :type user_ids: List[int]
+    :return: List of users
+    :rtype: List[Record]
+    """
+
+    if not user_ids:
+        return []
+
+    return await conn.fetch(
+        select(select_columns(USER_FIELDS, SUMMARY_FIELDS))
+        .where(
+            users.c.id
+            == any_(bindparam("user_ids", user_ids, type_=ARRAY(Integer)))
+        )
+        .order_by(users.c.id)
+    )
+
+
+def select_follow_page(
+    key: Column,
+    other: Column,
+    columns: List[Column],
+    *,
+    user_id: int,
+    limit: int,
+    after: Optional[int] = None
+) -> Select:
+    """
+    Make query of follows page served by range scan of composite index.
+
+    :param key: Column of the user
+    :type key: Column
+    :param other: Column of followers or followees
+    :type other: Column
+    :param columns: Selected columns
+    :type columns: List[Column]
+    :param user_id: User's identifier
+    :type user_id: int
+    :param limit: Limit of the page
+    :type limit: int
+    :param after: Id preceding the page
+    :type after: Optional[int]
+    :return: Query
+    :rtype: Select
+    """
+
+    query = select(columns).where(key == user_id)
+
+    if after is not None:
+        query = query.where(other > after)
+
+    return query.order_by(other).limit(limit)
+
+
 async def get_users_followers_count(
-    conn: PoolConnectionProxy, *, user_id: int
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    graph: Optional[FollowerGraph] = None
 ) -> int:
     """
     Get count of user's followers.
@@ -251,12 +421,17 @@ async def get_users_followers_count(
     :type conn: PoolConnectionProxy
     :param user_id: User's identifier
     :type user_id: int
+    :param graph: Follower graph to use instead of database
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: Count of followers
     :rtype: int
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+
+    if graph is not None:
+        return graph.followers_count(user_id)
 
     count = await conn.fetchval(
         select([func.count()]).where(followers.c.to_user == user_id)
@@ -269,10 +444,12 @@ async def get_users_followees(
     conn: PoolConnectionProxy,
     *,
     user_id: int,
-    limit: int = QUERY_FOLLOWERS_LIMIT
+    limit: int = QUERY_FOLLOWERS_LIMIT,
+    after: Optional[int] = None,
+    graph: Optional[FollowerGraph] = None
 ) -> List[Optional[int]]:
     """
-    Get list of user's followees.
+    Get list of user's followees ordered by id.
 
     :param conn: Pool of connections to database
     :type conn: PoolConnectionProxy
@@ -280,24 +457,86 @@ async def get_users_followees(
     :type user_id: int
     :param limit: Limit of the list
     :type limit: int
+    :param after: Id preceding the list
+    :type after: Optional[int]
+    :param graph: Follower graph to use instead of database
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: List of followees's id
     :rtype: List[Optional[int]]
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+
+    if graph is not None:
+        return graph.followees(user_id, limit=limit, after=after)
 
     records = await conn.fetch(
-        select([followers.c.to_user])
-        .where(followers.c.from_user == user_id)
-        .limit(limit)
+        select_follow_page(
+            followers.c.from_user,
+            followers.c.to_user,
+            [followers.c.to_user],
+            user_id=user_id,
+            limit=limit,
+            after=after,
+        )
     )
 
     return list(map(lambda record: record.get("to_user"), records))
 
 
+async def get_users_followees_page(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    limit: int = QUERY_FOLLOWERS_PAGE_LIMIT,
+    after: Optional[int] = None,
+    graph: Optional[FollowerGraph] = None
+) -> List[Record]:
+    """
+    Get page of user's followees ordered by id.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_id: User's identifier
+    :type user_id: int
+    :param limit: Limit of the page
+    :type limit: int
+    :param after: Id of the last user of previous page
+    :type after: Optional[int]
+    :param graph: Follower graph to take ids of the page from
+    :type graph: Optional[FollowerGraph]
+    :raise UserNotFoundException: User not found
+    :return: List of followees
+    :rtype: List[Record]
+    """
+
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+
+    if graph is not None:
+        return await get_users_summaries(
+            conn, graph.followees(user_id, limit=limit, after=after)
+        )
+
+    return await conn.fetch(
+        select_follow_page(
+            followers.c.from_user,
+            followers.c.to_user,
+            select_columns(USER_FIELDS, SUMMARY_FIELDS),
+            user_id=user_id,
+            limit=limit,
+            after=after,
+        ).select_from(
+            followers.join(users, users.c.id == followers.c.to_user)
+        )
+    )
+
+
 async def get_users_followees_count(
-    conn: PoolConnectionProxy, *, user_id: int
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    graph: Optional[FollowerGraph] = None
 ) -> int:
     """
     Get count of user's followees.
@@ -306,12 +545,17 @@ async def get_users_followees_count(
     :type conn: PoolConnectionProxy
     :param user_id: User's identifier
     :type user_id: int
+    :param graph: Follower graph to use instead of database
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: Count of followees
     :rtype: int
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+
+    if graph is not None:
+        return graph.followees_count(user_id)
 
     count = await conn.fetchval(
         select([func.count()]).where(followers.c.from_user == user_id)
@@ -321,7 +565,11 @@ async def get_users_followees_count(
 
 
 async def follow_user(
-    conn: PoolConnectionProxy, *, user_id: int, follower_id: int
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    follower_id: int,
+    graph: Optional[FollowerGraph] = None
 ) -> bool:
     """
     Follow the user by another user.
@@ -332,23 +580,35 @@ async def follow_user(
     :type user_id: int
     :param follower_id: User whom follow
     :type follower_id: int
+    :param graph: Follower graph to keep current
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: Result of operation
     :rtype: bool
     """
 
-    if await is_follow_user(conn, user_id=user_id, follower_id=follower_id):
-        return False
-
-    await conn.execute(
-        followers.insert().values(from_user=user_id, to_user=follower_id)
+    # Graph may be stale, so database is the source of truth for writes
+    followed = await is_follow_user(
+        conn, user_id=user_id, follower_id=follower_id
     )
 
-    return True
+    if not followed:
+        await conn.execute(
+            followers.insert().values(from_user=user_id, to_user=follower_id)
+        )
+
+    if graph is not None:
+        graph.add(user_id, follower_id)
+
+    return not followed
 
 
 async def unfollow_user(
-    conn: PoolConnectionProxy, *, user_id: int, follower_id: int
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    follower_id: int,
+    graph: Optional[FollowerGraph] = None
 ) -> bool:
     """
     Unfollow the user from another user.
@@ -359,30 +619,174 @@ async def unfollow_user(
     :type user_id: int
     :param follower_id: User whom unfollow
     :type follower_id: int
+    :param graph: Follower graph to keep current
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: Result of operation
     :rtype: bool
     """
 
-    if not await is_follow_user(
+    followed = await is_follow_user(
         conn, user_id=user_id, follower_id=follower_id
-    ):
-        return False
+    )
 
-    await conn.execute(
-        followers.delete().where(
-            and_(
-                followers.c.from_user == user_id,
-                followers.c.to_user == follower_id,
+    if followed:
+        await conn.execute(
+            followers.delete().where(
+                and_(
+                    followers.c.from_user == user_id,
+                    followers.c.to_user == follower_id,
+                )
             )
         )
+
+    if graph is not None:
+        graph.remove(user_id, follower_id)
+
+    return followed
+
+
+async def follow_users(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    followee_ids: Iterable[int],
+    graph: Optional[FollowerGraph] = None
+) -> List[int]:
+    """
+    Follow many users at once.
+
+    Users are validated by one query, edges are copied into staging
+    table and merged skipping already existing ones.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_id: User who follow
+    :type user_id: int
+    :param followee_ids: Users whom follow
+    :type followee_ids: Iterable[int]
+    :param graph: Follower graph to keep current
+    :type graph: Optional[FollowerGraph]
+    :raise UserNotFoundException: Any of users not found
+    :return: List of newly followed users's id
+    :rtype: List[int]
+    """
+
+    followee_ids = sorted(set(followee_ids))
+
+    async with acquire_connection(conn) as connection:
+        await check_users_exist(connection, [user_id, *followee_ids])
+
+        async with connection.transaction():
+            await connection.execute(
+                """
+                CREATE TEMPORARY TABLE followers_staging (
+                    from_user INTEGER NOT NULL,
+                    to_user INTEGER NOT NULL
+                ) ON COMMIT DROP
+                """
+            )
+            await connection.copy_records_to_table(
+                "followers_staging",
+                records=[(user_id, followee) for followee in followee_ids],
+                columns=("from_user", "to_user"),
+            )
+            records = await connection.fetch(
+                """
+                INSERT INTO
+                    followers (from_user, to_user)
+                SELECT
+                    from_user, to_user
+                FROM
+                    followers_staging
+                ON CONFLICT (from_user, to_user) DO NOTHING
+                RETURNING to_user
+                """
+            )
+
+    if graph is not None:
+        for followee_id in followee_ids:
+            graph.add(user_id, followee_id)
+
+    return sorted(record.get("to_user") for record in records)
+
+
+async def unfollow_users(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    followee_ids: Iterable[int],
+    graph: Optional[FollowerGraph] = None
+) -> List[int]:
+    """
+    Unfollow many users at once.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_id: User who unfollow
+    :type user_id: int
+    :param followee_ids: Users whom unfollow
+    :type followee_ids: Iterable[int]
+    :param graph: Follower graph to keep current
+    :type graph: Optional[FollowerGraph]
+    :raise UserNotFoundException: Any of users not found
+    :return: List of unfollowed users's id
+    :rtype: List[int]
+    """
+
+    followee_ids = sorted(set(followee_ids))
+
+    await check_users_exist(conn, [user_id, *followee_ids])
+
+    records = await conn.fetch(
+        """
+        DELETE FROM
+            followers
+        WHERE
+            from_user = $1 AND to_user = ANY($2::integer[])
+        RETURNING to_user
+        """,
+        user_id,
+        followee_ids,
+    )
+
+    if graph is not None:
+        for followee_id in followee_ids:
+            graph.remove(user_id, followee_id)
+
+    return sorted(record.get("to_user") for record in records)
+
+
+async def check_users_exist(
+    conn: PoolConnectionProxy, user_ids: Iterable[int]
+) -> None:
+    """
+    Check existence of many users by one query.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_ids: Users's identifiers
+    :type user_ids: Iterable[int]
+    :raise UserNotFoundException: Any of users not found
+    """
+
+    user_ids = set(user_ids)
+
+    count = await conn.fetchval(
+        'SELECT COUNT(*) FROM "user" WHERE id = ANY($1::integer[])',
+        list(user_ids),
     )
 
-    return True
+    if count != len(user_ids):
+        raise UserNotFoundException()
 
 
 async def is_follow_user(
-    conn: PoolConnectionProxy, *, user_id: int, follower_id: int
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    follower_id: int,
+    graph: Optional[FollowerGraph] = None
 ) -> bool:
     """
     Check is post liked by user.
@@ -393,13 +797,18 @@ async def is_follow_user(
     :type user_id: int
     :param follower_id: User whom follow
     :type follower_id: int
+    :param graph: Follower graph to use instead of database
+    :type graph: Optional[FollowerGraph]
     :raise UserNotFoundException: User not found
     :return: Is user followed by another user
     :rtype: bool
     """
 
-    await get_user_or_exception(conn, user_id=user_id)
-    await get_user_or_exception(conn, user_id=follower_id)
+    await check_user_exists(conn, user_id=user_id, graph=graph)
+    await check_user_exists(conn, user_id=follower_id, graph=graph)
+
+    if graph is not None:
+        return graph.is_following(user_id, follower_id)
 
     result = await conn.fetchval(
         select([func.count()]).where(
@@ -413,17 +822,45 @@ async def is_follow_user(
     return bool(result)
 
 
-def hash_password(password: str) -> str:
+async def check_user_exists(
+    conn: PoolConnectionProxy,
+    *,
+    user_id: int,
+    graph: Optional[FollowerGraph] = None
+) -> None:
+    """
+    Check existence of the user, users known by graph aren't queried.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param user_id: User's identifier
+    :type user_id: int
+    :param graph: Follower graph
+    :type graph: Optional[FollowerGraph]
+    :raise UserNotFoundException: User not found
+    """
+
+    if graph is not None and graph.is_known(user_id):
+        return
+
+    await get_user_or_exception(conn, user_id=user_id, fields=ID_FIELDS)
+
+
+def hash_password(
+    password: str, policy: Optional[PasswordHashPolicy] = None
+) -> str:
     """
     Hash user's password.
 
     :param password: User's password
     :type password: str
-    :return: Salt and hash of password
+    :param policy: Algorithm and cost, current policy if not set
+    :type policy: Optional[PasswordHashPolicy]
+    :return: Self-describing hash of password
     :rtype: str
     """
 
-    return hash_string(password)
+    return make_password_hash(password, policy)
 
 
 def check_password(password: str, hash_: str) -> bool:
@@ -432,13 +869,78 @@ def check_password(password: str, hash_: str) -> bool:
 
     :param password: Password to check
     :type password: str
-    :param hash_: Salt and hash of user's password
+    :param hash_: Hash of user's password in any supported format
+    :type hash_: str
+    :return: Result of comparison
+    :rtype: bool
+    """
+
+    return verify_password_hash(password, hash_)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash user's password in hashing pool not to block event loop.
+
+    :param password: User's password
+    :type password: str
+    :return: Self-describing hash of password
+    :rtype: str
+    """
+
+    # Policy is passed explicitly as process workers don't share it
+    return await get_hashing_pool().run(
+        hash_password, password, get_password_policy()
+    )
+
+
+async def check_password_async(password: str, hash_: str) -> bool:
+    """
+    Check user's password in hashing pool not to block event loop.
+
+    :param password: Password to check
+    :type password: str
+    :param hash_: Hash of user's password in any supported format
     :type hash_: str
     :return: Result of comparison
     :rtype: bool
     """
 
-    salt = hash_[:64]  # Getting salt from password's hash
-    hashed_password = hash_string(password, salt=salt.encode("ascii"))
+    return await get_hashing_pool().run(check_password, password, hash_)
+
+
+async def authenticate_user(
+    conn: PoolConnectionProxy, *, username: str, password: str
+) -> Optional[int]:
+    """
+    Check user's credentials and rehash password weaker than policy.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :param username: User's username
+    :type username: str
+    :param password: User's password
+    :type password: str
+    :return: User's id or None if credentials are wrong
+    :rtype: Optional[int]
+    """
+
+    user = await conn.fetchrow(
+        select([users.c.id, users.c.password_hash]).where(
+            users.c.username == username
+        )
+    )
+
+    if user is None or not await check_password_async(
+        password, user.get("password_hash")
+    ):
+        return None
+
+    if needs_rehash(user.get("password_hash")):
+        await conn.execute(
+            users.update()
+            .where(users.c.id == user.get("id"))
+            .values(password_hash=await hash_password_async(password))
+        )
 
-    return hash_ == hashed_password
+    return user.get("id")
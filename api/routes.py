@@ -1,6 +1,19 @@
 from aiohttp import web
 
-from api.views.users import User, UserList
+from api.views.auth import Login, Logout
+from api.views.batch import Batch
+from api.views.debug import Profile
+from api.views.metrics import Metrics
+from api.views.posts import CommentReplies, Post, PostComments, PostList
+from api.views.stats import Stats
+from api.views.sync import Sync
+from api.views.users import (
+    User,
+    UserFollowees,
+    UserFollowers,
+    UserList,
+    UserSuggestions,
+)
 
 
 def setup_routes(app: web.Application) -> None:
@@ -13,13 +26,28 @@ def setup_routes(app: web.Application) -> None:
 
     router = app.router
 
-    """router.add_get("/", hello, name="hello_world")
+    """router.add_get("/", hello, name="hello_world")"""
 
     router.add_view("/posts", PostList)
     router.add_view("/posts/{post_id:\d+}", Post)
     router.add_get("/posts/{post_id:\d+}/likes_count", Post.likes_count)
     router.add_get("/posts/{post_id:\d+}/comments_count", Post.comments_count)
-    router.add_get("/posts/{post_id:\d+}/comments", Post.comments)"""
+    router.add_view("/posts/{post_id:\d+}/comments", PostComments)
+    router.add_view("/comments/{comment_id:\d+}/replies", CommentReplies)
 
     router.add_view("/users", UserList)
     router.add_view("/users/{user_id:\d+}", User)
+    router.add_view("/users/{user_id:\d+}/followers", UserFollowers)
+    router.add_view("/users/{user_id:\d+}/followees", UserFollowees)
+    router.add_view("/users/{user_id:\d+}/suggestions", UserSuggestions)
+
+    router.add_view("/batch", Batch)
+
+    router.add_view("/sync", Sync)
+
+    router.add_view("/login", Login)
+    router.add_view("/logout", Logout)
+
+    router.add_view("/stats", Stats)
+    router.add_view("/metrics", Metrics)
+    router.add_view("/debug/profile", Profile)
@@ -1,6 +1,9 @@
+import asyncio
 import datetime
 import pytest
 
+from asyncpg.exceptions import UndefinedTableError
+
 from api.logic.posts import (
     get_posts,
     get_post_or_exception,
@@ -9,13 +12,27 @@ from api.logic.posts import (
     like_post,
     unlike_post,
     get_posts_likes_count,
+    check_comment_target,
     get_posts_comments_count,
     comment_post,
     delete_post_comment,
     get_posts_comments,
+    get_posts_comments_page,
+    get_many_posts_comments_count,
+    get_many_posts_likes_count,
+    get_comments_replies_page,
+    insert_comments,
 )
 from api.tests.setup import client, create_users, database
-from api.utils.exceptions import PostNotFoundException, UserNotFoundException
+from api.utils.exceptions import (
+    ClientIdConflictException,
+    CommentNotFoundException,
+    InvalidFieldsException,
+    PostNotFoundException,
+    ServiceUnavailableException,
+    UserNotFoundException,
+)
+from api.utils.ingestion import CommentQueue
 
 
 async def test_post_creating(client, database) -> None:
@@ -81,6 +98,32 @@ async def test_post_getting(client, database) -> None:
         assert await get_posts(conn, limit=3) == posts[:3]
 
 
+async def test_post_fields(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id = await create_post(
+            conn, user_id=user_id, text="Test post", image="Base64 image"
+        )
+
+        post = await get_post_or_exception(
+            conn, post_id=post_id, fields=("id", "username")
+        )
+
+        assert dict(post) == {"id": post_id, "username": "Test user 1"}
+
+        posts = await get_posts(conn, fields=("text", "timestamp"))
+
+        assert list(posts[0].keys()) == ["text", "timestamp"]
+
+        with pytest.raises(InvalidFieldsException):
+            await get_posts(conn, fields=("id", "password_hash"))
+
+        with pytest.raises(InvalidFieldsException):
+            await get_post_or_exception(conn, post_id=post_id, fields=())
+
+
 async def test_post_deleting(client, database) -> None:
     """"""
 
@@ -220,3 +263,317 @@ async def test_post_comments(client, database) -> None:
         assert await get_posts_comments_count(conn, post_id=post_id) == 3
 
         assert len(await get_posts_comments(conn, post_id=post_id)) == 3
+
+
+async def test_post_comments_threading(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id, other_post_id = [
+            await create_post(conn, user_id=user_id, text="Test", image="")
+            for _ in range(2)
+        ]
+
+        with pytest.raises(PostNotFoundException):
+            await get_posts_comments_page(conn, post_id=100)
+
+        with pytest.raises(CommentNotFoundException):
+            await get_comments_replies_page(conn, comment_id=100)
+
+        threads = [
+            await comment_post(
+                conn, post_id=post_id, user_id=user_id, text=f"Thread {i}"
+            )
+            for i in range(3)
+        ]
+        replies = [
+            await comment_post(
+                conn,
+                post_id=post_id,
+                user_id=user_id,
+                text=f"Reply {i}",
+                parent_id=threads[0],
+            )
+            for i in range(4)
+        ]
+
+        with pytest.raises(CommentNotFoundException):
+            await comment_post(
+                conn,
+                post_id=other_post_id,
+                user_id=user_id,
+                text="",
+                parent_id=threads[0],
+            )
+
+        # reply to reply joins the thread
+        replies.append(
+            await comment_post(
+                conn,
+                post_id=post_id,
+                user_id=user_id,
+                text="Reply 4",
+                parent_id=replies[0],
+            )
+        )
+
+        # queued comments are checked without their verified users
+        assert await check_comment_target(
+            conn, post_id=post_id, parent_id=replies[0]
+        ) == threads[0]
+
+        with pytest.raises(CommentNotFoundException):
+            await check_comment_target(
+                conn, post_id=other_post_id, parent_id=threads[0]
+            )
+
+        with pytest.raises(PostNotFoundException):
+            await check_comment_target(
+                conn, post_id=100, parent_id=threads[0]
+            )
+
+        page = await get_posts_comments_page(
+            conn, post_id=post_id, limit=2, replies=2
+        )
+
+        assert [comment["id"] for comment in page] == threads[:2]
+        assert page[0]["replies_count"] == 5
+        assert [reply["id"] for reply in page[0]["replies"]] == replies[:2]
+        assert page[1]["replies_count"] == 0
+        assert page[1]["replies"] == []
+
+        page = await get_posts_comments_page(
+            conn,
+            post_id=post_id,
+            after=(page[-1]["timestamp"], page[-1]["id"]),
+        )
+
+        assert [comment["id"] for comment in page] == threads[2:]
+
+        page = await get_comments_replies_page(
+            conn, comment_id=threads[0], limit=2
+        )
+
+        assert [reply["id"] for reply in page] == replies[:2]
+
+        page = await get_comments_replies_page(
+            conn,
+            comment_id=threads[0],
+            after=(page[-1]["timestamp"], page[-1]["id"]),
+        )
+
+        assert [reply["id"] for reply in page] == replies[2:]
+
+        assert await delete_post_comment(conn, comment_id=threads[0])
+        assert await get_posts_comments_count(conn, post_id=post_id) == 2
+
+
+async def test_many_posts_counting(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        users = await create_users(conn, 2)
+        post_ids = [
+            await create_post(conn, user_id=users[0], text="Test", image="")
+            for _ in range(3)
+        ]
+
+        for user_id in users:
+            await like_post(conn, post_id=post_ids[0], user_id=user_id)
+
+        await like_post(conn, post_id=post_ids[1], user_id=users[0])
+        await comment_post(
+            conn, post_id=post_ids[2], user_id=users[1], text="Test"
+        )
+
+        assert await get_many_posts_likes_count(
+            conn, post_ids=[*post_ids, 100]
+        ) == {post_ids[0]: 2, post_ids[1]: 1, post_ids[2]: 0}
+        assert await get_many_posts_comments_count(
+            conn, post_ids=post_ids
+        ) == {post_ids[0]: 0, post_ids[1]: 0, post_ids[2]: 1}
+        assert await get_many_posts_likes_count(conn, post_ids=[]) == {}
+
+
+async def test_comments_inserting(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"].acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id, other_post_id = [
+            await create_post(conn, user_id=user_id, text="Test", image="")
+            for _ in range(2)
+        ]
+        thread_id = await comment_post(
+            conn, post_id=post_id, user_id=user_id, text="Thread"
+        )
+        reply_id = await comment_post(
+            conn,
+            post_id=post_id,
+            user_id=user_id,
+            text="Reply",
+            parent_id=thread_id,
+            client_id="reply",
+        )
+
+        # retry returns already created comment
+        assert (
+            await comment_post(
+                conn,
+                post_id=post_id,
+                user_id=user_id,
+                text="Reply",
+                parent_id=thread_id,
+                client_id="reply",
+            )
+            == reply_id
+        )
+
+        # client's id of another post isn't reused
+        with pytest.raises(ClientIdConflictException):
+            await comment_post(
+                conn,
+                post_id=other_post_id,
+                user_id=user_id,
+                text="Reply",
+                client_id="reply",
+            )
+
+        comment_ids = await insert_comments(
+            conn,
+            [
+                (post_id, user_id, None, "First", "first"),
+                (post_id, user_id, reply_id, "Second", "second"),
+                (post_id, user_id, None, "Retry", "reply"),
+                (post_id, 100, None, "Missing user", "user"),
+                (100, user_id, None, "Missing post", "post"),
+                (other_post_id, user_id, thread_id, "Other post", "other"),
+            ],
+        )
+
+        assert set(comment_ids) == {"first", "second", "reply"}
+        assert comment_ids["reply"] == reply_id
+        assert await get_posts_comments_count(conn, post_id=post_id) == 4
+
+        page = await get_comments_replies_page(conn, comment_id=thread_id)
+
+        # reply to reply joins the thread
+        assert [reply["id"] for reply in page] == [
+            reply_id,
+            comment_ids["second"],
+        ]
+        assert await insert_comments(conn, []) == {}
+        assert (
+            await insert_comments(
+                conn, [(other_post_id, user_id, None, "Conflict", "reply")]
+            )
+            == {}
+        )
+
+
+async def test_comments_queueing(client, database) -> None:
+    """"""
+
+    pool = client.server.app["db"]
+
+    async with pool.acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id = await create_post(
+            conn, user_id=user_id, text="Test", image=""
+        )
+
+    queue = CommentQueue(maxsize=2, batch_size=2, interval=0.01, durable=True)
+    await queue.start(pool)
+
+    first = queue.submit((post_id, user_id, None, "First", "first"))
+    second = queue.submit((100, user_id, None, "Missing post", "post"))
+
+    with pytest.raises(ServiceUnavailableException):
+        queue.submit((post_id, user_id, None, "Third", "third"))
+
+    assert isinstance(await first, int)
+    assert await second is None
+
+    # comments left in queue are written on close
+    queue.submit((post_id, user_id, None, "Last", "last"))
+    await queue.close()
+
+    async with pool.acquire() as conn:
+        assert await get_posts_comments_count(conn, post_id=post_id) == 2
+
+    assert queue.stats() == {
+        "size": 0,
+        "maxsize": 2,
+        "flushed": 2,
+        "rejected": 1,
+        "dropped": 1,
+        "retried": 0,
+    }
+
+    queue = CommentQueue(
+        maxsize=2,
+        batch_size=2,
+        interval=0.01,
+        flush_attempts=2,
+        flush_retry_interval=0.0,
+    )
+    await queue.start(pool)
+
+    # broken comment is written again and dropped when attempts run out
+    queue.submit((post_id, user_id, None, "Broken\x00", "broken"))
+    await asyncio.sleep(0.1)
+    queue.submit((post_id, user_id, None, "Next", "next"))
+    await queue.close()
+
+    assert queue.stats() == {
+        "size": 0,
+        "maxsize": 2,
+        "flushed": 1,
+        "rejected": 0,
+        "dropped": 1,
+        "retried": 1,
+    }
+
+
+async def test_slow_queries_logging(client, database) -> None:
+    """"""
+
+    pool = client.server.app["db"]
+    slow_log = pool.slow_log
+
+    async with pool.acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        slow_log.threshold, slow_log.explain_rate = 0.0, 1.0
+
+        try:
+            post_id = await create_post(
+                conn, user_id=user_id, text="Secret", image=""
+            )
+            await like_post(conn, post_id=post_id, user_id=user_id)
+            await slow_log.wait()
+
+            slow_log.check(
+                "test", 1.0, 'DELETE FROM "like" WHERE post_id = $1', [post_id]
+            )
+            await slow_log.wait()
+
+            # failed queries aren't logged
+            with pytest.raises(UndefinedTableError):
+                await conn.fetchval("SELECT * FROM missing")
+        finally:
+            slow_log.threshold = None
+
+        entries = [
+            entry
+            for entry in slow_log.recent
+            if entry["function"] == "logic.posts.like_post"
+        ]
+
+        assert entries
+        assert "Secret" not in str(list(slow_log.recent))
+        assert "missing" not in str(list(slow_log.recent))
+        # the first slow query is explained, writes aren't executed again
+        assert "Actual Rows" in slow_log.recent[0]["plan"][0]["Plan"]
+        assert "Actual Rows" not in slow_log.recent[-1]["plan"][0]["Plan"]
+        assert await get_posts_likes_count(conn, post_id=post_id) == 1
@@ -0,0 +1,43 @@
+import pytest
+
+from api.logic.suggestions import get_users_suggestions, update_suggestions
+from api.logic.users import follow_users
+from api.tests.setup import client, create_users, database
+from api.utils.exceptions import UserNotFoundException
+
+
+async def test_suggestions_updating(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        with pytest.raises(UserNotFoundException):
+            await get_users_suggestions(conn, user_id=1)
+
+        users = await create_users(conn, 5)
+
+        assert await get_users_suggestions(conn, user_id=users[0]) == []
+
+        for user_id, followee_ids in (
+            (users[0], [users[1], users[2]]),
+            (users[1], [users[3], users[4]]),
+            (users[2], [users[3], users[0]]),
+        ):
+            await follow_users(
+                conn, user_id=user_id, followee_ids=followee_ids
+            )
+
+        assert await update_suggestions(conn)
+
+        suggestions = await get_users_suggestions(conn, user_id=users[0])
+
+        assert list(map(dict, suggestions)) == [
+            {"id": users[3], "mutual_count": 2},
+            {"id": users[4], "mutual_count": 1},
+        ]
+        assert list(
+            map(dict, await get_users_suggestions(conn, user_id=users[2]))
+        ) == [{"id": users[1], "mutual_count": 1}]
+
+        await update_suggestions(conn, limit=1)
+
+        assert len(await get_users_suggestions(conn, user_id=users[0])) == 1
@@ -0,0 +1,128 @@
+from api.logic.posts import (
+    comment_post,
+    create_post,
+    delete_post,
+    delete_post_comment,
+    like_post,
+    unlike_post,
+)
+from api.logic.sync import get_changes
+from api.tests.setup import client, create_users, database
+
+
+async def test_changes_getting(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        user_id = (await create_users(conn, 1))[0]
+
+        changes = await get_changes(conn)
+
+        assert changes["posts"] == []
+        assert changes["deleted"] == {"post": [], "comment": [], "like": []}
+
+        post_id = await create_post(
+            conn, user_id=user_id, text="Test", image="Test"
+        )
+        await like_post(conn, post_id=post_id, user_id=user_id)
+
+        changes = await get_changes(conn)
+        watermark = changes["watermark"]
+
+        assert [post.get("id") for post in changes["posts"]] == [post_id]
+        assert len(changes["likes"]) == 1
+
+        comment_id = await comment_post(
+            conn, post_id=post_id, user_id=user_id, text="Test comment"
+        )
+        await unlike_post(conn, post_id=post_id, user_id=user_id)
+
+        changes = await get_changes(conn, since=watermark)
+
+        assert [comment.get("id") for comment in changes["comments"]] == [
+            comment_id
+        ]
+        assert changes["likes"] == []
+        assert len(changes["deleted"]["like"]) == 1
+        assert changes["watermark"] >= watermark
+
+        watermark = changes["watermark"]
+
+        await delete_post_comment(conn, comment_id=comment_id)
+        another_post_id = await create_post(
+            conn, user_id=user_id, text="Test", image="Test"
+        )
+        await delete_post(conn, post_id=another_post_id)
+
+        changes = await get_changes(conn, since=watermark)
+
+        assert changes["comments"] == []
+        assert changes["deleted"]["comment"] == [comment_id]
+        assert changes["deleted"]["post"] == [another_post_id]
+
+
+async def test_changes_paging(client, database) -> None:
+    """"""
+
+    pool = client.server.app["db"]
+
+    async with pool.acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_ids = [
+            await create_post(conn, user_id=user_id, text="Test", image="")
+            for _ in range(3)
+        ]
+
+        async with conn.transaction():
+            for post_id in post_ids:
+                await like_post(conn, post_id=post_id, user_id=user_id)
+
+        deleted_id = await create_post(
+            conn, user_id=user_id, text="Test", image=""
+        )
+        await delete_post(conn, post_id=deleted_id)
+
+        changes = await get_changes(conn, limit=2)
+        watermark = changes["watermark"]
+        pages = [changes]
+
+        while changes["after"] is not None:
+            changes = await get_changes(
+                conn, watermark=watermark, after=changes["after"], limit=2
+            )
+            pages.append(changes)
+
+            assert changes["watermark"] == watermark
+
+    assert len(pages) == 4
+    assert [
+        post.get("id") for page in pages for post in page["posts"]
+    ] == post_ids
+    # likes written by one transaction are split between pages
+    assert [len(page["likes"]) for page in pages] == [0, 1, 2, 0]
+    assert pages[-1]["deleted"]["post"] == [deleted_id]
+
+
+async def test_changes_of_running_transactions(client, database) -> None:
+    """"""
+
+    pool = client.server.app["db"]
+
+    async with pool.acquire() as conn, pool.acquire() as other:
+        user_id = (await create_users(conn, 1))[0]
+
+        # transaction started before watermark writes after it
+        transaction = other.transaction()
+        await transaction.start()
+        await other.fetchval("SELECT 1")
+
+        watermark = (await get_changes(conn))["watermark"]
+
+        post_id = await create_post(
+            other, user_id=user_id, text="Test", image=""
+        )
+        await transaction.commit()
+
+        changes = await get_changes(conn, since=watermark)
+
+        assert [post.get("id") for post in changes["posts"]] == [post_id]
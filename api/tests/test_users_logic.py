@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 
 from api.logic.posts import create_post, get_post_or_exception
@@ -12,13 +13,29 @@ from api.logic.users import (
     get_users_followers_count,
     get_users_followees,
     get_users_followees_count,
+    get_users_followers_page,
+    get_users_followees_page,
     follow_user,
+    follow_users,
     unfollow_user,
+    unfollow_users,
+    is_follow_user,
+    authenticate_user,
     hash_password,
-    check_password
+    hash_password_async,
+    check_password,
+    check_password_async,
 )
-from api.tests.setup import client, database
-from api.utils.exceptions import UserNotFoundException
+from api.tests.setup import client, create_users, database
+from api.db.schema import users as users_table
+from api.utils.exceptions import InvalidFieldsException, UserNotFoundException
+from api.utils.graph import (
+    FollowerGraph,
+    close_follower_graph_listener,
+    load_follower_graph,
+    refresh_follower_graph,
+)
+from api.utils.hashing import hash_string, parse_password_hash
 
 
 async def test_user_creating(client, database) -> None:
@@ -80,6 +97,34 @@ async def test_user_getting(client, database) -> None:
         assert await get_users(conn, limit=3) == users[:3]
 
 
+async def test_user_fields(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+
+        user_id = await create_user(
+            conn,
+            username="Test username",
+            name="Test name",
+            email="test@user.email",
+            password="Test password",
+            description="Test description"
+        )
+
+        user = await get_user_or_exception(
+            conn, user_id=user_id, fields=("username", "name")
+        )
+
+        assert dict(user) == {"username": "Test username", "name": "Test name"}
+
+        users = await get_users(conn, fields=("id",))
+
+        assert [dict(user) for user in users] == [{"id": user_id}]
+
+        with pytest.raises(InvalidFieldsException):
+            await get_users(conn, fields=("password_hash",))
+
+
 async def test_user_deleting(client, database) -> None:
     """"""
 
@@ -216,6 +261,218 @@ async def test_user_following(client, database) -> None:
                 )
 
 
+async def test_user_following_by_graph(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        graph = FollowerGraph()
+
+        with pytest.raises(UserNotFoundException):
+            await get_users_followers(conn, user_id=1, graph=graph)
+
+        users = []
+
+        for i in range(4):
+            users.append(await create_user(
+                conn,
+                username=f"Test username {i}",
+                name=f"Test name {i}",
+                email=f"test-{i}@user.email",
+                password=f"Test password {i}",
+                description=f"Test description {i}"
+            ))
+
+        for follower in users[1:]:
+            assert await follow_user(
+                conn, user_id=follower, follower_id=users[0], graph=graph
+            )
+
+        # graph follows writes and matches database
+        assert len(graph) == 3
+        assert len(await load_follower_graph(conn)) == 3
+
+        assert await get_users_followers(
+            conn, user_id=users[0], graph=graph
+        ) == users[1:]
+        assert await get_users_followers(
+            conn, user_id=users[0], graph=graph, limit=2
+        ) == users[1:3]
+        assert await get_users_followers_count(
+            conn, user_id=users[0], graph=graph
+        ) == 3
+        assert await get_users_followees(
+            conn, user_id=users[1], graph=graph
+        ) == [users[0]]
+        assert [
+            record["id"]
+            for record in await get_users_followers_page(
+                conn, user_id=users[0], graph=graph, limit=2, after=users[1]
+            )
+        ] == users[2:]
+        assert await get_users_followees_page(
+            conn, user_id=users[1], graph=graph
+        ) == await get_users_followees_page(conn, user_id=users[1])
+        assert await get_users_followees_count(
+            conn, user_id=users[0], graph=graph
+        ) == 0
+        assert await is_follow_user(
+            conn, user_id=users[1], follower_id=users[0], graph=graph
+        )
+
+        assert await unfollow_user(
+            conn, user_id=users[1], follower_id=users[0], graph=graph
+        )
+        assert not await is_follow_user(
+            conn, user_id=users[1], follower_id=users[0], graph=graph
+        )
+        assert graph.followers(users[0], after=users[2]) == [users[3]]
+
+        # graph is only used for reads, so stale edge doesn't break writes
+        graph.add(users[1], users[2])
+
+        assert await follow_user(
+            conn, user_id=users[1], follower_id=users[2], graph=graph
+        )
+        assert await get_users_followees(
+            conn, user_id=users[1]
+        ) == [users[2]]
+
+        # deleted user isn't known by graph which missed its unfollows
+        await unfollow_user(conn, user_id=users[3], follower_id=users[0])
+        await delete_user(conn, user_id=users[3], graph=graph)
+
+        with pytest.raises(UserNotFoundException):
+            await get_users_followees_count(
+                conn, user_id=users[3], graph=graph
+            )
+
+
+async def test_follower_graph_refreshing(client, database) -> None:
+    """"""
+
+    app = client.server.app
+    app["follower_graph"] = FollowerGraph()
+
+    async with app["db"].acquire() as conn:
+        users = await create_users(conn, 3)
+        await follow_user(conn, user_id=users[1], follower_id=users[0])
+
+        refresh = asyncio.ensure_future(refresh_follower_graph(app))
+        await asyncio.sleep(0)
+
+        # follow is committed after graph is loaded
+        async with conn.transaction():
+            await follow_user(
+                conn,
+                user_id=users[2],
+                follower_id=users[0],
+                graph=app["follower_graph"],
+            )
+            await refresh
+
+    assert app["follower_graph"].followers(users[0]) == users[1:]
+
+    # writes of other workers reach graph by notifications
+    async with app["db"].acquire() as conn:
+        await follow_users(
+            conn, user_id=users[0], followee_ids=[users[1], users[2]]
+        )
+        await unfollow_user(conn, user_id=users[1], follower_id=users[0])
+
+    for _ in range(100):
+        if app["follower_graph"].followers(users[0]) == [users[2]]:
+            break
+
+        await asyncio.sleep(0.01)
+
+    assert app["follower_graph"].followers(users[0]) == [users[2]]
+    assert app["follower_graph"].followees(users[0]) == users[1:]
+
+    await close_follower_graph_listener(app)
+
+
+async def test_users_bulk_following(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        users = []
+
+        for i in range(4):
+            users.append(await create_user(
+                conn,
+                username=f"Test username {i}",
+                name=f"Test name {i}",
+                email=f"test-{i}@user.email",
+                password=f"Test password {i}",
+                description=f"Test description {i}"
+            ))
+
+        with pytest.raises(UserNotFoundException):
+            await follow_users(
+                conn, user_id=users[0], followee_ids=[users[1], 100]
+            )
+
+        assert await get_users_followees(conn, user_id=users[0]) == []
+
+        assert await follow_users(
+            conn, user_id=users[0], followee_ids=users[1:3]
+        ) == users[1:3]
+
+        graph = FollowerGraph()
+
+        # already followed users are skipped
+        assert await follow_users(
+            conn,
+            user_id=users[0],
+            followee_ids=[users[3], users[2], users[3]],
+            graph=graph,
+        ) == [users[3]]
+        assert sorted(
+            await get_users_followees(conn, user_id=users[0])
+        ) == users[1:]
+        assert graph.followees(users[0]) == users[2:]
+
+        assert await unfollow_users(
+            conn,
+            user_id=users[0],
+            followee_ids=[users[1], users[3]],
+            graph=graph,
+        ) == [users[1], users[3]]
+        assert await get_users_followees(conn, user_id=users[0]) == [
+            users[2]
+        ]
+        assert graph.followees(users[0]) == [users[2]]
+
+
+async def test_users_followers_paging(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+        with pytest.raises(UserNotFoundException):
+            await get_users_followers_page(conn, user_id=1)
+
+        users = await create_users(conn, 6)
+
+        await follow_users(conn, user_id=users[0], followee_ids=users[1:])
+
+        for follower in reversed(users[1:]):
+            await follow_user(conn, user_id=follower, follower_id=users[0])
+
+        page = await get_users_followers_page(conn, user_id=users[0], limit=2)
+
+        assert [user["id"] for user in page] == users[1:3]
+        assert set(page[0].keys()) == {"id", "username", "name"}
+
+        page = await get_users_followers_page(
+            conn, user_id=users[0], limit=10, after=users[2]
+        )
+
+        assert [user["id"] for user in page] == users[3:]
+        assert await get_users_followees(
+            conn, user_id=users[0], limit=2, after=users[1]
+        ) == users[2:4]
+
+
 async def test_user_password() -> None:
     """"""
 
@@ -224,3 +481,55 @@ async def test_user_password() -> None:
 
         assert check_password(password, hashed_password)
         assert hashed_password != password
+
+
+async def test_user_password_async() -> None:
+    """"""
+
+    for password in ("Test", "BAD*YIASGf7vDG(Vgs(", "", "123"):
+        hashed_password = await hash_password_async(password)
+
+        assert await check_password_async(password, hashed_password)
+        assert not await check_password_async("Wrong", hashed_password)
+        assert check_password(password, hashed_password)
+
+
+async def test_user_authenticating(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"] as conn:
+
+        user_id = await create_user(
+            conn,
+            username="Test username",
+            name="Test name",
+            email="test@user.email",
+            password="Test password",
+        )
+
+        assert await authenticate_user(
+            conn, username="Test username", password="Test password"
+        ) == user_id
+        assert await authenticate_user(
+            conn, username="Test username", password="Wrong password"
+        ) is None
+        assert await authenticate_user(
+            conn, username="Wrong username", password="Test password"
+        ) is None
+
+        # Legacy hash is replaced on successful login
+        await conn.execute(
+            users_table.update().values(
+                password_hash=hash_string("Test password")
+            )
+        )
+
+        assert await authenticate_user(
+            conn, username="Test username", password="Test password"
+        ) == user_id
+
+        password_hash = await conn.fetchval(
+            "SELECT password_hash FROM \"user\" WHERE id = $1", user_id
+        )
+
+        assert parse_password_hash(password_hash).algorithm == "pbkdf2-sha512"
@@ -1,9 +1,48 @@
+import asyncio
 import datetime
 import json
 import pytest
+import time
 
-from api.utils.hashing import hash_string, generate_salt, get_random_bytes
+from aiohttp.test_utils import make_mocked_request
+import msgpack
+
+from api.db.instrumentation import count_status
+from api.db.schema import users
+from api.utils.admission import AdmissionLimiter
+from api.utils.auth import RevocationList, issue_token, verify_token
+from api.utils.cursors import decode_cursor, encode_cursor
+from api.utils.exceptions import (
+    AuthenticationException,
+    InvalidCursorException,
+    InvalidFieldsException,
+    ServiceUnavailableException,
+)
+from api.utils.fieldsets import parse_fields, select_columns
+from api.utils.graph import FollowerGraph
+from api.utils.hashing import (
+    HashingPool,
+    PasswordHashPolicy,
+    make_password_hash,
+    needs_rehash,
+    parse_password_hash,
+    verify_password_hash,
+    hash_string,
+    hash_string_async,
+    generate_salt,
+    get_random_bytes,
+)
 from api.utils.json_serializers import to_json
+from api.utils.loop_monitor import NO_ROUTE, LoopMonitor
+from api.utils.metrics import Counter, Gauge, Histogram, Registry
+from api.utils.request_metrics import (
+    add_phase_time,
+    request_phases,
+    timed_phase,
+)
+from api.utils.msgpack_serializers import to_msgpack
+from api.utils.profiler import SamplingProfiler
+from api.utils.responses import accepts_msgpack
 
 
 def test_random_bytes_getting():
@@ -62,6 +101,73 @@ def test_string_hashing():
     )
 
 
+def test_password_hashing():
+    """"""
+
+    pbkdf2 = PasswordHashPolicy(iterations=1000)
+    stronger_pbkdf2 = PasswordHashPolicy(iterations=2000)
+    scrypt = PasswordHashPolicy(algorithm="scrypt", scrypt_n=2 ** 10)
+
+    hash_ = make_password_hash("Test", pbkdf2)
+
+    assert hash_.startswith("$pbkdf2-sha512$i=1000$")
+    assert len(hash_) <= 192
+    assert parse_password_hash(hash_).params == {"i": 1000}
+    assert verify_password_hash("Test", hash_)
+    assert not verify_password_hash("Test ", hash_)
+    assert not needs_rehash(hash_, pbkdf2)
+    assert needs_rehash(hash_, stronger_pbkdf2)
+    assert needs_rehash(hash_, scrypt)
+
+    hash_ = make_password_hash("Test", scrypt)
+
+    assert hash_.startswith("$scrypt$n=1024,r=8,p=1$")
+    assert verify_password_hash("Test", hash_)
+    assert not verify_password_hash("test", hash_)
+    assert not needs_rehash(hash_, scrypt)
+    assert needs_rehash(hash_, pbkdf2)
+
+    legacy_hash = hash_string("Test")
+
+    assert parse_password_hash(legacy_hash).algorithm == "legacy"
+    assert verify_password_hash("Test", legacy_hash)
+    assert not verify_password_hash("Wrong", legacy_hash)
+    assert needs_rehash(legacy_hash, pbkdf2)
+
+    for malformed in ("", "$", "$pbkdf2-sha512$i=1$$", "$md5$i=1$YQ$YQ"):
+        assert not verify_password_hash("Test", malformed)
+        assert needs_rehash(malformed, pbkdf2)
+
+    with pytest.raises(ValueError):
+        make_password_hash("Test", PasswordHashPolicy(algorithm="md5"))
+
+
+async def test_string_hashing_async():
+    """"""
+
+    salt = b"sABIYFGA^S*F&GA"
+
+    assert await hash_string_async("Test", salt=salt) == hash_string(
+        "Test", salt=salt
+    )
+
+    for kind in ("thread", "process"):
+        pool = HashingPool(kind=kind, workers=2, concurrency=1)
+
+        hashes = await asyncio.gather(
+            *(
+                pool.run(hash_string, "Test", salt=salt, sha_iter_count=1000)
+                for _ in range(4)
+            )
+        )
+
+        pool.close()
+
+        assert hashes == [
+            hash_string("Test", salt=salt, sha_iter_count=1000)
+        ] * 4
+
+
 def test_json_serializing():
     """"""
 
@@ -85,3 +191,327 @@ def test_json_serializing():
         (1, 2, 3)
     ):
         assert json.dumps(example, indent=4) == to_json(example)
+
+
+def test_fields_parsing():
+    """"""
+
+    assert parse_fields(None) is None
+    assert parse_fields("") is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("id") == ("id",)
+    assert parse_fields("id, name,,email") == ("id", "name", "email")
+
+
+def test_columns_selecting():
+    """"""
+
+    allowed = {"id": users.c.id, "name": users.c.name}
+
+    assert select_columns(allowed) == [users.c.id, users.c.name]
+    assert select_columns(allowed, ("name",)) == [users.c.name]
+    assert select_columns(allowed, ("name", "id", "name")) == [
+        users.c.name,
+        users.c.id,
+    ]
+
+    with pytest.raises(InvalidFieldsException):
+        select_columns(allowed, ("name", "email"))
+
+    with pytest.raises(InvalidFieldsException):
+        select_columns(allowed, ())
+
+
+def test_msgpack_serializing():
+    """"""
+
+    date = datetime.datetime(2020, 7, 15, 9, 30, 59)
+    aware_date = date.replace(tzinfo=datetime.timezone.utc)
+
+    assert msgpack.unpackb(to_msgpack(date)) == aware_date.timestamp()
+    assert msgpack.unpackb(to_msgpack(aware_date)) == aware_date.timestamp()
+
+    for example in (1, 1.0, True, None, "d", [1, 2, {"a": 2}], {"4": True}):
+        assert msgpack.unpackb(to_msgpack(example)) == example
+
+    with pytest.raises(TypeError):
+        to_msgpack(object())
+
+
+def test_msgpack_negotiating():
+    """"""
+
+    for accept, expected in (
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/json, application/msgpack", True),
+        ("application/json, application/msgpack;q=0.5", False),
+        ("application/json;q=0.5, application/msgpack", True),
+        ("application/msgpack;q=0", False),
+    ):
+        headers = {"Accept": accept} if accept is not None else {}
+        request = make_mocked_request("GET", "/", headers=headers)
+
+        assert accepts_msgpack(request) is expected
+
+
+def test_token_verifying():
+    """"""
+
+    token, payload = issue_token(1, "secret", 60, now=1000)
+
+    assert verify_token(token, "secret", now=1059) == payload
+    assert payload.user_id == 1
+    assert payload.expires_at == 1060
+
+    with pytest.raises(AuthenticationException):
+        verify_token(token, "secret", now=1060)
+
+    with pytest.raises(AuthenticationException):
+        verify_token(token, "other secret", now=1000)
+
+    signature = token.split(".")[1]
+    forged, _ = issue_token(2, "other secret", 60, now=1000)
+
+    with pytest.raises(AuthenticationException):
+        verify_token(f"{forged.split('.')[0]}.{signature}", "secret", now=1000)
+
+    with pytest.raises(AuthenticationException):
+        verify_token("garbage", "secret", now=1000)
+
+    revoked = RevocationList()
+    revoked.add(payload.token_id, payload.expires_at)
+
+    assert payload.token_id in revoked
+
+    revoked.replace({payload.token_id: 0})
+
+    assert len(revoked) == 0
+
+
+async def test_admission_limiting():
+    """"""
+
+    limiter = AdmissionLimiter(
+        "test", concurrency=1, queue=1, timeout=0.05, retry_after=3
+    )
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.admit():
+            await release.wait()
+
+    first = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+
+    assert limiter.stats()["active"] == 1
+    assert limiter.stats()["waiting"] == 1
+
+    with pytest.raises(ServiceUnavailableException) as exc_info:
+        async with limiter.admit():
+            pass
+
+    assert exc_info.value.response().headers["Retry-After"] == "3"
+
+    release.set()
+    await asyncio.gather(first, second)
+
+    # waiting longer than timeout is rejected too
+    release.clear()
+    first = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(ServiceUnavailableException):
+        async with limiter.admit():
+            pass
+
+    release.set()
+    await first
+
+    assert limiter.stats() == {
+        "concurrency": 1,
+        "queue": 1,
+        "active": 0,
+        "waiting": 0,
+        "admitted": 3,
+        "rejected": 2,
+    }
+
+
+def test_follower_graph():
+    """"""
+
+    graph = FollowerGraph.from_edges([(3, 1), (2, 1), (2, 3), (2, 1)])
+
+    assert len(graph) == 3
+    assert graph.followers(1) == [2, 3]
+    assert graph.followees(2) == [1, 3]
+    assert graph.followers_count(1) == 2
+    assert graph.followees_count(1) == 0
+    assert graph.is_following(2, 3)
+    assert not graph.is_following(3, 2)
+    assert graph.is_known(1)
+    assert not graph.is_known(4)
+
+    assert graph.add(4, 1)
+    assert not graph.add(4, 1)
+    assert graph.followers(1, after=2, limit=1) == [3]
+    assert graph.followers(1, after=2) == [3, 4]
+
+    assert graph.remove(2, 3)
+    assert not graph.remove(2, 3)
+    assert graph.followers(3) == []
+    assert graph.followees(3) == [1]
+
+    # changes made during reload reach the new graph
+    reloaded = FollowerGraph.from_edges([(5, 1)])
+    graph.record_changes()
+    graph.add(5, 1)
+    graph.add(6, 1)
+    graph.replace_by(reloaded)
+
+    assert reloaded.followers(1) == [5, 6]
+
+    graph.remove(5, 1)
+
+    assert reloaded.followers(1) == [6]
+
+    reloaded.add(1, 7)
+    reloaded.remove_user(1)
+
+    assert len(reloaded) == 0
+    assert not reloaded.is_known(1)
+
+
+def test_cursor_decoding():
+    """"""
+
+    assert decode_cursor(None, int) is None
+    assert decode_cursor(encode_cursor(10), int) == (10,)
+    assert decode_cursor(encode_cursor(1.5, 2), float, int) == (1.5, 2)
+
+    invalid = (
+        "!",
+        "bm90IGpzb24",
+        encode_cursor("1"),
+        encode_cursor(1, 2),
+        encode_cursor(True),
+        encode_cursor(2 ** 31),
+        encode_cursor(-(2 ** 31) - 1),
+    )
+
+    for cursor in invalid:
+        with pytest.raises(InvalidCursorException):
+            decode_cursor(cursor, int)
+
+
+def test_metrics_rendering():
+    """"""
+
+    registry = Registry()
+    counter = registry.register(Counter("rows", "Rows", ("function",)))
+    gauge = registry.register(Gauge("size", "Size"))
+    histogram = registry.register(
+        Histogram("latency", "Latency", ("function",), buckets=(0.1, 1.0))
+    )
+    registry.collectors.append(lambda: gauge.set(value=3))
+
+    with pytest.raises(ValueError):
+        registry.register(Gauge("size", "Size"))
+
+    counter.inc('say "hi"', value=2)
+
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe("f", value=value)
+
+    assert histogram.count("f") == 4
+    assert histogram.count("g") == 0
+    assert registry.render() == (
+        "# HELP rows Rows\n"
+        "# TYPE rows counter\n"
+        'rows{function="say \\"hi\\""} 2\n'
+        "# HELP size Size\n"
+        "# TYPE size gauge\n"
+        "size 3\n"
+        "# HELP latency Latency\n"
+        "# TYPE latency histogram\n"
+        'latency_bucket{function="f",le="0.1"} 2\n'
+        'latency_bucket{function="f",le="1.0"} 3\n'
+        'latency_bucket{function="f",le="+Inf"} 4\n'
+        'latency_sum{function="f"} 5.65\n'
+        'latency_count{function="f"} 4\n'
+    )
+
+    assert count_status("INSERT 0 5") == 5
+    assert count_status("BEGIN") == 0
+
+
+def test_phases_timing():
+    """"""
+
+    # time outside of measured request is ignored
+    add_phase_time("db", 1.0)
+
+    phases = {}
+    token = request_phases.set(phases)
+
+    add_phase_time("db", 1.0)
+    add_phase_time("db", 0.5)
+
+    with timed_phase("serialization"):
+        pass
+
+    request_phases.reset(token)
+
+    assert phases["db"] == 1.5
+    assert 0 <= phases["serialization"] < 1
+
+
+async def test_loop_blocks_reporting(caplog):
+    """"""
+
+    def block_loop():
+        time.sleep(0.2)
+
+    monitor = LoopMonitor(Registry(), interval=0.01, threshold=0.05)
+    monitor.start()
+
+    await asyncio.sleep(0.05)
+    block_loop()
+    await asyncio.sleep(0.05)
+
+    await monitor.close()
+
+    assert monitor.lag.count() > 1
+    assert monitor.blocks.values == {(NO_ROUTE,): 1}
+    assert "in block_loop" in caplog.text
+
+
+async def test_profiling_cancelling():
+    """"""
+
+    profiler = SamplingProfiler(interval=0.01)
+    session = asyncio.ensure_future(profiler.profile(60))
+    await asyncio.sleep(0.05)
+
+    session.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await session
+
+    # sampling thread is stopped and the next session can start
+    for _ in range(100):
+        if profiler._until is None:
+            break
+
+        with pytest.raises(ServiceUnavailableException):
+            await profiler.profile(0.01)
+
+        await asyncio.sleep(0.01)
+
+    assert await profiler.profile(0.05)
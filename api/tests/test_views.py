@@ -0,0 +1,626 @@
+import asyncio
+import msgpack
+
+from api.logic.posts import (
+    comment_post,
+    create_post,
+    get_posts_comments_count,
+)
+from api.tests.setup import client, create_users, database
+from api.utils.cursors import encode_cursor
+from api.utils.graph import FollowerGraph
+from api.utils.ingestion import CommentQueue
+
+
+async def test_batch(client, database) -> None:
+    """"""
+
+    users = await create_users(client.server.app["db"], 2)
+
+    resp = await client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"method": "GET", "path": f"/users/{users[0]}"},
+                {"method": "GET", "path": "/users?fields=id"},
+                {"method": "GET", "path": "/users/0"},
+                {
+                    "method": "POST",
+                    "path": "/posts",
+                    "body": {"user_id": users[1], "text": "", "image": ""},
+                },
+                {"method": "GET", "path": "/unknown"},
+                # failure of one sub-request doesn't fail the others
+                {
+                    "method": "POST",
+                    "path": "/users",
+                    "body": {
+                        "username": "Test user 1",
+                        "name": "Test user",
+                        "email": "test@user.email",
+                        "password": "Test password",
+                        "description": "",
+                    },
+                },
+            ]
+        },
+    )
+
+    assert resp.status == 200
+
+    responses = (await resp.json())["responses"]
+
+    assert [response["status"] for response in responses] == [
+        200,
+        200,
+        404,
+        200,
+        404,
+        500,
+    ]
+    assert responses[0]["body"]["username"] == "Test user 1"
+    assert responses[1]["body"] == [{"id": user_id} for user_id in users]
+    assert responses[3]["body"]["user_id"] == users[1]
+
+
+async def test_batch_validating(client, database) -> None:
+    """"""
+
+    max_requests = client.server.app["config"]["BATCH_MAX_REQUESTS"]
+
+    for body in (
+        {},
+        {"requests": []},
+        {"requests": [{"method": "GET"}]},
+        {"requests": [{"method": "TRACE", "path": "/users"}]},
+        {"requests": [{"method": "POST", "path": "/batch"}]},
+        {"requests": [{"method": "GET", "path": "/"}] * (max_requests + 1)},
+    ):
+        resp = await client.post("/batch", json=body)
+
+        assert resp.status == 400
+
+
+async def test_request_validating(client, database) -> None:
+    """"""
+
+    user = {
+        "username": "Test username",
+        "name": "Test name",
+        "email": "test@user.email",
+        "description": "Test description",
+    }
+
+    resp = await client.post("/users", json=user)
+
+    assert resp.status == 422
+    assert "password" in (await resp.json())["errors"]
+
+    resp = await client.post(
+        "/users", data="{", headers={"Content-Type": "application/json"}
+    )
+
+    assert resp.status == 422
+
+    resp = await client.post("/users", json={**user, "password": "Test"})
+
+    assert resp.status == 200
+    assert (await resp.json())["username"] == "Test username"
+
+    resp = await client.get("/users")
+
+    assert resp.status == 200
+
+
+async def test_msgpack_responding(client, database) -> None:
+    """"""
+
+    users = await create_users(client.server.app["db"], 1)
+
+    resp = await client.get(
+        f"/users/{users[0]}", headers={"Accept": "application/msgpack"}
+    )
+
+    assert resp.status == 200
+    assert resp.content_type == "application/msgpack"
+    assert msgpack.unpackb(await resp.read())["id"] == users[0]
+
+    resp = await client.get(f"/users/{users[0]}")
+
+    assert resp.content_type == "application/json"
+    assert (await resp.json())["id"] == users[0]
+
+
+async def test_sync(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"].acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_ids = [
+            await create_post(conn, user_id=user_id, text="Test", image="")
+            for _ in range(3)
+        ]
+
+    resp = await client.get("/sync", params={"limit": 2})
+
+    assert resp.status == 200
+
+    data = await resp.json()
+
+    assert [post["id"] for post in data["posts"]] == post_ids[:2]
+    assert data["has_more"]
+
+    resp = await client.get(
+        "/sync", params={"limit": 2, "since": data["watermark"]}
+    )
+    data = await resp.json()
+
+    assert [post["id"] for post in data["posts"]] == post_ids[2:]
+    assert not data["has_more"]
+
+    resp = await client.get("/sync", params={"since": data["watermark"]})
+
+    assert resp.status == 200
+    assert (await resp.json())["posts"] == []
+
+    for since in ("yesterday", encode_cursor("-1"), encode_cursor(1)):
+        resp = await client.get("/sync", params={"since": since})
+
+        assert resp.status == 400
+
+
+async def test_login_and_logout(client, database) -> None:
+    """"""
+
+    credentials = {"username": "tester", "password": "secret"}
+
+    resp = await client.post(
+        "/users", json={**credentials, "name": "", "email": "t@test.test"}
+    )
+
+    assert resp.status == 200
+
+    user_id = (await resp.json())["id"]
+
+    resp = await client.post(
+        "/login", json={**credentials, "password": "wrong"}
+    )
+
+    assert resp.status == 401
+
+    resp = await client.post("/logout")
+
+    assert resp.status == 401
+
+    resp = await client.post("/login", json=credentials)
+
+    assert resp.status == 200
+
+    data = await resp.json()
+
+    assert data["user_id"] == user_id
+
+    headers = {"Authorization": f"Bearer {data['token']}"}
+
+    resp = await client.post("/logout", headers=headers)
+
+    assert resp.status == 200
+
+    resp = await client.post("/logout", headers=headers)
+
+    assert resp.status == 401
+    assert "revoked" in (await resp.json())["errors"]["token"]
+
+
+async def test_stats(client, database) -> None:
+    """"""
+
+    resp = await client.post(
+        "/users",
+        json={
+            "username": "tester",
+            "password": "secret",
+            "name": "",
+            "email": "t@test.test",
+        },
+    )
+
+    assert resp.status == 200
+
+    resp = await client.get("/stats")
+
+    assert resp.status == 200
+
+    signup = (await resp.json())["admission"]["signup"]
+
+    assert signup["admitted"] == 1
+    assert signup["rejected"] == 0
+
+
+async def test_users_followees(client, database) -> None:
+    """"""
+
+    users = await create_users(client.server.app["db"], 3)
+
+    resp = await client.post(
+        "/users",
+        json={
+            "username": "tester",
+            "password": "secret",
+            "name": "",
+            "email": "t@test.test",
+        },
+    )
+    user_id = (await resp.json())["id"]
+
+    resp = await client.post(
+        f"/users/{user_id}/followees", json={"ids": users}
+    )
+
+    assert resp.status == 401
+
+    resp = await client.post(
+        "/login", json={"username": "tester", "password": "secret"}
+    )
+    headers = {"Authorization": f"Bearer {(await resp.json())['token']}"}
+
+    resp = await client.post(
+        f"/users/{users[0]}/followees", json={"ids": users}, headers=headers
+    )
+
+    assert resp.status == 403
+
+    resp = await client.post(
+        f"/users/{user_id}/followees", json={"ids": []}, headers=headers
+    )
+
+    assert resp.status == 422
+
+    resp = await client.post(
+        f"/users/{user_id}/followees", json={"ids": users}, headers=headers
+    )
+
+    assert resp.status == 200
+    assert (await resp.json())["followed"] == users
+
+    resp = await client.delete(
+        f"/users/{user_id}/followees",
+        json={"ids": users[:1]},
+        headers=headers,
+    )
+
+    assert resp.status == 200
+    assert (await resp.json())["unfollowed"] == users[:1]
+
+    resp = await client.get(
+        f"/users/{user_id}/suggestions", headers=headers
+    )
+
+    assert resp.status == 200
+    assert (await resp.json())["suggestions"] == []
+
+
+async def test_users_followers_paging(client, database) -> None:
+    """"""
+
+    users = await create_users(client.server.app["db"], 4)
+
+    async with client.server.app["db"].acquire() as conn:
+        for follower in users[1:]:
+            await conn.execute(
+                "INSERT INTO followers (from_user, to_user) VALUES ($1, $2)",
+                follower,
+                users[0],
+            )
+
+    resp = await client.get(
+        f"/users/{users[0]}/followers", params={"limit": 2}
+    )
+
+    assert resp.status == 200
+
+    data = await resp.json()
+
+    assert [user["id"] for user in data["users"]] == users[1:3]
+    assert data["next_cursor"] is not None
+
+    resp = await client.get(
+        f"/users/{users[0]}/followers",
+        params={"limit": 2, "cursor": data["next_cursor"]},
+    )
+    data = await resp.json()
+
+    assert [user["id"] for user in data["users"]] == users[3:]
+    assert data["next_cursor"] is None
+
+    resp = await client.get(f"/users/{users[1]}/followees")
+
+    assert [user["id"] for user in (await resp.json())["users"]] == [
+        users[0]
+    ]
+
+    for cursor in ("garbage", encode_cursor(10 ** 12)):
+        resp = await client.get(
+            f"/users/{users[0]}/followers", params={"cursor": cursor}
+        )
+
+        assert resp.status == 400
+
+    resp = await client.get(
+        f"/users/{users[0]}/followers", params={"limit": 1000}
+    )
+
+    assert resp.status == 422
+
+    # ids of pages are taken from follower graph once it's loaded
+    client.server.app["follower_graph"] = FollowerGraph.from_edges(
+        (follower, users[0]) for follower in users[2:]
+    )
+
+    resp = await client.get(f"/users/{users[0]}/followers")
+
+    assert [user["id"] for user in (await resp.json())["users"]] == users[2:]
+
+
+async def test_post_comments_paging(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"].acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id = await create_post(
+            conn, user_id=user_id, text="Test", image=""
+        )
+        threads = [
+            await comment_post(
+                conn, post_id=post_id, user_id=user_id, text=f"Thread {i}"
+            )
+            for i in range(3)
+        ]
+        reply_id = await comment_post(
+            conn,
+            post_id=post_id,
+            user_id=user_id,
+            text="Reply",
+            parent_id=threads[0],
+        )
+
+    resp = await client.get(
+        f"/posts/{post_id}/comments", params={"limit": 2}
+    )
+
+    assert resp.status == 200
+
+    data = await resp.json()
+
+    assert [comment["id"] for comment in data["comments"]] == threads[:2]
+    assert data["comments"][0]["replies_count"] == 1
+    assert data["comments"][0]["replies"][0]["id"] == reply_id
+
+    resp = await client.get(
+        f"/posts/{post_id}/comments",
+        params={"limit": 2, "cursor": data["next_cursor"]},
+    )
+    data = await resp.json()
+
+    assert [comment["id"] for comment in data["comments"]] == threads[2:]
+    assert data["next_cursor"] is None
+
+    resp = await client.get(f"/comments/{threads[0]}/replies")
+
+    assert [reply["id"] for reply in (await resp.json())["replies"]] == [
+        reply_id
+    ]
+
+    timestamp = data["comments"][0]["timestamp"]
+    resp = await client.get(
+        f"/posts/{post_id}/comments",
+        params={"cursor": encode_cursor(timestamp, threads[2])},
+    )
+
+    assert resp.status == 200
+
+    invalid = (
+        encode_cursor("yesterday", 1),
+        encode_cursor("2020-01-01T00:00:00+05:00", 1),
+        encode_cursor(timestamp, 10 ** 12),
+    )
+
+    for cursor in invalid:
+        for path in (
+            f"/posts/{post_id}/comments",
+            f"/comments/{threads[0]}/replies",
+        ):
+            resp = await client.get(path, params={"cursor": cursor})
+
+            assert resp.status == 400
+
+
+async def test_post_commenting(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"].acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id = await create_post(
+            conn, user_id=user_id, text="Test", image=""
+        )
+
+    await client.post(
+        "/users",
+        json={
+            "username": "tester",
+            "password": "secret",
+            "name": "",
+            "email": "t@test.test",
+        },
+    )
+    resp = await client.post(
+        "/login", json={"username": "tester", "password": "secret"}
+    )
+    headers = {"Authorization": f"Bearer {(await resp.json())['token']}"}
+    comment = {
+        "text": "Test",
+        "client_id": "5b0d9f4e-7f1c-4d6c-9a3e-2f0c1b7a8e11",
+    }
+
+    resp = await client.post(f"/posts/{post_id}/comments", json=comment)
+
+    assert resp.status == 401
+
+    resp = await client.post(
+        f"/posts/{post_id}/comments", json={"text": "Test"}, headers=headers
+    )
+
+    assert resp.status == 422
+
+    resp = await client.post(
+        f"/posts/{post_id}/comments", json=comment, headers=headers
+    )
+
+    assert resp.status == 200
+
+    data = await resp.json()
+
+    assert data["client_id"] == comment["client_id"]
+
+    # retry doesn't duplicate the comment
+    resp = await client.post(
+        f"/posts/{post_id}/comments", json=comment, headers=headers
+    )
+
+    assert (await resp.json())["id"] == data["id"]
+
+    resp = await client.post(
+        "/posts/100/comments", json=comment, headers=headers
+    )
+
+    assert resp.status == 404
+
+    app = client.server.app
+    app["comment_queue"] = CommentQueue(
+        maxsize=10, batch_size=10, interval=0.01
+    )
+    await app["comment_queue"].start(app["db"])
+
+    # queued comment is checked before it's acknowledged
+    for path, body in [
+        ("/posts/100/comments", {}),
+        (f"/posts/{post_id}/comments", {"parent_id": 100}),
+    ]:
+        resp = await client.post(
+            path, json={**comment, **body}, headers=headers
+        )
+
+        assert resp.status == 404
+
+    resp = await client.post(
+        f"/posts/{post_id}/comments",
+        json={
+            **comment,
+            "client_id": "0e6b2c1a-3d4f-4e5a-8b7c-9d0e1f2a3b4c",
+        },
+        headers=headers,
+    )
+
+    assert resp.status == 202
+
+    await app["comment_queue"].close()
+    app["comment_queue"] = None
+
+    async with app["db"].acquire() as conn:
+        assert await get_posts_comments_count(conn, post_id=post_id) == 2
+
+
+async def test_metrics(client, database) -> None:
+    """"""
+
+    async with client.server.app["db"].acquire() as conn:
+        user_id = (await create_users(conn, 1))[0]
+        post_id = await create_post(
+            conn, user_id=user_id, text="Test", image=""
+        )
+
+    resp = await client.get(f"/posts/{post_id}/likes_count")
+
+    assert resp.status == 200
+
+    resp = await client.get("/metrics")
+
+    assert resp.status == 200
+    assert resp.headers["Content-Type"].startswith("text/plain")
+
+    text = await resp.text()
+
+    assert (
+        'db_query_duration_seconds_count{function="logic.posts.create_post"}'
+        in text
+    )
+    assert 'db_query_rows_total{function="logic.posts.create_post"} 1' in text
+    # query is labeled by the function which made it
+    assert (
+        'db_query_duration_seconds_count{function="logic.posts.'
+        'count_posts_relations"}' in text
+    )
+    assert "db_pool_acquire_seconds_count" in text
+    assert "db_pool_size " in text
+
+    # requests are labeled by route templates
+    route = 'method="GET",route="/posts/{post_id}/likes_count"'
+
+    assert f"http_request_duration_seconds_count{{{route}}} 1" in text
+    assert f'http_responses_total{{{route},status="200"}} 1' in text
+    assert f"http_response_size_bytes_count{{{route}}} 1" in text
+    assert f"http_requests_in_flight{{{route}}} 0" in text
+
+    for phase in ("db", "serialization", "handler"):
+        assert (
+            f'http_request_phase_seconds_count{{{route},phase="{phase}"}} 1'
+            in text
+        )
+
+    await client.get("/unknown")
+    text = await (await client.get("/metrics")).text()
+
+    assert (
+        'http_responses_total{method="GET",route="unmatched",status="404"} 1'
+        in text
+    )
+
+
+async def test_profiling(client, database) -> None:
+    """"""
+
+    resp = await client.get("/debug/profile", params={"seconds": 0.1})
+
+    # debug endpoints are disabled without token
+    assert resp.status == 403
+
+    client.server.app["config"]["debug_token"] = "debug"
+    headers = {"X-Debug-Token": "wrong"}
+    resp = await client.get(
+        "/debug/profile", params={"seconds": 0.1}, headers=headers
+    )
+
+    assert resp.status == 403
+
+    headers = {"X-Debug-Token": "debug"}
+    resp = await client.get(
+        "/debug/profile", params={"seconds": 3600}, headers=headers
+    )
+
+    assert resp.status == 422
+
+    first, second = await asyncio.gather(
+        client.get("/debug/profile", params={"seconds": 0.2}, headers=headers),
+        client.get("/debug/profile", params={"seconds": 0.2}, headers=headers),
+    )
+    statuses = sorted([first.status, second.status])
+
+    # only one session runs at a time
+    assert statuses == [200, 503]
+
+    resp = first if first.status == 200 else second
+    lines = (await resp.text()).splitlines()
+
+    assert lines
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("MainThread;") for line in lines)
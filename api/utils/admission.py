@@ -0,0 +1,175 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from aiohttp import web
+
+from api.utils.exceptions import ServiceUnavailableException
+
+
+class AdmissionLimiter:
+    """
+    Limiter of concurrently processed requests with bounded wait queue.
+
+    Requests which don't fit into the queue or wait longer than timeout
+    are rejected instead of piling up and starving other routes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        concurrency: int,
+        queue: int = 0,
+        timeout: Optional[float] = None,
+        retry_after: int = 1
+    ):
+        """
+        :param name: Name of the limiter
+        :type name: str
+        :param concurrency: Max count of requests processed concurrently
+        :type concurrency: int
+        :param queue: Max count of requests waiting for processing
+        :type queue: int
+        :param timeout: Max seconds of waiting in queue, unlimited if None
+        :type timeout: Optional[float]
+        :param retry_after: Value of `Retry-After` header of rejections
+        :type retry_after: int
+        """
+
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Context of admitted request.
+
+        :raise ServiceUnavailableException: Request is rejected
+        """
+
+        if self._semaphore.locked():
+            if self.waiting >= self.queue:
+                self.reject()
+
+            self.waiting += 1
+
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(), self.timeout
+                )
+            except asyncio.TimeoutError:
+                self.reject()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.active += 1
+        self.admitted += 1
+
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def reject(self) -> None:
+        """
+        Count rejection and raise it.
+
+        :raise ServiceUnavailableException: Always
+        """
+
+        self.rejected += 1
+
+        raise ServiceUnavailableException(self.retry_after)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get current state and counters of the limiter.
+
+        :return: Stats of the limiter
+        :rtype: Dict[str, int]
+        """
+
+        return {
+            "concurrency": self.concurrency,
+            "queue": self.queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def admission_controlled(name: str) -> Callable:
+    """
+    Decorator of view method which limits its concurrency.
+
+    Route isn't limited if the limiter isn't configured.
+
+    :param name: Name of the limiter in `ADMISSION_LIMITS` config
+    :type name: str
+    :return: Decorator
+    :rtype: Callable
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(view: web.View, *args, **kwargs):
+            limiter = view.request.app["admission_limiters"].get(name)
+
+            if limiter is None:
+                return await func(view, *args, **kwargs)
+
+            try:
+                async with limiter.admit():
+                    return await func(view, *args, **kwargs)
+            except ServiceUnavailableException as exc:
+                return exc.response()
+
+        return wrapper
+
+    return decorator
+
+
+def setup_admission(app: web.Application) -> None:
+    """
+    Setup admission limiters by application configuration.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["admission_limiters"] = {
+        name: AdmissionLimiter(name, **params)
+        for name, params in app["config"]["ADMISSION_LIMITS"].items()
+    }
+
+
+def get_admission_stats(app: web.Application) -> Dict[str, Dict[str, int]]:
+    """
+    Get stats of all admission limiters.
+
+    :param app: Application instance
+    :type app: web.Application
+    :return: Stats of each limiter
+    :rtype: Dict[str, Dict[str, int]]
+    """
+
+    return {
+        name: limiter.stats()
+        for name, limiter in app["admission_limiters"].items()
+    }
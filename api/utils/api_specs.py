@@ -1,8 +1,10 @@
 from aiohttp.web import Application
 
-from aiohttp_apispec import setup_aiohttp_apispec, validation_middleware
+from aiohttp_apispec import setup_aiohttp_apispec
 from marshmallow import Schema, fields
 
+from api.utils.validation import setup_validation
+
 
 def setup_api_specs(app: Application) -> None:
     """
@@ -31,7 +33,7 @@ def setup_api_middlewares(app: Application) -> None:
     :type app: Application
     """
 
-    app.middlewares.append(validation_middleware)
+    setup_validation(app)
 
 
 class UserSchema(Schema):
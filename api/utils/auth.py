@@ -0,0 +1,316 @@
+import base64
+import binascii
+from functools import wraps
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from aiohttp import hdrs, web
+
+from api.logic.auth import get_revoked_tokens
+from api.utils.exceptions import (
+    AuthenticationException,
+    InvalidDebugTokenException,
+)
+from api.utils.tasks import setup_periodic_task
+
+
+BEARER_PREFIX: str = "Bearer "
+# Header of token of debug endpoints, `Authorization` is used by users
+DEBUG_TOKEN_HEADER: str = "X-Debug-Token"
+TOKEN_SEPARATOR: str = "."
+TOKEN_ID_BYTES: int = 16
+
+
+class TokenPayload(NamedTuple):
+    """Data carried by the token."""
+
+    user_id: int
+    expires_at: int
+    token_id: str
+
+
+class RevocationList:
+    """In-process cache of revoked tokens which aren't expired yet."""
+
+    def __init__(self):
+        self._tokens: Dict[str, int] = {}
+
+    def __contains__(self, token_id: str) -> bool:
+        return token_id in self._tokens
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def add(self, token_id: str, expires_at: int) -> None:
+        """
+        Add revoked token.
+
+        :param token_id: Token's identifier
+        :type token_id: str
+        :param expires_at: Timestamp of token's expiration
+        :type expires_at: int
+        """
+
+        self._tokens[token_id] = expires_at
+
+    def replace(self, tokens: Dict[str, int]) -> None:
+        """
+        Replace cached tokens by actual ones.
+
+        :param tokens: Expiration timestamps of revoked tokens
+        :type tokens: Dict[str, int]
+        """
+
+        now = time.time()
+
+        self._tokens = {
+            token_id: expires_at
+            for token_id, expires_at in tokens.items()
+            if expires_at > now
+        }
+
+
+def issue_token(
+    user_id: int, secret: str, ttl: int, *, now: Optional[float] = None
+) -> Tuple[str, TokenPayload]:
+    """
+    Issue signed token for the user.
+
+    :param user_id: User's identifier
+    :type user_id: int
+    :param secret: Secret key for signing
+    :type secret: str
+    :param ttl: Lifetime of token in seconds
+    :type ttl: int
+    :param now: Current timestamp
+    :type now: Optional[float]
+    :return: Token and its payload
+    :rtype: Tuple[str, TokenPayload]
+    """
+
+    now = time.time() if now is None else now
+    payload = TokenPayload(
+        user_id=user_id,
+        expires_at=int(now) + ttl,
+        token_id=secrets.token_hex(TOKEN_ID_BYTES),
+    )
+    data = encode_base64(":".join(map(str, payload)).encode("ascii"))
+    signature = encode_base64(sign(data, secret))
+
+    return f"{data}{TOKEN_SEPARATOR}{signature}", payload
+
+
+def verify_token(
+    token: str, secret: str, *, now: Optional[float] = None
+) -> TokenPayload:
+    """
+    Verify signature and expiration of the token.
+
+    :param token: Token
+    :type token: str
+    :param secret: Secret key for signing
+    :type secret: str
+    :param now: Current timestamp
+    :type now: Optional[float]
+    :raise AuthenticationException: Token is invalid or expired
+    :return: Payload of the token
+    :rtype: TokenPayload
+    """
+
+    data, _, signature = token.partition(TOKEN_SEPARATOR)
+
+    try:
+        valid = hmac.compare_digest(
+            decode_base64(signature), sign(data, secret)
+        )
+        user_id, expires_at, token_id = (
+            decode_base64(data).decode("ascii").split(":")
+        )
+        payload = TokenPayload(int(user_id), int(expires_at), token_id)
+    except (ValueError, binascii.Error):
+        valid = False
+
+    if not valid:
+        raise AuthenticationException("Token is invalid")
+
+    if payload.expires_at <= (time.time() if now is None else now):
+        raise AuthenticationException("Token is expired")
+
+    return payload
+
+
+def sign(data: str, secret: str) -> bytes:
+    """
+    Sign data by HMAC-SHA256.
+
+    :param data: Data to sign
+    :type data: str
+    :param secret: Secret key for signing
+    :type secret: str
+    :return: Signature
+    :rtype: bytes
+    """
+
+    return hmac.new(
+        secret.encode("utf-8"), data.encode("ascii"), hashlib.sha256
+    ).digest()
+
+
+def encode_base64(data: bytes) -> str:
+    """
+    Encode bytes to URL-safe base64 string without padding.
+
+    :param data: Bytes to encode
+    :type data: bytes
+    :return: Base64 string
+    :rtype: str
+    """
+
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_base64(data: str) -> bytes:
+    """
+    Decode URL-safe base64 string without padding.
+
+    :param data: Base64 string
+    :type data: str
+    :return: Decoded bytes
+    :rtype: bytes
+    """
+
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+@web.middleware
+async def auth_middleware(
+    request: web.Request, handler: Callable
+) -> web.StreamResponse:
+    """
+    Authenticate request by bearer token without touching database.
+
+    :param request: Input request
+    :type request: web.Request
+    :param handler: Request handler
+    :type handler: Callable
+    :return: Response
+    :rtype: web.StreamResponse
+    """
+
+    request["user_id"] = None
+    request["token"] = None
+
+    authorization = request.headers.get(hdrs.AUTHORIZATION)
+
+    if authorization is not None:
+        try:
+            payload = authenticate(request.app, authorization)
+        except AuthenticationException as exc:
+            return exc.response()
+
+        request["user_id"] = payload.user_id
+        request["token"] = payload
+
+    return await handler(request)
+
+
+def authenticate(app: web.Application, authorization: str) -> TokenPayload:
+    """
+    Verify value of `Authorization` header.
+
+    :param app: Application instance
+    :type app: web.Application
+    :param authorization: Value of `Authorization` header
+    :type authorization: str
+    :raise AuthenticationException: Token is invalid or revoked
+    :return: Payload of the token
+    :rtype: TokenPayload
+    """
+
+    if not authorization.startswith(BEARER_PREFIX):
+        raise AuthenticationException("Bearer token is expected")
+
+    payload = verify_token(
+        authorization[len(BEARER_PREFIX):], app["config"]["secret_key"]
+    )
+
+    if payload.token_id in app["revoked_tokens"]:
+        raise AuthenticationException("Token is revoked")
+
+    return payload
+
+
+def login_required(func: Callable) -> Callable:
+    """
+    Decorator of handler which allows only authenticated requests.
+
+    :param func: Handler or method of view
+    :type func: Callable
+    :return: Decorated handler
+    :rtype: Callable
+    """
+
+    @wraps(func)
+    async def wrapper(view_or_request, *args, **kwargs):
+        request = getattr(view_or_request, "request", view_or_request)
+
+        if request.get("user_id") is None:
+            return AuthenticationException(
+                "Authentication is required"
+            ).response()
+
+        return await func(view_or_request, *args, **kwargs)
+
+    return wrapper
+
+
+def check_debug_token(request: web.Request) -> None:
+    """
+    Check token of debug endpoints, they're disabled if it isn't set.
+
+    :param request: Input request
+    :type request: web.Request
+    :raise InvalidDebugTokenException: Token is wrong or not set
+    """
+
+    expected = request.app["config"]["debug_token"]
+    token = request.headers.get(DEBUG_TOKEN_HEADER, "")
+
+    if not expected or not hmac.compare_digest(
+        token.encode(), expected.encode()
+    ):
+        raise InvalidDebugTokenException()
+
+
+def setup_auth(app: web.Application) -> None:
+    """
+    Setup token authentication.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["revoked_tokens"] = RevocationList()
+    app.middlewares.append(auth_middleware)
+
+    setup_periodic_task(
+        app,
+        "revoked_tokens_refresher",
+        refresh_revoked_tokens,
+        app["config"]["TOKEN_REVOCATION_REFRESH"],
+    )
+
+
+async def refresh_revoked_tokens(app: web.Application) -> None:
+    """
+    Load tokens revoked by all workers to in-process cache.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    async with app["db"].acquire() as conn:
+        app["revoked_tokens"].replace(await get_revoked_tokens(conn))
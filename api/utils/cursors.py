@@ -0,0 +1,83 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional, Tuple
+
+from api.utils.exceptions import InvalidCursorException
+
+
+# Bounds of INTEGER columns, larger values fail queries instead of cursors
+INTEGER_MIN: int = -(2 ** 31)
+INTEGER_MAX: int = 2 ** 31 - 1
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode position of the last item of page into opaque cursor.
+
+    :param values: JSON serializable values of the sort key
+    :type values: Any
+    :return: Cursor
+    :rtype: str
+    """
+
+    data = json.dumps(values, separators=(",", ":")).encode("utf-8")
+
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    cursor: Optional[str], *types: type
+) -> Optional[Tuple[Any, ...]]:
+    """
+    Decode cursor of the next page.
+
+    :param cursor: Cursor returned with previous page
+    :type cursor: Optional[str]
+    :param types: Types of values of the sort key
+    :type types: type
+    :raise InvalidCursorException: Cursor is malformed or out of range
+    :return: Values of the sort key or None for the first page
+    :rtype: Optional[Tuple[Any, ...]]
+    """
+
+    if not cursor:
+        return None
+
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+    except (ValueError, binascii.Error):
+        raise InvalidCursorException()
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(map(is_valid_value, values, types))
+    ):
+        raise InvalidCursorException()
+
+    return tuple(values)
+
+
+def is_valid_value(value: Any, value_type: type) -> bool:
+    """
+    Check type of cursor's value, integers have to fit INTEGER column.
+
+    :param value: Decoded value
+    :type value: Any
+    :param value_type: Expected type of value
+    :type value_type: type
+    :return: Is value valid
+    :rtype: bool
+    """
+
+    if value_type is int:
+        return (
+            isinstance(value, int)
+            and not isinstance(value, bool)
+            and INTEGER_MIN <= value <= INTEGER_MAX
+        )
+
+    return isinstance(value, value_type)
@@ -1,12 +1,13 @@
-from aiohttp import web
+from aiohttp import hdrs, web
 
 from api.utils.json_serializers import to_json
 
 
-class RecordNotFoundException(ValueError):
-    """Exception raised when record doesn't exist"""
+class ApiException(ValueError):
+    """Base exception which can be rendered as API error response"""
 
-    MESSAGE: str = "Specified record doesn't exist"
+    MESSAGE: str = "Invalid request"
+    STATUS: int = 400
 
     def __init__(self, message: str = MESSAGE):
         self.message = message
@@ -27,13 +28,25 @@ class RecordNotFoundException(ValueError):
 
     def response(self) -> web.Response:
         """
-        Return the response of not found record.
+        Return the error response.
 
-        :return: Response of not found record
+        :return: Response of the error
         :rtype: web.Response
         """
 
-        return web.json_response(text=to_json(self.error_dict()), status=404)
+        return web.json_response(
+            text=to_json(self.error_dict()), status=self.STATUS
+        )
+
+
+class RecordNotFoundException(ApiException):
+    """Exception raised when record doesn't exist"""
+
+    MESSAGE: str = "Specified record doesn't exist"
+    STATUS: int = 404
+
+    def __init__(self, message: str = MESSAGE):
+        super().__init__(message)
 
 
 class PostNotFoundException(RecordNotFoundException):
@@ -46,3 +59,130 @@ class UserNotFoundException(RecordNotFoundException):
     def __init__(self):
         self.message = "Specified user doesn't exist"
         self.field = "user_id"
+
+
+class InvalidFieldsException(ApiException):
+    def __init__(self, fields: str):
+        self.message = f"Unknown fields requested: {fields}"
+        self.field = "fields"
+
+
+class InvalidBatchException(ApiException):
+    def __init__(self, message: str):
+        self.message = message
+        self.field = "requests"
+
+
+class RequestValidationException(ApiException):
+    """Exception raised when request data doesn't match the schema"""
+
+    STATUS: int = 422
+
+    def __init__(self, messages: dict):
+        self.message = "Request data is invalid"
+        self.field = None
+        self.messages = messages
+
+    def error_dict(self) -> dict:
+        """
+        Return dict for validation error.
+
+        :return: Validation error dict
+        :rtype: dict
+        """
+
+        return {"errors": self.messages}
+
+
+class InvalidWatermarkException(ApiException):
+    def __init__(self):
+        self.message = "Watermark is invalid"
+        self.field = "since"
+
+
+class AuthenticationException(ApiException):
+    """Exception raised when request isn't authenticated"""
+
+    MESSAGE: str = "Authentication credentials are invalid"
+    STATUS: int = 401
+
+    def __init__(self, message: str = MESSAGE):
+        super().__init__(message)
+        self.field = "token"
+
+
+class InvalidCredentialsException(AuthenticationException):
+    def __init__(self):
+        self.message = "Username or password is wrong"
+        self.field = "password"
+
+
+class ForbiddenException(ApiException):
+    """Exception raised when user acts on behalf of another user"""
+
+    MESSAGE: str = "Action is forbidden for current user"
+    STATUS: int = 403
+
+    def __init__(self, message: str = MESSAGE):
+        super().__init__(message)
+        self.field = "user_id"
+
+
+class InvalidDebugTokenException(ForbiddenException):
+    def __init__(self):
+        self.message = "Debug token is invalid"
+        self.field = "token"
+
+
+class ServiceUnavailableException(ApiException):
+    """Exception raised when server is too busy to process request"""
+
+    MESSAGE: str = "Server is overloaded, retry later"
+    STATUS: int = 503
+
+    def __init__(self, retry_after: int, message: str = MESSAGE):
+        super().__init__(message)
+        self.field = "request"
+        self.retry_after = retry_after
+
+    def response(self) -> web.Response:
+        """
+        Return the error response with `Retry-After` header.
+
+        :return: Response of the error
+        :rtype: web.Response
+        """
+
+        response = super().response()
+        response.headers[hdrs.RETRY_AFTER] = str(self.retry_after)
+
+        return response
+
+
+class InvalidCursorException(ApiException):
+    def __init__(self):
+        self.message = "Cursor is invalid"
+        self.field = "cursor"
+
+
+class CommentNotFoundException(RecordNotFoundException):
+    def __init__(self):
+        self.message = "Specified comment doesn't exist"
+        self.field = "comment_id"
+
+
+class CommentRejectedException(RecordNotFoundException):
+    def __init__(self):
+        self.message = "Post, user or replied comment doesn't exist"
+        self.field = "comment"
+
+
+class ClientIdConflictException(ApiException):
+    """Exception raised when client's id belongs to another comment"""
+
+    MESSAGE: str = "Client's id is used by another comment"
+    STATUS: int = 409
+
+    def __init__(self, message: str = MESSAGE):
+        super().__init__(message)
+        self.field = "client_id"
@@ -0,0 +1,57 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column
+
+from api.utils.exceptions import InvalidFieldsException
+
+
+FIELDS_SEPARATOR: str = ","
+
+
+def parse_fields(raw_fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse value of `fields` query parameter.
+
+    :param raw_fields: Comma separated list of fields
+    :type raw_fields: Optional[str]
+    :return: Requested fields or None if all fields are requested
+    :rtype: Optional[Tuple[str, ...]]
+    """
+
+    if raw_fields is None:
+        return None
+
+    fields = tuple(
+        field.strip()
+        for field in raw_fields.split(FIELDS_SEPARATOR)
+        if field.strip()
+    )
+
+    return fields or None
+
+
+def select_columns(
+    allowed: Dict[str, Column], fields: Optional[Iterable[str]] = None
+) -> List[Column]:
+    """
+    Translate requested fields into list of columns to select.
+
+    :param allowed: Allow-list of fields and their columns
+    :type allowed: Dict[str, Column]
+    :param fields: Requested fields, all allowed fields if not set
+    :type fields: Optional[Iterable[str]]
+    :raise InvalidFieldsException: Requested field is not allowed
+    :return: Columns to select
+    :rtype: List[Column]
+    """
+
+    if fields is None:
+        return list(allowed.values())
+
+    fields = list(dict.fromkeys(fields))  # Drop duplicates, keep order
+    unknown = [field for field in fields if field not in allowed]
+
+    if unknown or not fields:
+        raise InvalidFieldsException(FIELDS_SEPARATOR.join(unknown))
+
+    return [allowed[field] for field in fields]
@@ -0,0 +1,487 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+import asyncpg
+from asyncpg.pool import PoolConnectionProxy
+from sqlalchemy.sql import select
+
+from api.db.schema import FOLLOWERS_CHANNEL, followers
+from api.utils.tasks import setup_periodic_task
+
+
+# Type code of unsigned 32-bit ints for adjacency arrays
+ARRAY_TYPECODE: str = "I"
+
+# Is edge added, `from_user` and `to_user`
+Change = Tuple[bool, int, int]
+
+
+class FollowerGraph:
+    """
+    In-memory index of `followers` table.
+
+    Each user has two sorted arrays of ids, followees and followers,
+    so membership is answered by binary search, counts by length
+    and pages by slices.
+
+    User having any edge exists, because edges reference users by
+    foreign keys, so such user isn't checked in database.
+
+    Changes committed by all workers come from notifications of
+    `followers` table. They're recorded while the graph is reloaded and
+    applied to the new one, later changes of the old graph are forwarded
+    to the new one, because requests started before the reload keep
+    using the old one.
+    """
+
+    def __init__(self):
+        self._followees: Dict[int, array] = {}
+        self._followers: Dict[int, array] = {}
+        self._changes: Optional[List[Change]] = None
+        self._successor: Optional["FollowerGraph"] = None
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[int, int]]) -> "FollowerGraph":
+        """
+        Build graph from pairs of follower and followee.
+
+        :param edges: Pairs of `from_user` and `to_user`
+        :type edges: Iterable[Tuple[int, int]]
+        :return: Graph instance
+        :rtype: FollowerGraph
+        """
+
+        graph = cls()
+
+        for from_user, to_user in edges:
+            graph._followees.setdefault(
+                from_user, array(ARRAY_TYPECODE)
+            ).append(to_user)
+            graph._followers.setdefault(
+                to_user, array(ARRAY_TYPECODE)
+            ).append(from_user)
+
+        for adjacency in (graph._followees, graph._followers):
+            for user_id, ids in adjacency.items():
+                adjacency[user_id] = array(ARRAY_TYPECODE, sorted(set(ids)))
+
+        return graph
+
+    def __len__(self) -> int:
+        return sum(map(len, self._followees.values()))
+
+    def is_known(self, user_id: int) -> bool:
+        """
+        Check is user present in graph.
+
+        :param user_id: User's identifier
+        :type user_id: int
+        :return: Has user any follower or followee
+        :rtype: bool
+        """
+
+        return user_id in self._followees or user_id in self._followers
+
+    def is_following(self, from_user: int, to_user: int) -> bool:
+        """
+        Check is one user follows another.
+
+        :param from_user: User who follow
+        :type from_user: int
+        :param to_user: User whom follow
+        :type to_user: int
+        :return: Does user follow another user
+        :rtype: bool
+        """
+
+        ids = self._followees.get(from_user)
+
+        if not ids:
+            return False
+
+        index = bisect_left(ids, to_user)
+
+        return index < len(ids) and ids[index] == to_user
+
+    def add(self, from_user: int, to_user: int) -> bool:
+        """
+        Add edge of following.
+
+        :param from_user: User who follow
+        :type from_user: int
+        :param to_user: User whom follow
+        :type to_user: int
+        :return: Was edge added
+        :rtype: bool
+        """
+
+        # Edge may be already known, but not committed before reload
+        self._track((True, from_user, to_user))
+
+        if self.is_following(from_user, to_user):
+            return False
+
+        for adjacency, user_id, other in (
+            (self._followees, from_user, to_user),
+            (self._followers, to_user, from_user),
+        ):
+            insort(adjacency.setdefault(user_id, array(ARRAY_TYPECODE)), other)
+
+        return True
+
+    def remove(self, from_user: int, to_user: int) -> bool:
+        """
+        Remove edge of following.
+
+        :param from_user: User who unfollow
+        :type from_user: int
+        :param to_user: User whom unfollow
+        :type to_user: int
+        :return: Was edge removed
+        :rtype: bool
+        """
+
+        self._track((False, from_user, to_user))
+
+        if not self.is_following(from_user, to_user):
+            return False
+
+        discard(self._followees, from_user, to_user)
+        discard(self._followers, to_user, from_user)
+
+        return True
+
+    def record_changes(self) -> None:
+        """Start recording of added and removed edges."""
+
+        self._changes = []
+
+    def stop_recording(self) -> None:
+        """Stop recording of added and removed edges."""
+
+        self._changes = None
+
+    def replace_by(self, graph: "FollowerGraph") -> None:
+        """
+        Apply recorded changes to the new graph and forward later ones.
+
+        :param graph: Graph replacing this one
+        :type graph: FollowerGraph
+        """
+
+        for change in self._changes or ():
+            graph.apply(change)
+
+        self._changes = None
+        self._successor = graph
+
+    def apply(self, change: Change) -> None:
+        """
+        Add or remove edge of following.
+
+        :param change: Is edge added, `from_user` and `to_user`
+        :type change: Change
+        """
+
+        added, from_user, to_user = change
+
+        if added:
+            self.add(from_user, to_user)
+        else:
+            self.remove(from_user, to_user)
+
+    def remove_user(self, user_id: int) -> None:
+        """
+        Remove all edges of deleted user.
+
+        :param user_id: User's identifier
+        :type user_id: int
+        """
+
+        for to_user in self.followees(user_id):
+            self.remove(user_id, to_user)
+
+        for from_user in self.followers(user_id):
+            self.remove(from_user, user_id)
+
+    def _track(self, change: Change) -> None:
+        if self._changes is not None:
+            self._changes.append(change)
+
+        if self._successor is not None:
+            self._successor.apply(change)
+
+    def followers(
+        self,
+        user_id: int,
+        *,
+        limit: Optional[int] = None,
+        after: Optional[int] = None
+    ) -> List[int]:
+        """
+        Get page of user's followers sorted by id.
+
+        :param user_id: User's identifier
+        :type user_id: int
+        :param limit: Limit of the page
+        :type limit: Optional[int]
+        :param after: Id of last follower of previous page
+        :type after: Optional[int]
+        :return: List of followers's id
+        :rtype: List[int]
+        """
+
+        return page(self._followers.get(user_id), limit, after)
+
+    def followees(
+        self,
+        user_id: int,
+        *,
+        limit: Optional[int] = None,
+        after: Optional[int] = None
+    ) -> List[int]:
+        """
+        Get page of user's followees sorted by id.
+
+        :param user_id: User's identifier
+        :type user_id: int
+        :param limit: Limit of the page
+        :type limit: Optional[int]
+        :param after: Id of last followee of previous page
+        :type after: Optional[int]
+        :return: List of followees's id
+        :rtype: List[int]
+        """
+
+        return page(self._followees.get(user_id), limit, after)
+
+    def followers_count(self, user_id: int) -> int:
+        """
+        Get count of user's followers.
+
+        :param user_id: User's identifier
+        :type user_id: int
+        :return: Count of followers
+        :rtype: int
+        """
+
+        return len(self._followers.get(user_id, ()))
+
+    def followees_count(self, user_id: int) -> int:
+        """
+        Get count of user's followees.
+
+        :param user_id: User's identifier
+        :type user_id: int
+        :return: Count of followees
+        :rtype: int
+        """
+
+        return len(self._followees.get(user_id, ()))
+
+
+def discard(adjacency: Dict[int, array], user_id: int, other: int) -> None:
+    """
+    Remove id from sorted adjacency array of the user.
+
+    :param adjacency: Adjacency arrays of users
+    :type adjacency: Dict[int, array]
+    :param user_id: User's identifier
+    :type user_id: int
+    :param other: Id to remove
+    :type other: int
+    """
+
+    ids = adjacency[user_id]
+    del ids[bisect_left(ids, other)]
+
+    if not ids:
+        del adjacency[user_id]
+
+
+def page(
+    ids: Optional[array], limit: Optional[int], after: Optional[int]
+) -> List[int]:
+    """
+    Slice page of sorted ids.
+
+    :param ids: Sorted ids
+    :type ids: Optional[array]
+    :param limit: Limit of the page
+    :type limit: Optional[int]
+    :param after: Id preceding the page
+    :type after: Optional[int]
+    :return: Page of ids
+    :rtype: List[int]
+    """
+
+    if not ids:
+        return []
+
+    start = 0 if after is None else bisect_right(ids, after)
+    stop = None if limit is None else start + limit
+
+    return ids[start:stop].tolist()
+
+
+async def load_follower_graph(conn: PoolConnectionProxy) -> FollowerGraph:
+    """
+    Load graph from `followers` table.
+
+    :param conn: Pool of connections to database
+    :type conn: PoolConnectionProxy
+    :return: Graph instance
+    :rtype: FollowerGraph
+    """
+
+    records = await conn.fetch(
+        select([followers.c.from_user, followers.c.to_user])
+    )
+
+    return FollowerGraph.from_edges(
+        (record["from_user"], record["to_user"]) for record in records
+    )
+
+
+def setup_follower_graph(app: web.Application) -> None:
+    """
+    Setup follower graph if it's enabled by configuration.
+
+    Graph is loaded on startup or, if refresh interval is set, reloaded
+    periodically in background to restore changes whose notifications
+    were lost with listening connection, requests fall back to database
+    until the first load.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["follower_graph"] = None
+    app["follower_graph_pending"] = None
+    app["follower_graph_listener"] = None
+
+    if app["config"]["FOLLOWER_GRAPH"]:
+        if app["config"]["FOLLOWER_GRAPH_REFRESH"] is None:
+            app.on_startup.append(refresh_follower_graph)
+        else:
+            setup_periodic_task(
+                app,
+                "follower_graph_refresher",
+                refresh_follower_graph,
+                app["config"]["FOLLOWER_GRAPH_REFRESH"],
+            )
+
+    app.on_cleanup.append(close_follower_graph_listener)
+
+
+async def refresh_follower_graph(app: web.Application) -> None:
+    """
+    Replace follower graph by the one loaded from database.
+
+    Notifications are listened before the load, so changes committed
+    after its snapshot reach the graph. They're recorded by the current
+    graph while the new one loads and applied to it with changes made
+    by the worker itself.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    await listen_follower_graph(app)
+
+    current = app["follower_graph"]
+
+    if current is None:
+        # Requests use database until the first load, so changes are
+        # recorded by graph which isn't used by them
+        current = app["follower_graph_pending"] = FollowerGraph()
+
+    current.record_changes()
+
+    try:
+        async with app["db"].acquire() as conn:
+            graph = await load_follower_graph(conn)
+    except BaseException:
+        current.stop_recording()
+
+        raise
+    finally:
+        app["follower_graph_pending"] = None
+
+    current.replace_by(graph)
+
+    app["follower_graph"] = graph
+
+
+async def listen_follower_graph(app: web.Application) -> None:
+    """
+    Listen notifications about changes of `followers` table.
+
+    Connection is opened by the first call and opened again if it's
+    lost, notifications sent meanwhile are restored by reload.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    listener = app["follower_graph_listener"]
+
+    if listener is not None and not listener.is_closed():
+        return
+
+    listener = await asyncpg.connect(app["config"]["db_url"])
+    await listener.add_listener(
+        FOLLOWERS_CHANNEL, partial(apply_notification, app)
+    )
+
+    app["follower_graph_listener"] = listener
+
+
+def apply_notification(
+    app: web.Application,
+    connection: asyncpg.Connection,
+    pid: int,
+    channel: str,
+    payload: str,
+) -> None:
+    """
+    Apply change of `followers` table to follower graph.
+
+    :param app: Application instance
+    :type app: web.Application
+    :param connection: Listening connection
+    :type connection: asyncpg.Connection
+    :param pid: Id of process of database sending notification
+    :type pid: int
+    :param channel: Channel of notification
+    :type channel: str
+    :param payload: Operation, `from_user` and `to_user`
+    :type payload: str
+    """
+
+    graph = app["follower_graph"]
+
+    if graph is None:
+        graph = app["follower_graph_pending"]
+
+    if graph is None:
+        return
+
+    operation, from_user, to_user = payload.split()
+
+    graph.apply((operation == "INSERT", int(from_user), int(to_user)))
+
+
+async def close_follower_graph_listener(app: web.Application) -> None:
+    """
+    Close connection listening notifications.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    if app["follower_graph_listener"] is not None:
+        await app["follower_graph_listener"].close()
@@ -1,13 +1,43 @@
+import argparse
+import asyncio
+import base64
 import binascii
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
 import hashlib
+import hmac
+import json
 import os
-from typing import Optional
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from aiohttp import web
 
 
 BYTES_COUNT: int = 60
 SHA_ITER_COUNT: int = 100000
 HASH_FUNC: str = "sha512"
 
+HASHING_EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+HASHING_CONCURRENCY: int = 4
+
+PBKDF2_ALGORITHM: str = "pbkdf2-sha512"
+SCRYPT_ALGORITHM: str = "scrypt"
+LEGACY_ALGORITHM: str = "legacy"
+PASSWORD_SALT_SIZE: int = 16
+PASSWORD_DIGEST_SIZE: int = 64
+SCRYPT_N: int = 2 ** 14
+SCRYPT_R: int = 8
+SCRYPT_P: int = 1
+LEGACY_SALT_LENGTH: int = 64
+
 
 def get_random_bytes(count: int = BYTES_COUNT) -> bytes:
     """
@@ -67,3 +97,471 @@ def hash_string(
     hashed_string = binascii.hexlify(hashed_string)
 
     return (salt + hashed_string).decode("ascii")
+
+
+class PasswordHashPolicy(NamedTuple):
+    """Algorithm and cost parameters of new password hashes."""
+
+    algorithm: str = PBKDF2_ALGORITHM
+    iterations: int = SHA_ITER_COUNT
+    scrypt_n: int = SCRYPT_N
+
+
+class PasswordHash(NamedTuple):
+    """Parsed password hash."""
+
+    algorithm: str
+    params: Dict[str, int]
+    salt: bytes
+    digest: bytes
+
+
+_password_policy = PasswordHashPolicy()
+
+
+def get_password_policy() -> PasswordHashPolicy:
+    """
+    Get current policy of password hashing.
+
+    :return: Password hash policy
+    :rtype: PasswordHashPolicy
+    """
+
+    return _password_policy
+
+
+def set_password_policy(policy: PasswordHashPolicy) -> None:
+    """
+    Set current policy of password hashing.
+
+    :param policy: Password hash policy
+    :type policy: PasswordHashPolicy
+    """
+
+    global _password_policy
+
+    _password_policy = policy
+
+
+def make_password_hash(
+    password: str,
+    policy: Optional[PasswordHashPolicy] = None,
+    *,
+    salt: Optional[bytes] = None
+) -> str:
+    """
+    Hash password to self-describing string.
+
+    Format of the string is `$<algorithm>$<params>$<salt>$<digest>`
+    where salt and digest are encoded to base64 without padding.
+
+    :param password: Password to be hashed
+    :type password: str
+    :param policy: Algorithm and cost, current policy if not set
+    :type policy: Optional[PasswordHashPolicy]
+    :param salt: Salt for hashing
+    :type salt: Optional[bytes]
+    :raise ValueError: Algorithm isn't supported
+    :return: Password hash
+    :rtype: str
+    """
+
+    policy = get_password_policy() if policy is None else policy
+    salt = get_random_bytes(PASSWORD_SALT_SIZE) if salt is None else salt
+
+    if policy.algorithm == PBKDF2_ALGORITHM:
+        params = {"i": policy.iterations}
+    elif policy.algorithm == SCRYPT_ALGORITHM:
+        params = {"n": policy.scrypt_n, "r": SCRYPT_R, "p": SCRYPT_P}
+    else:
+        raise ValueError(f"Unsupported algorithm: {policy.algorithm}")
+
+    digest = derive_key(policy.algorithm, params, password, salt)
+
+    return "${}${}${}${}".format(
+        policy.algorithm,
+        ",".join(f"{name}={value}" for name, value in params.items()),
+        encode_base64(salt),
+        encode_base64(digest),
+    )
+
+
+def derive_key(
+    algorithm: str, params: Dict[str, int], password: str, salt: bytes
+) -> bytes:
+    """
+    Derive key from password by algorithm.
+
+    :param algorithm: Algorithm of key derivation
+    :type algorithm: str
+    :param params: Cost parameters of algorithm
+    :type params: Dict[str, int]
+    :param password: Password
+    :type password: str
+    :param salt: Salt
+    :type salt: bytes
+    :raise ValueError: Algorithm isn't supported
+    :return: Derived key
+    :rtype: bytes
+    """
+
+    if algorithm == PBKDF2_ALGORITHM:
+        return hashlib.pbkdf2_hmac(
+            HASH_FUNC, password.encode("utf-8"), salt, params["i"]
+        )
+    elif algorithm == SCRYPT_ALGORITHM:
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=params["n"],
+            r=params["r"],
+            p=params["p"],
+            maxmem=256 * params["n"] * params["r"] * params["p"],
+            dklen=PASSWORD_DIGEST_SIZE,
+        )
+
+    raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+
+def parse_password_hash(hash_: str) -> PasswordHash:
+    """
+    Parse password hash of any supported format.
+
+    Hashes without `$` prefix are legacy ones: 64 chars of hex salt
+    followed by PBKDF2-SHA512 hex digest.
+
+    :param hash_: Password hash
+    :type hash_: str
+    :raise ValueError: Hash is malformed
+    :return: Parsed password hash
+    :rtype: PasswordHash
+    """
+
+    if not hash_.startswith("$"):
+        return PasswordHash(
+            algorithm=LEGACY_ALGORITHM,
+            params={"i": SHA_ITER_COUNT},
+            salt=hash_[:LEGACY_SALT_LENGTH].encode("ascii"),
+            digest=hash_[LEGACY_SALT_LENGTH:].encode("ascii"),
+        )
+
+    _, algorithm, params, salt, digest = hash_.split("$")
+
+    return PasswordHash(
+        algorithm=algorithm,
+        params={
+            name: int(value)
+            for name, value in (
+                param.split("=") for param in params.split(",")
+            )
+        },
+        salt=decode_base64(salt),
+        digest=decode_base64(digest),
+    )
+
+
+def verify_password_hash(password: str, hash_: str) -> bool:
+    """
+    Check password against hash of any supported format.
+
+    :param password: Password to check
+    :type password: str
+    :param hash_: Password hash
+    :type hash_: str
+    :return: Result of comparison
+    :rtype: bool
+    """
+
+    try:
+        parsed = parse_password_hash(hash_)
+    except (ValueError, binascii.Error):
+        return False
+
+    if parsed.algorithm == LEGACY_ALGORITHM:
+        return hmac.compare_digest(
+            hash_string(password, salt=parsed.salt), hash_
+        )
+
+    try:
+        digest = derive_key(
+            parsed.algorithm, parsed.params, password, parsed.salt
+        )
+    except (KeyError, ValueError):
+        return False
+
+    return hmac.compare_digest(digest, parsed.digest)
+
+
+def needs_rehash(
+    hash_: str, policy: Optional[PasswordHashPolicy] = None
+) -> bool:
+    """
+    Check is password hash weaker than the policy.
+
+    :param hash_: Password hash
+    :type hash_: str
+    :param policy: Algorithm and cost, current policy if not set
+    :type policy: Optional[PasswordHashPolicy]
+    :return: Should password be hashed again
+    :rtype: bool
+    """
+
+    policy = get_password_policy() if policy is None else policy
+
+    try:
+        parsed = parse_password_hash(hash_)
+    except (ValueError, binascii.Error):
+        return True
+
+    if parsed.algorithm != policy.algorithm:
+        return True
+    elif parsed.algorithm == PBKDF2_ALGORITHM:
+        return parsed.params.get("i", 0) < policy.iterations
+    elif parsed.algorithm == SCRYPT_ALGORITHM:
+        return parsed.params.get("n", 0) < policy.scrypt_n
+
+    return True
+
+
+def encode_base64(data: bytes) -> str:
+    """
+    Encode bytes to base64 string without padding.
+
+    :param data: Bytes to encode
+    :type data: bytes
+    :return: Base64 string
+    :rtype: str
+    """
+
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_base64(data: str) -> bytes:
+    """
+    Decode base64 string without padding.
+
+    :param data: Base64 string
+    :type data: str
+    :return: Decoded bytes
+    :rtype: bytes
+    """
+
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def calibrate(
+    algorithm: str = PBKDF2_ALGORITHM, target: float = 0.1
+) -> PasswordHashPolicy:
+    """
+    Find cost of hashing which takes target time on this hardware.
+
+    :param algorithm: Algorithm to calibrate
+    :type algorithm: str
+    :param target: Target time of hashing in seconds
+    :type target: float
+    :raise ValueError: Algorithm isn't supported
+    :return: Password hash policy
+    :rtype: PasswordHashPolicy
+    """
+
+    if algorithm == PBKDF2_ALGORITHM:
+        sample = 10000
+        elapsed = measure_hashing(PasswordHashPolicy(iterations=sample))
+        iterations = max(int(sample * target / elapsed) // 1000, 1) * 1000
+
+        return PasswordHashPolicy(algorithm=algorithm, iterations=iterations)
+    elif algorithm == SCRYPT_ALGORITHM:
+        scrypt_n = 2 ** 10
+
+        # Time of scrypt grows linearly with n which must be power of 2
+        while measure_hashing(
+            PasswordHashPolicy(algorithm=algorithm, scrypt_n=scrypt_n * 2)
+        ) <= target:
+            scrypt_n *= 2
+
+        return PasswordHashPolicy(algorithm=algorithm, scrypt_n=scrypt_n)
+
+    raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+
+def measure_hashing(policy: PasswordHashPolicy, repeat: int = 3) -> float:
+    """
+    Measure the best time of password hashing by policy.
+
+    :param policy: Algorithm and cost of hashing
+    :type policy: PasswordHashPolicy
+    :param repeat: Count of measurements
+    :type repeat: int
+    :return: Time of hashing in seconds
+    :rtype: float
+    """
+
+    timings = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        make_password_hash("Calibration password", policy)
+        timings.append(time.perf_counter() - started)
+
+    return min(timings)
+
+
+async def hash_string_async(string: str, **kwargs) -> str:
+    """
+    Hash string in executor of hashing pool not to block event loop.
+
+    :param string: String to be hashed
+    :type string: str
+    :param kwargs: Parameters of `hash_string`
+    :type kwargs: dict
+    :return: Hashed string
+    :rtype: str
+    """
+
+    return await get_hashing_pool().run(hash_string, string, **kwargs)
+
+
+class HashingPool:
+    """Executor for CPU-heavy hashing with limit of concurrent jobs."""
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        workers: Optional[int] = None,
+        concurrency: int = HASHING_CONCURRENCY,
+    ):
+        self.executor: Executor = HASHING_EXECUTORS[kind](max_workers=workers)
+        self.concurrency = concurrency
+        self._loop = None
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Semaphore of jobs bound to the running event loop."""
+
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        return self._semaphore
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run function in executor, wait in queue if limit is reached.
+
+        :param func: Function to run
+        :type func: Callable
+        :return: Result of function
+        :rtype: Any
+        """
+
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(func, *args, **kwargs)
+            )
+
+    def close(self) -> None:
+        """Shutdown executor."""
+
+        self.executor.shutdown(wait=True)
+
+
+_hashing_pool: Optional[HashingPool] = None
+
+
+def get_hashing_pool() -> HashingPool:
+    """
+    Get hashing pool of application or default one.
+
+    :return: Hashing pool
+    :rtype: HashingPool
+    """
+
+    global _hashing_pool
+
+    if _hashing_pool is None:
+        _hashing_pool = HashingPool()
+
+    return _hashing_pool
+
+
+def setup_hashing(app: web.Application) -> None:
+    """
+    Setup hashing pool by application configuration.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    global _hashing_pool
+
+    config = app["config"]
+
+    set_password_policy(
+        PasswordHashPolicy(
+            algorithm=config["PASSWORD_HASH_ALGORITHM"],
+            iterations=config["PASSWORD_HASH_ITERATIONS"],
+            scrypt_n=config["PASSWORD_HASH_SCRYPT_N"],
+        )
+    )
+
+    app["hashing_pool"] = _hashing_pool = HashingPool(
+        kind=config["HASHING_EXECUTOR"],
+        workers=config["HASHING_WORKERS"],
+        concurrency=config["HASHING_CONCURRENCY"],
+    )
+
+    app.on_cleanup.append(close_hashing_pool)
+
+
+async def close_hashing_pool(app: web.Application) -> None:
+    """
+    Shutdown hashing pool of application.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    global _hashing_pool
+
+    pool = app["hashing_pool"]
+
+    if _hashing_pool is pool:
+        _hashing_pool = None
+
+    pool.close()
+
+
+def main() -> None:
+    """Calibrate cost of password hashing for target latency."""
+
+    parser = argparse.ArgumentParser(prog="python -m api.utils.hashing")
+    parser.add_argument(
+        "--algorithm",
+        choices=(PBKDF2_ALGORITHM, SCRYPT_ALGORITHM),
+        default=PBKDF2_ALGORITHM,
+    )
+    parser.add_argument(
+        "--target-ms", type=float, default=100, help="target latency"
+    )
+    options = parser.parse_args()
+
+    policy = calibrate(options.algorithm, options.target_ms / 1000)
+
+    print(
+        json.dumps(
+            {
+                "PASSWORD_HASH_ALGORITHM": policy.algorithm,
+                "PASSWORD_HASH_ITERATIONS": policy.iterations,
+                "PASSWORD_HASH_SCRYPT_N": policy.scrypt_n,
+                "measured_ms": round(measure_hashing(policy) * 1000, 1),
+            },
+            indent=4,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
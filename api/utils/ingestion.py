@@ -0,0 +1,267 @@
+import asyncio
+from contextlib import suppress
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+from asyncpg.pool import Pool
+
+from api.logic.posts import insert_comments
+from api.utils.exceptions import ServiceUnavailableException
+
+
+logger = logging.getLogger(__name__)
+
+# Post's id, user's id, replied comment's id, text and client's id
+CommentRecord = Tuple[int, int, Optional[int], str, str]
+# Comment, future of its id if queue is durable and count of failed writes
+QueueItem = Tuple[CommentRecord, Optional[asyncio.Future], int]
+
+
+class CommentQueue:
+    """
+    Write-behind queue of comments flushed to database in batches.
+
+    Comments are acknowledged before they're written unless queue is
+    durable, then acknowledgement waits for the flush. Acknowledged
+    comments of failed flush are queued again until attempts run out.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        batch_size: int,
+        interval: float,
+        durable: bool = False,
+        retry_after: int = 1,
+        flush_attempts: int = 3,
+        flush_retry_interval: float = 1.0
+    ):
+        """
+        :param maxsize: Max count of queued comments, the rest are rejected
+        :type maxsize: int
+        :param batch_size: Max count of comments written by one flush
+        :type batch_size: int
+        :param interval: Seconds of collecting comments for a flush
+        :type interval: float
+        :param durable: Wait for the flush before acknowledgement
+        :type durable: bool
+        :param retry_after: Value of `Retry-After` header of rejections
+        :type retry_after: int
+        :param flush_attempts: Max count of writes of acknowledged comment
+        :type flush_attempts: int
+        :param flush_retry_interval: Seconds of pause after failed flush
+        :type flush_retry_interval: float
+        """
+
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self.durable = durable
+        self.retry_after = retry_after
+        self.flush_attempts = flush_attempts
+        self.flush_retry_interval = flush_retry_interval
+
+        self.flushed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.retried = 0
+
+        self._pool: Optional[Pool] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Future] = None
+        self._batch: List[QueueItem] = []
+
+    async def start(self, pool: Pool) -> None:
+        """
+        Start flushing of comments.
+
+        :param pool: Pool of connections to database
+        :type pool: Pool
+        """
+
+        self._pool = pool
+        self._queue = asyncio.Queue(self.maxsize)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop flushing and write comments left in queue."""
+
+        self._task.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await self._task
+
+        # Write of cancelled flush is repeated, duplicates are skipped
+        if self._batch:
+            await self._flush(self._batch)
+            self._batch = []
+
+        while not self._queue.empty():
+            await self._flush(self._take(self.batch_size))
+
+    def submit(self, record: CommentRecord) -> Optional[asyncio.Future]:
+        """
+        Put comment into queue.
+
+        :param record: Comment to write
+        :type record: CommentRecord
+        :raise ServiceUnavailableException: Queue is full
+        :return: Future of comment's id if queue is durable, comment's id
+            is None if comment is skipped
+        :rtype: Optional[asyncio.Future]
+        """
+
+        future = (
+            asyncio.get_event_loop().create_future() if self.durable else None
+        )
+
+        try:
+            self._queue.put_nowait((record, future, 0))
+        except asyncio.QueueFull:
+            self.rejected += 1
+
+            raise ServiceUnavailableException(self.retry_after)
+
+        return future
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get current state and counters of the queue.
+
+        :return: Stats of the queue
+        :rtype: Dict[str, int]
+        """
+
+        return {
+            "size": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+            "flushed": self.flushed,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "retried": self.retried,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            self._batch = [await self._queue.get()]
+
+            # Let the burst accumulate to write it by one query
+            await asyncio.sleep(self.interval)
+
+            self._batch.extend(self._take(self.batch_size - 1))
+            written = await self._flush(self._batch)
+            self._batch = []
+
+            if not written:
+                # Database is likely unavailable, so let it recover
+                await asyncio.sleep(self.flush_retry_interval)
+
+    def _take(self, count: int) -> List[QueueItem]:
+        items = []
+
+        while len(items) < count and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+
+        return items
+
+    async def _flush(self, items: List[QueueItem]) -> bool:
+        try:
+            async with self._pool.acquire() as conn:
+                comment_ids = await insert_comments(
+                    conn, [record for record, _, _ in items]
+                )
+        except Exception as exc:
+            logger.exception("Flush of %d comments failed", len(items))
+
+            for item in items:
+                self._retry(item, exc)
+
+            return False
+
+        for record, future, _ in items:
+            comment_id = comment_ids.get(record[-1])
+
+            if comment_id is None:
+                self.dropped += 1
+            else:
+                self.flushed += 1
+
+            if future is not None and not future.done():
+                future.set_result(comment_id)
+
+        return True
+
+    def _retry(self, item: QueueItem, exc: Exception) -> None:
+        record, future, failures = item
+
+        # Client of durable queue gets the error and retries by itself
+        if future is not None:
+            if not future.done():
+                future.set_exception(exc)
+
+            return
+
+        if failures + 1 < self.flush_attempts:
+            try:
+                self._queue.put_nowait((record, None, failures + 1))
+            except asyncio.QueueFull:
+                pass
+            else:
+                self.retried += 1
+
+                return
+
+        self.dropped += 1
+        logger.error("Comment %s is dropped after failed flush", record[-1])
+
+
+def setup_comment_queue(app: web.Application) -> None:
+    """
+    Setup write-behind queue of comments if it's enabled.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    config = app["config"]
+
+    app["comment_queue"] = None
+
+    if not config["COMMENT_QUEUE"]:
+        return
+
+    app["comment_queue"] = CommentQueue(
+        maxsize=config["COMMENT_QUEUE_SIZE"],
+        batch_size=config["COMMENT_QUEUE_BATCH"],
+        interval=config["COMMENT_QUEUE_INTERVAL"],
+        durable=config["COMMENT_QUEUE_DURABLE"],
+        flush_attempts=config["COMMENT_QUEUE_FLUSH_ATTEMPTS"],
+        flush_retry_interval=config["COMMENT_QUEUE_RETRY_INTERVAL"],
+    )
+
+    app.on_startup.append(start_comment_queue)
+    app.on_cleanup.append(close_comment_queue)
+
+
+async def start_comment_queue(app: web.Application) -> None:
+    """
+    Start flushing of comments.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    await app["comment_queue"].start(app["db"])
+
+
+async def close_comment_queue(app: web.Application) -> None:
+    """
+    Write comments left in queue.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    await app["comment_queue"].close()
@@ -0,0 +1,196 @@
+import asyncio
+from contextlib import suppress
+import logging
+import sys
+import threading
+from time import perf_counter
+import traceback
+from types import FrameType
+from typing import Optional
+
+from aiohttp import web
+
+from api.utils.metrics import Counter, Histogram, Registry
+from api.utils.request_metrics import get_route_template
+
+
+logger = logging.getLogger(__name__)
+
+# Route label of blocks outside of requests, e.g. in background tasks
+NO_ROUTE: str = "none"
+
+
+class LoopMonitor:
+    """
+    Watchdog of event loop measuring its lag and reporting blocks.
+
+    A task of the loop sleeps for interval and records how late it
+    wakes up. A helper thread checks time of the last wake up, when the
+    loop is blocked longer than threshold the stack of the loop's thread
+    is logged with route of the request being served.
+    """
+
+    def __init__(self, registry: Registry, interval: float, threshold: float):
+        """
+        :param registry: Registry to expose metrics by
+        :type registry: Registry
+        :param interval: Seconds between measurements of lag
+        :type interval: float
+        :param threshold: Seconds of block to report
+        :type threshold: float
+        """
+
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = registry.register(
+            Histogram("event_loop_lag_seconds", "Delay of event loop")
+        )
+        self.blocks = registry.register(
+            Counter(
+                "event_loop_blocks_total",
+                "Blocks of event loop longer than threshold",
+                ("route",),
+            )
+        )
+        self._heartbeat = perf_counter()
+        self._reported: Optional[float] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start measuring lag of the running loop and watching it."""
+
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = perf_counter()
+        self._stop.clear()
+        self._task = asyncio.ensure_future(self._measure())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    async def close(self) -> None:
+        """Stop measuring and watching."""
+
+        self._stop.set()
+        self._task.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await self._task
+
+        self._thread.join()
+
+    async def _measure(self) -> None:
+        while True:
+            expected = perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = perf_counter()
+
+            self.lag.observe(value=max(0.0, now - expected))
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            heartbeat = self._heartbeat
+            blocked = perf_counter() - heartbeat - self.interval
+
+            # Each block is reported once, when it crosses threshold
+            if blocked > self.threshold and self._reported != heartbeat:
+                self._reported = heartbeat
+                self.report(blocked)
+
+    def report(self, seconds: float) -> None:
+        """
+        Log stack of the loop's thread and route of its request.
+
+        :param seconds: Seconds of the block so far
+        :type seconds: float
+        """
+
+        frame = sys._current_frames().get(self._loop_thread)
+
+        if frame is None:
+            return
+
+        route = find_route(frame)
+        self.blocks.inc(route)
+        logger.warning(
+            "Event loop blocked for %.3fs serving %s\n%s",
+            seconds,
+            route,
+            "".join(traceback.format_stack(frame)),
+        )
+
+
+def find_route(frame: FrameType) -> str:
+    """
+    Find route of request handled by the stack.
+
+    Frames are walked from the innermost one to the first one having
+    request in its locals, e.g. handler, view or middleware.
+
+    :param frame: The innermost frame of stack
+    :type frame: FrameType
+    :return: Template of the route
+    :rtype: str
+    """
+
+    while frame is not None:
+        local_vars = frame.f_locals
+        request = local_vars.get("request")
+
+        if request is None:
+            request = getattr(local_vars.get("self"), "request", None)
+
+        if isinstance(request, web.Request):
+            return get_route_template(request)
+
+        frame = frame.f_back
+
+    return NO_ROUTE
+
+
+def setup_loop_monitor(app: web.Application) -> None:
+    """
+    Setup watchdog of event loop if it's enabled.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    config = app["config"]
+
+    if config["LOOP_MONITOR_INTERVAL"] is None:
+        return
+
+    app["loop_monitor"] = LoopMonitor(
+        app["metrics"],
+        config["LOOP_MONITOR_INTERVAL"],
+        config["LOOP_BLOCK_THRESHOLD"],
+    )
+    app.on_startup.append(start_loop_monitor)
+    app.on_cleanup.append(close_loop_monitor)
+
+
+async def start_loop_monitor(app: web.Application) -> None:
+    """
+    Start watchdog of event loop.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["loop_monitor"].start()
+
+
+async def close_loop_monitor(app: web.Application) -> None:
+    """
+    Stop watchdog of event loop.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    await app["loop_monitor"].close()
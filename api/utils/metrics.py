@@ -0,0 +1,268 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from aiohttp import web
+
+
+METRICS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of latency buckets in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class Metric:
+    """Family of samples of one metric split by values of labels."""
+
+    type: str = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ):
+        """
+        :param name: Name of the metric
+        :type name: str
+        :param documentation: Description of the metric
+        :type documentation: str
+        :param labels: Names of labels
+        :type labels: Sequence[str]
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def render(self) -> Iterator[str]:
+        """
+        Render the metric in Prometheus text format.
+
+        :return: Lines of the metric
+        :rtype: Iterator[str]
+        """
+
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+
+        yield from self.samples()
+
+    def samples(self) -> Iterator[str]:
+        """
+        Render samples of the metric.
+
+        :return: Lines of samples
+        :rtype: Iterator[str]
+        """
+
+        raise NotImplementedError
+
+    def format_labels(self, values: Tuple[str, ...], **extra: str) -> str:
+        """
+        Format labels of sample.
+
+        :param values: Values of metric's labels
+        :type values: Tuple[str, ...]
+        :param extra: Labels of the sample itself
+        :type extra: str
+        :return: Labels in braces or empty string
+        :rtype: str
+        """
+
+        pairs = [*zip(self.labels, values), *extra.items()]
+
+        if not pairs:
+            return ""
+
+        return "{%s}" % ",".join(
+            f'{name}="{escape_label(str(value))}"' for name, value in pairs
+        )
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        """
+        Increase the value.
+
+        :param labels: Values of labels
+        :type labels: str
+        :param value: Increment
+        :type value: float
+        """
+
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{self.format_labels(labels)} {value}"
+
+
+class Gauge(Counter):
+    """Value which goes up and down."""
+
+    type = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        """
+        Set the value.
+
+        :param labels: Values of labels
+        :type labels: str
+        :param value: Current value
+        :type value: float
+        """
+
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    """Counts of observed values by buckets with their sum."""
+
+    type = "histogram"
+
+    def __init__(
+        self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # Counts of values per bucket, the last one is +Inf, and their sum
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        """
+        Observe the value.
+
+        :param labels: Values of labels
+        :type labels: str
+        :param value: Observed value
+        :type value: float
+        """
+
+        if labels not in self.values:
+            self.values[labels] = [0] * (len(self.buckets) + 1), [0.0]
+
+        counts, total = self.values[labels]
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, *labels: str) -> int:
+        """
+        Get count of observed values.
+
+        :param labels: Values of labels
+        :type labels: str
+        :return: Count of values
+        :rtype: int
+        """
+
+        counts, _ = self.values.get(labels, ((), None))
+
+        return sum(counts)
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield "%s_bucket%s %d" % (
+                    self.name,
+                    self.format_labels(labels, le=bound),
+                    cumulative,
+                )
+
+            yield f"{self.name}_sum{self.format_labels(labels)} {total[0]}"
+            yield f"{self.name}_count{self.format_labels(labels)} {cumulative}"
+
+
+class Registry:
+    """Metrics exposed by the worker."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add metric to the registry.
+
+        :param metric: Metric to expose
+        :type metric: Metric
+        :raise ValueError: Metric with the same name is registered
+        :return: The same metric
+        :rtype: Metric
+        """
+
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self.metrics[metric.name] = metric
+
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in Prometheus text format.
+
+        Collectors update metrics read on demand, e.g. gauges, before
+        rendering.
+
+        :return: Text of metrics
+        :rtype: str
+        """
+
+        for collector in self.collectors:
+            collector()
+
+        lines = [
+            line
+            for metric in self.metrics.values()
+            for line in metric.render()
+        ]
+
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value: str) -> str:
+    """
+    Escape value of label for Prometheus text format.
+
+    :param value: Value of label
+    :type value: str
+    :return: Escaped value
+    :rtype: str
+    """
+
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def setup_metrics(app: web.Application) -> None:
+    """
+    Setup registry of metrics.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["metrics"] = Registry()
@@ -0,0 +1,42 @@
+import datetime
+from typing import Any
+
+from asyncpg import Record
+import msgpack
+
+
+def to_msgpack(data: Any) -> bytes:
+    """
+    Decorator over usual msgpack.packb function with specific parameters.
+
+    :param data: Data to serialize in MessagePack format
+    :param data: Any
+    :return: MessagePack bytes
+    :rtype: bytes
+    """
+
+    return msgpack.packb(
+        data, default=perfect_msgpack_serializer, use_bin_type=True
+    )
+
+
+def perfect_msgpack_serializer(value: Any) -> Any:
+    """
+    Make some types of objects serializable to MessagePack.
+
+    :param value: Value to transform
+    :type value: Any
+    :raise TypeError: Value can't be serialized
+    :return: MessagePack serializable object
+    :rtype: Any
+    """
+
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:  # Naive datetimes are stored in UTC
+            value = value.replace(tzinfo=datetime.timezone.utc)
+
+        return value.timestamp()
+    elif isinstance(value, Record):
+        return dict(value)
+
+    raise TypeError(f"Object of type {type(value)} is not serializable")
@@ -0,0 +1,150 @@
+import asyncio
+from collections import Counter
+import math
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from api.utils.exceptions import ServiceUnavailableException
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of all threads of the worker.
+
+    A helper thread takes stacks of the other threads every interval,
+    so profiled code isn't traced and runs at full speed. Samples are
+    taken by wall clock, threads waiting for I/O are sampled too.
+    """
+
+    def __init__(self, interval: float):
+        """
+        :param interval: Seconds between samples
+        :type interval: float
+        """
+
+        self.interval = interval
+        self._until: Optional[float] = None
+
+    async def profile(self, seconds: float) -> Dict[str, int]:
+        """
+        Sample stacks for given time, one session runs at a time.
+
+        :param seconds: Duration of profiling
+        :type seconds: float
+        :raise ServiceUnavailableException: Another session is running
+        :return: Count of samples of each collapsed stack
+        :rtype: Dict[str, int]
+        """
+
+        if self._until is not None:
+            raise ServiceUnavailableException(
+                max(1, math.ceil(self._until - time.monotonic())),
+                "Profiling is already running",
+            )
+
+        self._until = time.monotonic() + seconds
+        stop = threading.Event()
+        future = asyncio.get_running_loop().run_in_executor(
+            None, self.sample, seconds, stop
+        )
+
+        # Session ends when sampling thread does, not when request does
+        future.add_done_callback(self._finish)
+
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            stop.set()
+
+            raise
+
+    def _finish(self, future: asyncio.Future) -> None:
+        self._until = None
+
+    def sample(
+        self, seconds: float, stop: Optional[threading.Event] = None
+    ) -> Dict[str, int]:
+        """
+        Sample stacks of threads except for the current one.
+
+        :param seconds: Duration of sampling
+        :type seconds: float
+        :param stop: Event stopping sampling before the end
+        :type stop: Optional[threading.Event]
+        :return: Count of samples of each collapsed stack
+        :rtype: Dict[str, int]
+        """
+
+        current = threading.get_ident()
+        stacks = Counter()
+        deadline = time.perf_counter() + seconds
+        stop = stop or threading.Event()
+
+        while time.perf_counter() < deadline and not stop.is_set():
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+
+            for ident, frame in sys._current_frames().items():
+                if ident != current:
+                    stacks[collapse_stack(names.get(ident, ident), frame)] += 1
+
+            stop.wait(self.interval)
+
+        return dict(stacks)
+
+
+def collapse_stack(thread: str, frame: FrameType) -> str:
+    """
+    Format stack as `thread;module:function;...` from root to leaf.
+
+    :param thread: Name of the thread
+    :type thread: str
+    :param frame: The innermost frame of stack
+    :type frame: FrameType
+    :return: Collapsed stack
+    :rtype: str
+    """
+
+    names = []
+
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{frame.f_code.co_name}")
+        frame = frame.f_back
+
+    # Spaces separate stacks from counts and semicolons separate frames
+    names.append(str(thread).replace(" ", "_").replace(";", "_"))
+
+    return ";".join(reversed(names))
+
+
+def render_collapsed(stacks: Dict[str, int]) -> str:
+    """
+    Render stacks in collapsed format read by flamegraph tools.
+
+    :param stacks: Count of samples of each collapsed stack
+    :type stacks: Dict[str, int]
+    :return: Line `stack count` for each stack
+    :rtype: str
+    """
+
+    return "".join(
+        f"{stack} {count}\n" for stack, count in sorted(stacks.items())
+    )
+
+
+def setup_profiler(app: web.Application) -> None:
+    """
+    Setup profiler of the worker.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["profiler"] = SamplingProfiler(app["config"]["PROFILE_INTERVAL"])
@@ -0,0 +1,212 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterator, Optional
+
+from aiohttp import web
+
+from api.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+# Route label of requests which matched no route, raw paths aren't used
+# as labels to keep count of samples bounded
+UNMATCHED_ROUTE: str = "unmatched"
+
+# Time of the handler except for the other phases
+HANDLER_PHASE: str = "handler"
+
+# Upper bounds of response size buckets in bytes
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Seconds spent by the current request in each phase
+request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_phases", default=None
+)
+
+
+class RequestMetrics:
+    """Metrics of requests labeled by method and route template."""
+
+    def __init__(self, registry: Registry):
+        """
+        :param registry: Registry to expose metrics by
+        :type registry: Registry
+        """
+
+        labels = ("method", "route")
+
+        self.latency = registry.register(
+            Histogram(
+                "http_request_duration_seconds", "Latency of requests", labels
+            )
+        )
+        self.phases = registry.register(
+            Histogram(
+                "http_request_phase_seconds",
+                "Time of requests by phases",
+                (*labels, "phase"),
+            )
+        )
+        self.responses = registry.register(
+            Counter("http_responses_total", "Responses", (*labels, "status"))
+        )
+        self.sizes = registry.register(
+            Histogram(
+                "http_response_size_bytes",
+                "Size of responses bodies",
+                labels,
+                buckets=SIZE_BUCKETS,
+            )
+        )
+        self.in_flight = registry.register(
+            Gauge("http_requests_in_flight", "Requests in progress", labels)
+        )
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        size: int,
+        phases: Dict[str, float],
+    ) -> None:
+        """
+        Record finished request.
+
+        :param method: HTTP method
+        :type method: str
+        :param route: Template of matched route
+        :type route: str
+        :param status: Status of response
+        :type status: int
+        :param seconds: Duration of the request
+        :type seconds: float
+        :param size: Size of response body
+        :type size: int
+        :param phases: Seconds spent in each phase
+        :type phases: Dict[str, float]
+        """
+
+        self.latency.observe(method, route, value=seconds)
+        self.responses.inc(method, route, str(status))
+        self.sizes.observe(method, route, value=size)
+
+        for phase, phase_seconds in phases.items():
+            self.phases.observe(method, route, phase, value=phase_seconds)
+
+        self.phases.observe(
+            method,
+            route,
+            HANDLER_PHASE,
+            value=max(0.0, seconds - sum(phases.values())),
+        )
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+    """
+    Context which adds its duration to the phase of current request.
+
+    :param phase: Name of the phase, e.g. `serialization`
+    :type phase: str
+    """
+
+    start = perf_counter()
+
+    try:
+        yield
+    finally:
+        add_phase_time(phase, perf_counter() - start)
+
+
+def add_phase_time(phase: str, seconds: float) -> None:
+    """
+    Add time to the phase of current request, if it's measured.
+
+    :param phase: Name of the phase, e.g. `db`
+    :type phase: str
+    :param seconds: Spent time
+    :type seconds: float
+    """
+
+    phases = request_phases.get()
+
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+def get_route_template(request: web.Request) -> str:
+    """
+    Get template of the route matched by request, e.g. `/users/{user_id}`.
+
+    :param request: Input request
+    :type request: web.Request
+    :return: Template of the route
+    :rtype: str
+    """
+
+    resource = request.match_info.route.resource
+
+    if resource is None:
+        return UNMATCHED_ROUTE
+
+    return resource.canonical
+
+
+@web.middleware
+async def request_metrics_middleware(
+    request: web.Request, handler: Callable
+) -> web.StreamResponse:
+    """
+    Record latency, status, size and phases of the request.
+
+    :param request: Input request
+    :type request: web.Request
+    :param handler: Request handler
+    :type handler: Callable
+    :return: Response
+    :rtype: web.StreamResponse
+    """
+
+    metrics = request.app["request_metrics"]
+    method, route = request.method, get_route_template(request)
+    phases = {}
+    token = request_phases.set(phases)
+    status, size = 500, 0
+
+    metrics.in_flight.inc(method, route)
+    start = perf_counter()
+
+    try:
+        response = await handler(request)
+        status, size = response.status, response.content_length or 0
+
+        return response
+    except web.HTTPException as exc:
+        status, size = exc.status, exc.content_length or 0
+
+        raise
+    finally:
+        seconds = perf_counter() - start
+
+        metrics.in_flight.inc(method, route, value=-1)
+        metrics.observe(method, route, status, seconds, size, phases)
+        request_phases.reset(token)
+
+
+def setup_request_metrics(app: web.Application) -> None:
+    """
+    Setup metrics of requests if they're enabled.
+
+    Middleware is added first to measure the others too.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    if not app["config"]["REQUEST_METRICS"]:
+        return
+
+    app["request_metrics"] = RequestMetrics(app["metrics"])
+    app.middlewares.append(request_metrics_middleware)
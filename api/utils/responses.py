@@ -0,0 +1,105 @@
+from typing import Any, Dict
+
+from aiohttp import hdrs, web
+
+from api.utils.json_serializers import to_json
+from api.utils.msgpack_serializers import to_msgpack
+from api.utils.request_metrics import timed_phase
+
+
+JSON_CONTENT_TYPE: str = "application/json"
+MSGPACK_CONTENT_TYPE: str = "application/msgpack"
+MSGPACK_CONTENT_TYPES = (MSGPACK_CONTENT_TYPE, "application/x-msgpack")
+
+
+def make_response(
+    request: web.Request, data: Any, *, status: int = 200
+) -> web.Response:
+    """
+    Serialize data to the format negotiated by `Accept` header.
+
+    JSON is used by default, MessagePack is used only if client
+    prefers it.
+
+    :param request: Input request
+    :type request: web.Request
+    :param data: Data to serialize
+    :type data: Any
+    :param status: Response status
+    :type status: int
+    :return: Response
+    :rtype: web.Response
+    """
+
+    if accepts_msgpack(request):
+        with timed_phase("serialization"):
+            body = to_msgpack(data)
+
+        response = web.Response(
+            body=body, status=status, content_type=MSGPACK_CONTENT_TYPE
+        )
+    else:
+        with timed_phase("serialization"):
+            text = to_json(data)
+
+        response = web.json_response(text=text, status=status)
+
+    response.headers[hdrs.VARY] = hdrs.ACCEPT
+
+    return response
+
+
+def accepts_msgpack(request: web.Request) -> bool:
+    """
+    Check is MessagePack preferred by the client over JSON.
+
+    :param request: Input request
+    :type request: web.Request
+    :return: Is MessagePack preferred
+    :rtype: bool
+    """
+
+    accept = request.headers.get(hdrs.ACCEPT)
+
+    if not accept or "msgpack" not in accept:
+        return False
+
+    qualities = parse_accept(accept)
+    msgpack_quality = max(
+        qualities.get(content_type, 0.0)
+        for content_type in MSGPACK_CONTENT_TYPES
+    )
+
+    return msgpack_quality > 0 and msgpack_quality >= qualities.get(
+        JSON_CONTENT_TYPE, 0.0
+    )
+
+
+def parse_accept(accept: str) -> Dict[str, float]:
+    """
+    Parse `Accept` header into qualities of media types.
+
+    :param accept: Value of `Accept` header
+    :type accept: str
+    :return: Quality of each media type
+    :rtype: Dict[str, float]
+    """
+
+    qualities = {}
+
+    for media_range in accept.split(","):
+        content_type, *params = media_range.split(";")
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.strip().partition("=")
+
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[content_type.strip().lower()] = quality
+
+    return qualities
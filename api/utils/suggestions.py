@@ -0,0 +1,34 @@
+from aiohttp import web
+
+from api.logic.suggestions import update_suggestions
+from api.utils.tasks import setup_periodic_task
+
+
+def setup_suggestions(app: web.Application) -> None:
+    """
+    Setup periodic update of suggested users.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    setup_periodic_task(
+        app,
+        "suggestions_updater",
+        refresh_suggestions,
+        app["config"]["SUGGESTIONS_REFRESH"],
+    )
+
+
+async def refresh_suggestions(app: web.Application) -> None:
+    """
+    Recompute suggested users.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    async with app["db"].acquire() as conn:
+        await update_suggestions(
+            conn, limit=app["config"]["SUGGESTIONS_LIMIT"]
+        )
@@ -0,0 +1,73 @@
+import asyncio
+from contextlib import suppress
+import logging
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+
+
+logger = logging.getLogger(__name__)
+
+
+def setup_periodic_task(
+    app: web.Application,
+    name: str,
+    func: Callable[[web.Application], Awaitable],
+    interval: Optional[float],
+) -> None:
+    """
+    Run function in background periodically while application works.
+
+    :param app: Application instance
+    :type app: web.Application
+    :param name: Key of the task in application
+    :type name: str
+    :param func: Coroutine function called with application
+    :type func: Callable[[web.Application], Awaitable]
+    :param interval: Seconds between runs, task is disabled if None
+    :type interval: Optional[float]
+    """
+
+    if interval is None:
+        return
+
+    async def start_task(app: web.Application) -> None:
+        app[name] = asyncio.ensure_future(
+            run_periodically(app, func, interval)
+        )
+
+    async def stop_task(app: web.Application) -> None:
+        app[name].cancel()
+
+        with suppress(asyncio.CancelledError):
+            await app[name]
+
+    app.on_startup.append(start_task)
+    app.on_cleanup.append(stop_task)
+
+
+async def run_periodically(
+    app: web.Application,
+    func: Callable[[web.Application], Awaitable],
+    interval: float,
+) -> None:
+    """
+    Call function every interval, errors are logged and don't stop it.
+
+    :param app: Application instance
+    :type app: web.Application
+    :param func: Coroutine function called with application
+    :type func: Callable[[web.Application], Awaitable]
+    :param interval: Seconds between runs
+    :type interval: float
+    """
+
+    while True:
+        try:
+            await func(app)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Periodic task %s failed", func.__name__)
+
+        await asyncio.sleep(interval)
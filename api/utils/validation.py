@@ -0,0 +1,191 @@
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from aiohttp import hdrs, web
+from marshmallow import EXCLUDE, ValidationError
+
+from api.utils.exceptions import RequestValidationException
+from api.utils.request_metrics import timed_phase
+
+
+REQUEST_DATA_NAME: str = "data"
+DEFAULT_LOCATIONS: Tuple[str, ...] = ("json",)
+
+
+class SchemaValidator(NamedTuple):
+    """Validator of request data prepared for the route."""
+
+    load: Callable[[Any], dict]
+    locations: Tuple[str, ...]
+    put_into: Optional[str]
+
+
+def setup_validation(app: web.Application) -> None:
+    """
+    Setup validation of requests by schemas of handlers.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    app["validators"] = {}
+    app.on_startup.append(compile_validators)
+    app.middlewares.append(validation_middleware)
+
+
+async def compile_validators(app: web.Application) -> None:
+    """
+    Resolve schemas of all routes once at application startup.
+
+    :param app: Application instance
+    :type app: web.Application
+    """
+
+    validators = app["validators"]
+
+    for route in app.router.routes():
+        for method, func in get_route_handlers(route):
+            schemas = getattr(func, "__schemas__", None)
+
+            if schemas:
+                validators[(route.handler, method)] = [
+                    make_validator(schema) for schema in schemas
+                ]
+
+
+def get_route_handlers(route: web.AbstractRoute) -> List[Tuple[str, Any]]:
+    """
+    Get handlers of the route for each HTTP method.
+
+    :param route: Application route
+    :type route: web.AbstractRoute
+    :return: Pairs of HTTP method and its handler
+    :rtype: List[Tuple[str, Any]]
+    """
+
+    handler = route.handler
+
+    if isinstance(handler, type) and issubclass(handler, web.View):
+        return [
+            (method, getattr(handler, method.lower()))
+            for method in hdrs.METH_ALL
+            if hasattr(handler, method.lower())
+        ]
+
+    return [(route.method, handler)]
+
+
+def make_validator(schema_info: dict) -> SchemaValidator:
+    """
+    Prepare validator for the schema of handler.
+
+    :param schema_info: Schema params attached by `request_schema`
+    :type schema_info: dict
+    :return: Validator of request data
+    :rtype: SchemaValidator
+    """
+
+    return SchemaValidator(
+        # Unknown fields are skipped like webargs parser does
+        load=partial(schema_info["schema"].load, unknown=EXCLUDE),
+        locations=tuple(schema_info.get("locations") or DEFAULT_LOCATIONS),
+        put_into=schema_info.get("put_into"),
+    )
+
+
+@web.middleware
+async def validation_middleware(
+    request: web.Request, handler: Callable
+) -> web.StreamResponse:
+    """
+    Validate request data by precompiled schemas of the route.
+
+    :param request: Input request
+    :type request: web.Request
+    :param handler: Request handler
+    :type handler: Callable
+    :return: Response
+    :rtype: web.StreamResponse
+    """
+
+    validators = request.app["validators"].get(
+        (request.match_info.handler, request.method)
+    )
+
+    if validators is None:
+        return await handler(request)
+
+    try:
+        for validator in validators:
+            locations = await read_locations(request, validator.locations)
+
+            with timed_phase("validation"):
+                data = validator.load(locations)
+
+            if validator.put_into is not None:
+                request[validator.put_into] = data
+            else:
+                request.setdefault(REQUEST_DATA_NAME, {}).update(data)
+    except ValidationError as exc:
+        return RequestValidationException(exc.messages).response()
+
+    return await handler(request)
+
+
+async def read_locations(
+    request: web.Request, locations: Tuple[str, ...]
+) -> Dict[str, Any]:
+    """
+    Collect request data from the locations.
+
+    :param request: Input request
+    :type request: web.Request
+    :param locations: Locations of data, e.g. json or querystring
+    :type locations: Tuple[str, ...]
+    :raise ValidationError: JSON body is invalid
+    :return: Collected data
+    :rtype: Dict[str, Any]
+    """
+
+    data = {}
+
+    for location in reversed(locations):
+        if location == "json":
+            if request.body_exists and await request.read():
+                data.update(await read_json(request))
+        elif location in ("querystring", "query"):
+            data.update(request.query)
+        elif location == "match_info":
+            data.update(request.match_info)
+        elif location == "form":
+            data.update(await request.post())
+        elif location == "headers":
+            data.update(request.headers)
+        elif location == "cookies":
+            data.update(request.cookies)
+
+    return data
+
+
+async def read_json(request: web.Request) -> Dict[str, Any]:
+    """
+    Read JSON object from request body.
+
+    :param request: Input request
+    :type request: web.Request
+    :raise ValidationError: Body isn't a JSON object
+    :return: Decoded JSON object
+    :rtype: Dict[str, Any]
+    """
+
+    try:
+        # Body is already read, so only its decoding is timed
+        with timed_phase("decode"):
+            body = await request.json()
+    except ValueError:
+        body = None
+
+    if not isinstance(body, dict):
+        raise ValidationError("Invalid JSON object.", field_name="json")
+
+    return body
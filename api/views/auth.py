@@ -0,0 +1,69 @@
+from aiohttp import web
+from aiohttp_apispec import docs, request_schema
+from marshmallow import Schema, fields
+
+from api.logic.auth import revoke_token
+from api.logic.users import authenticate_user
+from api.utils.auth import issue_token, login_required
+from api.utils.exceptions import InvalidCredentialsException
+from api.utils.responses import make_response
+from api.utils.validation import REQUEST_DATA_NAME
+
+
+class LoginSchema(Schema):
+    username = fields.Str(required=True, description="username")
+    password = fields.Str(required=True, description="password")
+
+
+class Login(web.View):
+    """Exchange of user's credentials to session token."""
+
+    @docs(tags=["auth"], summary="Issue session token")
+    @request_schema(LoginSchema())
+    async def post(self):
+        """Processing of POST request."""
+
+        credentials = self.request[REQUEST_DATA_NAME]
+
+        async with self.request.app["db"].acquire() as conn:
+            user_id = await authenticate_user(conn, **credentials)
+
+        if user_id is None:
+            return InvalidCredentialsException().response()
+
+        config = self.request.app["config"]
+        token, payload = issue_token(
+            user_id, config["secret_key"], config["TOKEN_TTL"]
+        )
+
+        return make_response(
+            self.request,
+            {
+                "token": token,
+                "user_id": user_id,
+                "expires_at": payload.expires_at,
+            },
+        )
+
+
+class Logout(web.View):
+    """Revocation of session token."""
+
+    @docs(tags=["auth"], summary="Revoke session token")
+    @login_required
+    async def post(self):
+        """Processing of POST request."""
+
+        token = self.request["token"]
+
+        async with self.request.app["db"].acquire() as conn:
+            await revoke_token(
+                conn, token_id=token.token_id, expires_at=token.expires_at
+            )
+
+        # Other workers see revocation after refresh of their lists
+        self.request.app["revoked_tokens"].add(
+            token.token_id, token.expires_at
+        )
+
+        return make_response(self.request, {"revoked": True})
@@ -1,7 +1,24 @@
+from typing import Any, Optional
+
 from aiohttp import web
+from aiohttp_apispec import querystring_schema
+from marshmallow import Schema, fields, validate
+
+from api.utils.exceptions import ApiException
+from api.utils.fieldsets import parse_fields
+from api.utils.responses import make_response
+
+
+PAGE_MAX_LIMIT: int = 100
 
-from api.utils.exceptions import RecordNotFoundException
-from api.utils.json_serializers import to_json
+
+class PageSchema(Schema):
+    limit = fields.Int(
+        missing=20,
+        validate=validate.Range(min=1, max=PAGE_MAX_LIMIT),
+        description="size of page",
+    )
+    cursor = fields.Str(missing=None, description="cursor of next page")
 
 
 class BaseWebView(web.View):
@@ -13,6 +30,12 @@ class BaseWebView(web.View):
         self.get_func = None
         self.delete_func = None
 
+    @property
+    def fields(self):
+        """Fields requested by `fields` query parameter."""
+
+        return parse_fields(self.request.query.get("fields"))
+
     async def get(self):
         """Processing of GET request."""
 
@@ -20,11 +43,13 @@ class BaseWebView(web.View):
 
         async with self.request.app["db"].acquire() as conn:
             try:
-                obj = await self.get_func(conn, **{self.field: field_id})
-            except RecordNotFoundException as exc:
+                obj = await self.get_func(
+                    conn, **{self.field: field_id}, fields=self.fields
+                )
+            except ApiException as exc:
                 return exc.response()
 
-        return web.json_response(text=to_json(obj))
+        return make_response(self.request, obj)
 
     async def delete(self):
         """Processing of DELETE request."""
@@ -34,10 +59,10 @@ class BaseWebView(web.View):
         async with self.request.app["db"].acquire() as conn:
             try:
                 result = await self.delete_func(conn, **{self.field: field_id})
-            except RecordNotFoundException as exc:
+            except ApiException as exc:
                 return exc.response()
 
-        return web.json_response(text=to_json({"deleted": result}))
+        return make_response(self.request, {"deleted": result})
 
 
 class BaseListWebView(BaseWebView):
@@ -53,9 +78,12 @@ class BaseListWebView(BaseWebView):
         """Processing of GET request."""
 
         async with self.request.app["db"].acquire() as conn:
-            objects = await self.get_list_func(conn)
+            try:
+                objects = await self.get_list_func(conn, fields=self.fields)
+            except ApiException as exc:
+                return exc.response()
 
-        return web.json_response(text=to_json(objects))
+        return make_response(self.request, objects)
 
     async def post(self):
         """Processing of POST request."""
@@ -69,10 +97,76 @@ class BaseListWebView(BaseWebView):
         }
 
         async with self.request.app["db"].acquire() as conn:
-            obj_id = await self.create_func(
-                conn,
-                **arguments
-            )
-            obj = await self.get_func(conn, **{self.field: obj_id})
+            try:
+                obj_id = await self.create_func(conn, **arguments)
+                obj = await self.get_func(conn, **{self.field: obj_id})
+            except ApiException as exc:
+                return exc.response()
+
+        return make_response(self.request, obj)
+
+
+class BasePageWebView(web.View):
+    """Default view for getting cursor-paginated list of items."""
 
-        return web.json_response(text=to_json(obj))
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field = None
+        self.page_func = None
+        self.items_name = "items"
+
+    def parse_cursor(self, cursor: Optional[str]) -> Any:
+        """
+        Parse cursor into position passed to page function as `after`.
+
+        :param cursor: Cursor of the page
+        :type cursor: Optional[str]
+        :raise InvalidCursorException: Cursor is invalid
+        :return: Position preceding the page or None for the first page
+        :rtype: Any
+        """
+
+        raise NotImplementedError
+
+    def make_cursor(self, item: Any) -> str:
+        """
+        Make cursor of the page following the item.
+
+        :param item: The last item of the page
+        :type item: Any
+        :return: Cursor
+        :rtype: str
+        """
+
+        raise NotImplementedError
+
+    @querystring_schema(PageSchema())
+    async def get(self):
+        """Processing of GET request."""
+
+        field_id = int(self.request.match_info.get(self.field))
+        query = self.request["querystring"]
+
+        try:
+            after = self.parse_cursor(query["cursor"])
+
+            async with self.request.app["db"].acquire() as conn:
+                # One extra item tells is there a next page
+                page = await self.page_func(
+                    conn,
+                    **{self.field: field_id},
+                    limit=query["limit"] + 1,
+                    after=after,
+                )
+        except ApiException as exc:
+            return exc.response()
+
+        next_cursor = None
+
+        if len(page) > query["limit"]:
+            page = page[: query["limit"]]
+            next_cursor = self.make_cursor(page[-1])
+
+        return make_response(
+            self.request, {self.items_name: page, "next_cursor": next_cursor}
+        )
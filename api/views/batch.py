@@ -0,0 +1,223 @@
+import asyncio
+from functools import partial
+import json
+import logging
+from typing import Any, List, Optional
+
+from aiohttp import hdrs, web
+from aiohttp.abc import AbstractMatchInfo
+from multidict import CIMultiDict
+
+from api.utils.exceptions import ApiException, InvalidBatchException
+from api.utils.responses import JSON_CONTENT_TYPE, make_response
+
+
+BATCH_PATH: str = "/batch"
+BATCH_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+# Error of sub-request failed by unexpected exception
+SERVER_ERROR: str = "Internal server error"
+
+logger = logging.getLogger(__name__)
+
+
+class SubRequest(web.Request):
+    """
+    Sub-request of batch with body given instead of read from connection.
+
+    Route is resolved by the dispatcher, the connection and the task are
+    shared with the batch request.
+    """
+
+    ATTRS = web.Request.ATTRS | frozenset(["body", "route_match"])
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.body = b""
+        self.route_match: Optional[AbstractMatchInfo] = None
+
+    @classmethod
+    def from_request(cls, request: web.Request) -> "SubRequest":
+        """
+        Make template of sub-requests from batch request.
+
+        :param request: Batch request
+        :type request: web.Request
+        :return: Sub-request to clone
+        :rtype: SubRequest
+        """
+
+        return cls(
+            request.message,
+            request.content,
+            request.protocol,
+            request.writer,
+            request.task,
+            asyncio.get_running_loop(),
+        )
+
+    @property
+    def match_info(self) -> AbstractMatchInfo:
+        return self.route_match
+
+    @property
+    def app(self) -> web.Application:
+        return self.route_match.current_app
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class Batch(web.View):
+    """Multiplexing view executing many sub-requests in one request."""
+
+    async def post(self):
+        """Processing of POST request."""
+
+        app = self.request.app
+        config = app["config"]
+
+        try:
+            sub_requests = validate_batch(
+                await self.request.json(), config["BATCH_MAX_REQUESTS"]
+            )
+        except ApiException as exc:
+            return exc.response()
+
+        template = SubRequest.from_request(self.request)
+        semaphore = asyncio.Semaphore(config["BATCH_CONCURRENCY"])
+
+        async def dispatch(sub_request: dict) -> dict:
+            async with semaphore:
+                return await dispatch_sub_request(app, template, sub_request)
+
+        responses = await asyncio.gather(*map(dispatch, sub_requests))
+
+        return make_response(self.request, {"responses": responses})
+
+
+def validate_batch(data: Any, max_requests: int) -> List[dict]:
+    """
+    Validate list of sub-requests.
+
+    :param data: Decoded body of batch request
+    :type data: Any
+    :param max_requests: Max count of sub-requests
+    :type max_requests: int
+    :raise InvalidBatchException: Batch is invalid
+    :return: List of sub-requests
+    :rtype: List[dict]
+    """
+
+    sub_requests = data.get("requests") if isinstance(data, dict) else None
+
+    if not isinstance(sub_requests, list) or not sub_requests:
+        raise InvalidBatchException("List of sub-requests is required")
+
+    if len(sub_requests) > max_requests:
+        raise InvalidBatchException(
+            f"Batch can't contain more than {max_requests} sub-requests"
+        )
+
+    for sub_request in sub_requests:
+        if not isinstance(sub_request, dict):
+            raise InvalidBatchException("Sub-request must be an object")
+
+        method = sub_request.get("method")
+        path = sub_request.get("path")
+
+        if not isinstance(method, str) or method.upper() not in BATCH_METHODS:
+            raise InvalidBatchException(f"Unsupported method: {method}")
+
+        if not isinstance(path, str) or not path.startswith("/"):
+            raise InvalidBatchException(f"Invalid path: {path}")
+
+        if path.split("?")[0].rstrip("/") == BATCH_PATH:
+            raise InvalidBatchException("Batch requests can't be nested")
+
+    return sub_requests
+
+
+async def dispatch_sub_request(
+    app: web.Application, template: SubRequest, sub_request: dict
+) -> dict:
+    """
+    Dispatch sub-request through the application router and middlewares.
+
+    Errors of sub-request are answered by its own response, so they
+    don't fail the other sub-requests.
+
+    :param app: Application instance
+    :type app: web.Application
+    :param template: Template of sub-requests made from batch request
+    :type template: SubRequest
+    :param sub_request: Method, path and body of sub-request
+    :type sub_request: dict
+    :return: Status and body of sub-response
+    :rtype: dict
+    """
+
+    headers = CIMultiDict(template.headers)
+
+    for header in (hdrs.CONTENT_LENGTH, hdrs.TRANSFER_ENCODING):
+        headers.popall(header, None)
+
+    # Sub-responses are embedded into the batch response which is
+    # negotiated as a whole
+    headers[hdrs.ACCEPT] = JSON_CONTENT_TYPE
+
+    body = b""
+
+    if sub_request.get("body") is not None:
+        body = json.dumps(sub_request["body"]).encode("utf-8")
+        headers[hdrs.CONTENT_TYPE] = JSON_CONTENT_TYPE
+        headers[hdrs.CONTENT_LENGTH] = str(len(body))
+
+    request = template.clone(
+        method=sub_request["method"].upper(),
+        rel_url=sub_request["path"],
+        headers=headers,
+    )
+    request.body = body
+
+    try:
+        request.route_match = await app.router.resolve(request)
+        request.route_match.add_app(app)
+        handler = request.route_match.handler
+
+        # The first middleware is the outermost one like in application
+        for middleware in reversed(app.middlewares):
+            handler = partial(middleware, handler=handler)
+
+        response = await handler(request)
+    except web.HTTPException as exc:
+        response = exc
+    except Exception:
+        logger.exception(
+            "Sub-request %s %s failed", request.method, request.path
+        )
+
+        return {"status": 500, "body": {"errors": {"request": SERVER_ERROR}}}
+
+    return {"status": response.status, "body": read_sub_response(response)}
+
+
+def read_sub_response(response: web.StreamResponse) -> Any:
+    """
+    Read body of sub-response.
+
+    :param response: Sub-response
+    :type response: web.StreamResponse
+    :return: Decoded JSON body or text if it isn't JSON
+    :rtype: Any
+    """
+
+    text = getattr(response, "text", None)
+
+    if not text:
+        return None
+
+    if response.content_type == JSON_CONTENT_TYPE:
+        return json.loads(text)
+
+    return text
@@ -0,0 +1,42 @@
+from aiohttp import web
+from aiohttp_apispec import docs, querystring_schema
+from marshmallow import Schema, fields, validate
+
+from api.utils.auth import check_debug_token
+from api.utils.exceptions import ApiException, RequestValidationException
+from api.utils.profiler import render_collapsed
+
+
+class ProfileSchema(Schema):
+    seconds = fields.Float(
+        missing=10.0,
+        validate=validate.Range(min=0, min_inclusive=False),
+        description="duration of profiling",
+    )
+
+
+class Profile(web.View):
+    """Sampling profile of the worker in collapsed stacks format."""
+
+    @docs(tags=["debug"], summary="Profile worker")
+    @querystring_schema(ProfileSchema())
+    async def get(self):
+        """Processing of GET request."""
+
+        app = self.request.app
+        seconds = self.request["querystring"]["seconds"]
+        max_seconds = app["config"]["PROFILE_MAX_SECONDS"]
+
+        try:
+            check_debug_token(self.request)
+
+            if seconds > max_seconds:
+                raise RequestValidationException(
+                    {"seconds": [f"Must be at most {max_seconds}."]}
+                )
+
+            stacks = await app["profiler"].profile(seconds)
+        except ApiException as exc:
+            return exc.response()
+
+        return web.Response(text=render_collapsed(stacks))
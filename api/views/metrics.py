@@ -0,0 +1,15 @@
+from aiohttp import hdrs, web
+
+from api.utils.metrics import METRICS_CONTENT_TYPE
+
+
+class Metrics(web.View):
+    """Metrics of the application worker in Prometheus text format."""
+
+    async def get(self):
+        """Processing of GET request."""
+
+        return web.Response(
+            text=self.request.app["metrics"].render(),
+            headers={hdrs.CONTENT_TYPE: METRICS_CONTENT_TYPE},
+        )
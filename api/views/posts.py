@@ -1,75 +1,42 @@
+from datetime import datetime
+
 from aiohttp import web
+from aiohttp_apispec import docs, request_schema
+from marshmallow import Schema, fields, validate
 
 from api.logic.posts import (
     get_post_or_exception,
     get_posts,
     create_post,
+    comment_post,
+    check_comment_target,
     delete_post,
     get_posts_likes_count,
     get_posts_comments_count,
-    get_posts_comments,
+    get_posts_comments_page,
+    get_comments_replies_page,
     PostNotFoundException,
 )
-from api.utils.exceptions import RecordNotFoundException
-from api.utils.json_serializers import to_json
-from api.views.base import BaseListWebView, BaseWebView
-
-
-class PostList(web.View):
-    """"""
-
-    async def get(self):
-        async with self.request.app["db"].acquire() as conn:
-            posts = await get_posts(conn)
-
-        return web.json_response(text=to_json(posts))
-
-    async def post(self):
-        arguments = await self.request.json()
-
-        async with self.request.app["db"].acquire() as conn:
-            succeed, post_id, errors = await create_post(
-                conn,
-                user_id=arguments.get("user_id"),
-                text=arguments.get("text"),
-                image=arguments.get("image"),
-            )
-
-            if succeed:
-                response, status = (
-                    await get_post_or_exception(conn, post_id=post_id),
-                    201,
-                )
-            else:
-                response, status = {"errors": errors}, 400
-
-        return web.json_response(text=to_json(response), status=status)
+from api.utils.auth import login_required
+from api.utils.cursors import decode_cursor, encode_cursor
+from api.utils.exceptions import (
+    ApiException,
+    CommentRejectedException,
+    InvalidCursorException,
+)
+from api.utils.responses import make_response
+from api.utils.validation import REQUEST_DATA_NAME
+from api.views.base import BaseListWebView, BasePageWebView, BaseWebView
 
 
-class Post(web.View):
+class Post(BaseWebView):
     """"""
 
-    async def get(self):
-        post_id = int(self.request.match_info.get("post_id"))
-
-        async with self.request.app["db"].acquire() as conn:
-            try:
-                post = await get_post_or_exception(conn, post_id=post_id)
-            except PostNotFoundException as exc:
-                return exc.response()
-
-        return web.json_response(text=to_json(post))
-
-    async def delete(self):
-        post_id = int(self.request.match_info.get("post_id"))
-
-        async with self.request.app["db"].acquire() as conn:
-            try:
-                await delete_post(conn, post_id=post_id)
-            except PostNotFoundException as exc:
-                return exc.response()
-
-        return web.json_response()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field = "post_id"
+        self.get_func = get_post_or_exception
+        self.delete_func = delete_post
 
     @staticmethod
     async def likes_count(request: web.Request):
@@ -83,7 +50,7 @@ class Post(web.View):
             except PostNotFoundException as exc:
                 return exc.response()
 
-        return web.json_response(text=to_json({"likes_count": likes_count}))
+        return make_response(request, {"likes_count": likes_count})
 
     @staticmethod
     async def comments_count(request: web.Request):
@@ -97,20 +64,127 @@ class Post(web.View):
             except PostNotFoundException as exc:
                 return exc.response()
 
-        return web.json_response(
-            text=to_json({"comments_count": comments_count})
-        )
+        return make_response(request, {"comments_count": comments_count})
 
-    @staticmethod
-    async def comments(request: web.Request):
-        post_id = int(request.match_info.get("post_id"))
 
-        async with request.app["db"].acquire() as conn:
-            try:
-                comments_count = await get_posts_comments(
-                    conn, post_id=post_id
+class PostList(BaseListWebView, Post):
+    """"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.get_list_func = get_posts
+        self.create_func = create_post
+        self.create_fields = ("user_id", "text", "image")
+
+
+class CommentSchema(Schema):
+    text = fields.Str(
+        required=True, validate=validate.Length(min=1), description="text"
+    )
+    parent_id = fields.Int(missing=None, description="replied comment")
+    client_id = fields.UUID(
+        required=True, description="id of comment generated by client"
+    )
+
+
+class CommentPageWebView(BasePageWebView):
+    """Comments paginated by cursor of timestamp and id."""
+
+    def parse_cursor(self, cursor):
+        after = decode_cursor(cursor, str, int)
+
+        if after is None:
+            return None
+
+        try:
+            timestamp = datetime.fromisoformat(after[0])
+        except ValueError:
+            raise InvalidCursorException()
+
+        # Timestamps of comments are stored without time zone
+        if timestamp.tzinfo is not None:
+            raise InvalidCursorException()
+
+        return timestamp, after[1]
+
+    def make_cursor(self, item):
+        return encode_cursor(item["timestamp"].isoformat(), item["id"])
+
+
+class PostComments(CommentPageWebView):
+    """Cursor-paginated top-level comments with the first replies."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field = "post_id"
+        self.page_func = get_posts_comments_page
+        self.items_name = "comments"
+
+    @login_required
+    @docs(tags=["posts"], summary="Comment post")
+    @request_schema(CommentSchema())
+    async def post(self):
+        """Processing of POST request."""
+
+        post_id = int(self.request.match_info.get("post_id"))
+        data = self.request[REQUEST_DATA_NAME]
+        client_id = str(data["client_id"])
+        queue = self.request.app["comment_queue"]
+
+        try:
+            async with self.request.app["db"].acquire() as conn:
+                if queue is None:
+                    comment_id = await comment_post(
+                        conn,
+                        post_id=post_id,
+                        user_id=self.request["user_id"],
+                        text=data["text"],
+                        parent_id=data["parent_id"],
+                        client_id=client_id,
+                    )
+                else:
+                    # Queued comment may be acknowledged before it's
+                    # written, so errors are reported beforehand. User
+                    # of verified token isn't checked, comment of user
+                    # deleted meanwhile is skipped by the flush
+                    await check_comment_target(
+                        conn, post_id=post_id, parent_id=data["parent_id"]
+                    )
+
+            if queue is not None:
+                future = queue.submit(
+                    (
+                        post_id,
+                        self.request["user_id"],
+                        data["parent_id"],
+                        data["text"],
+                        client_id,
+                    )
                 )
-            except PostNotFoundException as exc:
-                return exc.response()
 
-        return web.json_response(text=to_json({"comments": comments_count}))
+                # Comment is acknowledged before it's written
+                if future is None:
+                    return make_response(
+                        self.request, {"client_id": client_id}, status=202
+                    )
+
+                comment_id = await future
+
+                if comment_id is None:
+                    raise CommentRejectedException()
+        except ApiException as exc:
+            return exc.response()
+
+        return make_response(
+            self.request, {"id": comment_id, "client_id": client_id}
+        )
+
+
+class CommentReplies(CommentPageWebView):
+    """Cursor-paginated replies to the comment."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field = "comment_id"
+        self.page_func = get_comments_replies_page
+        self.items_name = "replies"
@@ -0,0 +1,22 @@
+from aiohttp import web
+
+from api.utils.admission import get_admission_stats
+from api.utils.responses import make_response
+
+
+class Stats(web.View):
+    """Runtime stats of the application worker."""
+
+    async def get(self):
+        """Processing of GET request."""
+
+        app = self.request.app
+        queue = app["comment_queue"]
+
+        return make_response(
+            self.request,
+            {
+                "admission": get_admission_stats(app),
+                "comment_queue": queue.stats() if queue else None,
+            },
+        )
@@ -0,0 +1,108 @@
+from typing import Optional, Tuple
+
+from aiohttp import web
+from aiohttp_apispec import docs, querystring_schema
+from marshmallow import Schema, fields, validate
+
+from api.logic.sync import QUERY_SYNC_LIMIT, get_changes
+from api.utils.cursors import decode_cursor, encode_cursor
+from api.utils.exceptions import (
+    ApiException,
+    InvalidCursorException,
+    InvalidWatermarkException,
+)
+from api.utils.responses import make_response
+
+
+class SyncSchema(Schema):
+    since = fields.Str(
+        missing=None, description="watermark of previous response"
+    )
+    limit = fields.Int(
+        missing=QUERY_SYNC_LIMIT,
+        validate=validate.Range(min=1, max=QUERY_SYNC_LIMIT),
+        description="max count of changes",
+    )
+
+
+class Sync(web.View):
+    """Delta synchronization of posts, comments and likes."""
+
+    @docs(tags=["sync"], summary="Get changes since watermark")
+    @querystring_schema(SyncSchema())
+    async def get(self):
+        """Processing of GET request."""
+
+        query = self.request["querystring"]
+
+        try:
+            watermark, after = parse_watermark(query["since"])
+        except ApiException as exc:
+            return exc.response()
+
+        async with self.request.app["db"].acquire() as conn:
+            changes = await get_changes(
+                conn,
+                # Continued synchronization starts after the last change
+                since=watermark if after is None else None,
+                watermark=watermark if after is not None else None,
+                after=after,
+                limit=query["limit"],
+            )
+
+        after = changes.pop("after")
+        changes["watermark"] = make_watermark(changes["watermark"], after)
+        changes["has_more"] = after is not None
+
+        return make_response(self.request, changes)
+
+
+def make_watermark(
+    watermark: int, after: Optional[Tuple[int, int, int]] = None
+) -> str:
+    """
+    Make watermark of the next synchronization or its next page.
+
+    :param watermark: Watermark of synchronization
+    :type watermark: int
+    :param after: Position of the last change of incomplete page
+    :type after: Optional[Tuple[int, int, int]]
+    :return: Opaque watermark
+    :rtype: str
+    """
+
+    # Transactions' ids don't fit cursors' integers, so they're strings
+    return encode_cursor(*map(str, (watermark, *(after or ()))))
+
+
+def parse_watermark(
+    watermark: Optional[str],
+) -> Tuple[Optional[int], Optional[Tuple[int, int, int]]]:
+    """
+    Parse watermark returned by previous synchronization.
+
+    :param watermark: Opaque watermark
+    :type watermark: Optional[str]
+    :raise InvalidWatermarkException: Watermark can't be parsed
+    :return: Watermark of synchronization and position of the last
+        change if synchronization is continued
+    :rtype: Tuple[Optional[int], Optional[Tuple[int, int, int]]]
+    """
+
+    if not watermark:
+        return None, None
+
+    for types in ((str,), (str,) * 4):
+        try:
+            values = decode_cursor(watermark, *types)
+        except InvalidCursorException:
+            continue
+
+        if not all(value.isascii() and value.isdigit() for value in values):
+            break
+
+        values = tuple(map(int, values))
+
+        return values[0], values[1:] or None
+
+    raise InvalidWatermarkException()
@@ -1,17 +1,32 @@
+from functools import partial
+
+from aiohttp import web
 from aiohttp_apispec import (
     docs,
     request_schema,
     response_schema
 )
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
+from api.logic.suggestions import get_users_suggestions
 from api.logic.users import (
+    FOLLOW_BULK_LIMIT,
     create_user,
     delete_user,
+    follow_users,
     get_users,
+    get_users_followees_page,
+    get_users_followers_page,
     get_user_or_exception,
+    unfollow_users,
 )
-from api.views.base import BaseListWebView, BaseWebView
+from api.utils.admission import admission_controlled
+from api.utils.auth import login_required
+from api.utils.cursors import decode_cursor, encode_cursor
+from api.utils.exceptions import ApiException, ForbiddenException
+from api.utils.responses import make_response
+from api.utils.validation import REQUEST_DATA_NAME
+from api.views.base import BaseListWebView, BasePageWebView, BaseWebView
 
 
 class UserSchema(Schema):
@@ -24,6 +39,15 @@ class UserCreateSchema(Schema):
     password = fields.Str(required=True, description="password")
 
 
+class FolloweesSchema(Schema):
+    ids = fields.List(
+        fields.Int(),
+        required=True,
+        validate=validate.Length(min=1, max=FOLLOW_BULK_LIMIT),
+        description="ids of users",
+    )
+
+
 class User(BaseWebView):
     """"""
 
@@ -31,7 +55,9 @@ class User(BaseWebView):
         super().__init__(*args, **kwargs)
         self.field = "user_id"
         self.get_func = get_user_or_exception
-        self.delete_func = delete_user
+        self.delete_func = partial(
+            delete_user, graph=self.request.app["follower_graph"]
+        )
 
 
 class UserList(BaseListWebView, User):
@@ -45,6 +71,7 @@ class UserList(BaseListWebView, User):
             "username", "name", "email", "password", "description"
         )
 
+    @admission_controlled("signup")
     @docs(
         tags=["mytag"],
         summary="Test method summary",
@@ -53,4 +80,104 @@ class UserList(BaseListWebView, User):
     @request_schema(UserCreateSchema())
     @response_schema(UserSchema, 200)
     async def post(self):
-        await super().post()
+        return await super().post()
+
+
+class UserFollowers(BasePageWebView):
+    """Cursor-paginated followers of the user."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field = "user_id"
+        self.page_func = partial(
+            get_users_followers_page, graph=self.request.app["follower_graph"]
+        )
+        self.items_name = "users"
+
+    def parse_cursor(self, cursor):
+        after = decode_cursor(cursor, int)
+
+        return after[0] if after else None
+
+    def make_cursor(self, item):
+        return encode_cursor(item["id"])
+
+
+class UserFollowees(UserFollowers):
+    """Cursor-paginated, bulk followed and unfollowed followees."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_func = partial(
+            get_users_followees_page, graph=self.request.app["follower_graph"]
+        )
+
+    @login_required
+    @docs(tags=["users"], summary="Follow many users")
+    @request_schema(FolloweesSchema())
+    async def post(self):
+        """Processing of POST request."""
+
+        return await self.change_followees(follow_users, "followed")
+
+    @login_required
+    @docs(tags=["users"], summary="Unfollow many users")
+    @request_schema(FolloweesSchema())
+    async def delete(self):
+        """Processing of DELETE request."""
+
+        return await self.change_followees(unfollow_users, "unfollowed")
+
+    async def change_followees(self, func, result_name: str):
+        """
+        Apply bulk operation to followees of current user.
+
+        :param func: Bulk operation
+        :type func: Callable
+        :param result_name: Name of affected ids in response
+        :type result_name: str
+        :return: Response
+        :rtype: web.Response
+        """
+
+        user_id = int(self.request.match_info.get("user_id"))
+
+        if user_id != self.request["user_id"]:
+            return ForbiddenException().response()
+
+        async with self.request.app["db"].acquire() as conn:
+            try:
+                result = await func(
+                    conn,
+                    user_id=user_id,
+                    followee_ids=self.request[REQUEST_DATA_NAME]["ids"],
+                    graph=self.request.app["follower_graph"],
+                )
+            except ApiException as exc:
+                return exc.response()
+
+        return make_response(self.request, {result_name: result})
+
+
+class UserSuggestions(web.View):
+    """Users suggested to follow."""
+
+    @login_required
+    @docs(tags=["users"], summary="Get users suggested to follow")
+    async def get(self):
+        """Processing of GET request."""
+
+        user_id = int(self.request.match_info.get("user_id"))
+
+        if user_id != self.request["user_id"]:
+            return ForbiddenException().response()
+
+        async with self.request.app["db"].acquire() as conn:
+            try:
+                suggestions = await get_users_suggestions(
+                    conn, user_id=user_id
+                )
+            except ApiException as exc:
+                return exc.response()
+
+        return make_response(self.request, {"suggestions": suggestions})